@@ -0,0 +1,200 @@
+import numpy as np
+import webrtcvad
+from typing import Dict, List, Tuple
+
+# Clipping detection (within 1% of int16 range)
+CLIP_THRESHOLD = int(0.99 * 32767)
+
+# Frames quieter than this never reach the VAD
+DEFAULT_ENERGY_FLOOR_DBFS = -60.0
+
+FULL_SCALE = 32768.0
+
+# Mains hum: fundamentals and harmonics checked in the noise spectrum
+HUM_FUNDAMENTALS = (50.0, 60.0)
+HUM_HARMONICS = 3
+HUM_REFERENCE_BAND = (30.0, 400.0)
+HUM_THRESHOLD_DB = 10.0
+
+# DC offset above this fraction of full scale is reported
+DC_OFFSET_THRESHOLD = 0.01
+
+# Octave band centres for the noise spectrum summary
+NOISE_BANDS_HZ = (63, 125, 250, 500, 1000, 2000, 4000, 8000)
+
+
+def frame_signal(audio: np.ndarray, frame_samples: int, hop: int = None) -> np.ndarray:
+    """Frames of ``audio`` (non-overlapping unless ``hop`` is given) as a read-only 2-D view.
+
+    A trailing partial frame is dropped.
+    """
+    audio = np.ascontiguousarray(audio, dtype=np.int16)
+    hop = hop or frame_samples
+    if frame_samples <= 0 or len(audio) < frame_samples:
+        n_frames = 0
+    else:
+        n_frames = (len(audio) - frame_samples) // hop + 1
+    return np.lib.stride_tricks.as_strided(
+        audio,
+        shape=(n_frames, frame_samples),
+        strides=(hop * audio.itemsize, audio.itemsize),
+        writeable=False
+    )
+
+
+def signal_rms(audio: np.ndarray) -> float:
+    """RMS of an int16 signal normalized to full scale, without a float copy"""
+    if len(audio) == 0:
+        return 0.0
+    energy = np.einsum("i,i->", audio, audio, dtype=np.int64)
+    return float(np.sqrt(energy / len(audio))) / FULL_SCALE
+
+
+def frame_stats(frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-frame energy, RMS, peak and clipped-sample counts in one vectorized pass"""
+    frame_samples = frames.shape[1] if frames.ndim == 2 else 0
+    energy = np.einsum("ij,ij->i", frames, frames, dtype=np.int64)
+    rms = np.sqrt(energy / max(frame_samples, 1)) / FULL_SCALE
+    if len(frames):
+        peak = np.maximum(frames.max(axis=1).astype(np.int32), -frames.min(axis=1).astype(np.int32))
+        clipped = np.count_nonzero((frames >= CLIP_THRESHOLD) | (frames <= -CLIP_THRESHOLD), axis=1)
+    else:
+        peak = np.zeros(0, dtype=np.int32)
+        clipped = np.zeros(0, dtype=np.int64)
+    return {"energy": energy, "rms": rms, "peak": peak, "clipped": clipped}
+
+
+def energy_floor(frame_samples: int, floor_dbfs: float = DEFAULT_ENERGY_FLOOR_DBFS) -> int:
+    """Frame energy (sum of squares) corresponding to an RMS of ``floor_dbfs``"""
+    rms = FULL_SCALE * 10 ** (floor_dbfs / 20)
+    return int(rms * rms * frame_samples)
+
+
+def vad_flags(audio: np.ndarray, samplerate: int, frame_samples: int, vad_mode: int,
+              energy: np.ndarray = None, floor_dbfs: float = DEFAULT_ENERGY_FLOOR_DBFS) -> np.ndarray:
+    """WebRTC VAD decision per frame; frames under the energy floor are skipped as unvoiced.
+
+    Frames are passed to the VAD as zero-copy memoryview slices of ``audio``.
+    Frames the VAD rejects (e.g. unsupported samplerate) count as unvoiced.
+    """
+    audio = np.ascontiguousarray(audio, dtype=np.int16)
+    n_frames = len(audio) // frame_samples if frame_samples > 0 else 0
+    flags = np.zeros(n_frames, dtype=bool)
+    if n_frames == 0:
+        return flags
+
+    if energy is None:
+        energy = frame_stats(frame_signal(audio, frame_samples))["energy"]
+
+    vad = webrtcvad.Vad(vad_mode)
+    raw = memoryview(audio).cast("B")
+    frame_bytes = frame_samples * audio.itemsize
+    for i in np.flatnonzero(energy >= energy_floor(frame_samples, floor_dbfs)):
+        start = int(i) * frame_bytes
+        try:
+            flags[i] = vad.is_speech(raw[start:start + frame_bytes], samplerate)
+        except Exception:
+            flags[i] = False
+    return flags
+
+
+def onset_frame(flags: np.ndarray, start_voiced_frames: int) -> int:
+    """Index of the frame at which ``start_voiced_frames`` voiced frames have been seen, or -1"""
+    if len(flags) == 0:
+        return -1
+    counts = np.cumsum(flags)
+    reached = np.flatnonzero(counts >= max(start_voiced_frames, 1))
+    return int(reached[0]) if len(reached) else -1
+
+
+def voiced_runs(flags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) frame indices of consecutive voiced runs"""
+    padded = np.concatenate(([0], flags.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def voiced_segments(flags: np.ndarray, start_voiced_frames: int, end_unvoiced_frames: int) -> List[Tuple[int, int]]:
+    """Speech segments under start/end hysteresis, as (start, end) frame indices.
+
+    A segment opens on a run of at least ``start_voiced_frames`` consecutive
+    voiced frames and closes once ``end_unvoiced_frames`` unvoiced frames follow.
+    """
+    starts, ends = voiced_runs(flags)
+    return segments_from_runs(starts, ends, start_voiced_frames, end_unvoiced_frames)
+
+
+def segments_from_runs(starts: np.ndarray, ends: np.ndarray, start_voiced_frames: int,
+                       end_unvoiced_frames: int) -> List[Tuple[int, int]]:
+    """``voiced_segments`` on precomputed runs, so one run scan serves many settings"""
+    if len(starts) == 0:
+        return []
+
+    # Runs separated by a short enough gap belong to the same group
+    gaps = starts[1:] - ends[:-1]
+    group_starts = np.concatenate(([0], np.flatnonzero(gaps >= end_unvoiced_frames) + 1))
+
+    # Within a group the segment opens at the first run long enough to trigger
+    run_index = np.arange(len(starts))
+    qualifies = (ends - starts) >= max(start_voiced_frames, 1)
+    first_trigger = np.minimum.reduceat(np.where(qualifies, run_index, len(starts)), group_starts)
+    group_last = np.concatenate((group_starts[1:] - 1, [len(starts) - 1]))
+
+    valid = first_trigger < len(starts)
+    return list(zip(starts[first_trigger[valid]].tolist(), ends[group_last[valid]].tolist()))
+
+
+def noise_spectrum(audio: np.ndarray, samplerate: int) -> Dict[str, object]:
+    """Averaged noise spectrum with mains hum and DC offset diagnostics.
+
+    The capture is framed once (Hann window, 50% overlap) and transformed with
+    a single batched rFFT; bins are ~3-4 Hz wide so 50 and 60 Hz separate.
+    """
+    nfft = 1 << int(np.ceil(np.log2(max(samplerate, 4) / 4)))
+    if len(audio) < nfft:
+        audio = np.concatenate((audio, np.zeros(nfft - len(audio), dtype=np.int16)))
+    frames = frame_signal(audio, nfft, nfft // 2)
+
+    # DC offset from the raw frames, before windowing
+    dc_offset = float(frames.mean()) / FULL_SCALE if frames.size else 0.0
+
+    window = np.hanning(nfft)
+    spectrum = np.fft.rfft((frames - frames.mean(axis=1, keepdims=True)) * window, axis=1)
+    # One-sided power per bin, normalized so the bins sum to the mean square (full scale = 1)
+    power = 2 * np.mean(np.abs(spectrum) ** 2, axis=0) / (nfft * np.sum(window ** 2) * FULL_SCALE ** 2)
+    freqs = np.fft.rfftfreq(nfft, 1.0 / samplerate)
+    eps = 1e-20
+
+    # Hum: strongest bin near each harmonic vs the median of the low band
+    in_band = (freqs >= HUM_REFERENCE_BAND[0]) & (freqs <= HUM_REFERENCE_BAND[1])
+    reference = float(np.median(power[in_band])) if in_band.any() else eps
+    bin_hz = freqs[1]
+    hum_hz, hum_db = None, 0.0
+    for fundamental in HUM_FUNDAMENTALS:
+        harmonics = fundamental * np.arange(1, HUM_HARMONICS + 1)
+        centre = np.rint(harmonics / bin_hz).astype(int)
+        centre = centre[centre + 1 < len(power)]
+        if len(centre) == 0:
+            continue
+        peaks = np.max(power[centre[:, None] + np.array([-1, 0, 1])], axis=1)
+        prominence = 10 * np.log10(max(float(peaks.mean()), eps) / max(reference, eps))
+        if prominence > hum_db:
+            hum_hz, hum_db = fundamental, prominence
+
+    # Octave band levels (dBFS), bands above Nyquist omitted
+    bands = {}
+    for centre_hz in NOISE_BANDS_HZ:
+        lo, hi = centre_hz / np.sqrt(2), centre_hz * np.sqrt(2)
+        if hi > samplerate / 2:
+            break
+        mask = (freqs >= lo) & (freqs < hi)
+        bands[str(centre_hz)] = round(float(10 * np.log10(max(float(power[mask].sum()), eps))), 1)
+
+    return {
+        "noise_floor_dbfs": round(float(10 * np.log10(max(float(power[1:].sum()), eps))), 1),
+        "hum_hz": hum_hz if hum_db >= HUM_THRESHOLD_DB else None,
+        "hum_db": round(float(hum_db), 1),
+        "dc_offset": round(dc_offset, 5),
+        "dc_offset_detected": abs(dc_offset) >= DC_OFFSET_THRESHOLD,
+        "noise_bands": bands,
+    }
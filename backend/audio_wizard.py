@@ -1,20 +1,42 @@
 
 import os
-import json
 import time
 import logging
-import platform
+import contextlib
 import numpy as np
-from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
-import sounddevice as sd
-import webrtcvad
 from pathlib import Path
 
+from capture_buffer import CaptureBuffer
+from audio_analysis import HUM_THRESHOLD_DB, frame_signal, frame_stats, noise_spectrum, onset_frame, signal_rms, vad_flags
+from resampler import to_analysis_rate
+from stream_stats import StreamStats
+from capture_backends import SessionRecorder, SoundDeviceBackend
+from device_cache import DeviceCapabilityCache, device_fingerprint, device_list_signature
+from config_manager import ConfigManager
+from vad_tuning import SILENCE_HOLD_MS, START_VOICED_FRAMES, VAD_MODES, evaluate_setting, tune_vad
+
 logger = logging.getLogger(__name__)
 
+# How often live levels are reported while recording
+PROGRESS_INTERVAL_SEC = 0.1
+
+# Extra capacity preallocated beyond the requested capture duration
+CAPTURE_HEADROOM_SEC = 0.5
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+class WizardCancelled(Exception):
+    """Raised inside a wizard run when its cancel event is set"""
+    pass
+
 class AudioWizard:
-    def __init__(self):
+    def __init__(self, backend=None, config_manager: Optional[ConfigManager] = None,
+                 rescan_marker: Optional[str] = None):
+        # Capture backend: live PortAudio by default, or a ReplayBackend offline
+        self.backend = backend or SoundDeviceBackend()
         self.zandalee_home = os.getenv("ZANDALEE_HOME", "C:\\Users\\teren\\Documents\\Zandalee")
         self.config_dir = os.path.join(self.zandalee_home, "config")
         self.audio_config_path = os.path.join(self.config_dir, "audio.json")
@@ -22,16 +44,55 @@ class AudioWizard:
         # Ensure directories exist
         os.makedirs(self.config_dir, exist_ok=True)
         
-        # VAD setup
-        self.vad = webrtcvad.Vad()
+        # audio.json is owned by the ConfigManager so every writer shares one schema
+        self.config_manager = config_manager or ConfigManager(self.zandalee_home)
+        
+        # Device list and samplerate probes are cached; the list is re-read on refresh
+        self.device_cache = DeviceCapabilityCache(os.path.join(self.config_dir, "device_cache.json"))
+        self._devices: Optional[List[Dict[str, Any]]] = None
+        self._fingerprints: Dict[int, Tuple[str, str]] = {}
+        
+        # With several server workers, a refresh in one touches this file so the others re-scan too
+        self.rescan_marker = rescan_marker
+        self._rescan_seen = 0
+        
+    def _marker_mtime(self) -> int:
+        try:
+            return os.stat(self.rescan_marker).st_mtime_ns if self.rescan_marker else 0
+        except FileNotFoundError:
+            return 0
+    
+    def _mark_rescan(self) -> int:
+        os.makedirs(os.path.dirname(self.rescan_marker), exist_ok=True)
+        with open(self.rescan_marker, "a"):
+            pass
+        os.utime(self.rescan_marker)
+        return self._marker_mtime()
+    
+    def list_devices(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """List available input devices, filtered for real devices.
+        
+        Served from memory after the first call; ``refresh`` re-scans the
+        host audio system (picking up hotplugged devices), as does the next
+        call in every other worker sharing ``rescan_marker``.
+        """
+        marker = self._marker_mtime()
+        if self._devices is not None and not refresh and marker == self._rescan_seen:
+            return [dict(d) for d in self._devices]
         
-    def list_devices(self) -> List[Dict[str, Any]]:
-        """List available input devices, filtered for real devices"""
         try:
-            devices = sd.query_devices()
+            if self._devices is not None and not self.backend.rescan():
+                # Re-initializing PortAudio would kill the open streams (level
+                # monitor, wizard capture); keep the current list until they close
+                return [dict(d) for d in self._devices]
+            devices = self.backend.query_devices()
             input_devices = []
+            fingerprints = {}
             
             for i, device in enumerate(devices):
+                hostapi = self.backend.hostapi_name(device.get('hostapi', 0))
+                fingerprints[i] = (device_fingerprint(device['name'], hostapi, device['max_input_channels'],
+                                                      device.get('max_output_channels', 0)), device['name'].strip())
                 if device['max_input_channels'] > 0:
                     # Filter out problematic devices
                     name = device['name'].strip()
@@ -44,11 +105,17 @@ class AudioWizard:
                     input_devices.append({
                         'id': i,
                         'name': name,
+                        'hostapi': hostapi,
                         'max_input_channels': device['max_input_channels'],
                         'samplerate': int(device['default_samplerate'])
                     })
             
-            return input_devices
+            # Any change to the device list invalidates the cached probes
+            self.device_cache.validate(device_list_signature(fp for fp, _ in fingerprints.values()))
+            self._fingerprints = fingerprints
+            self._devices = input_devices
+            self._rescan_seen = self._mark_rescan() if refresh and self.rescan_marker else marker
+            return [dict(d) for d in input_devices]
         except Exception as e:
             logger.error(f"Failed to list devices: {e}")
             return []
@@ -58,122 +125,163 @@ class AudioWizard:
         if samplerates is None:
             samplerates = [16000, 48000, 44100]
         
+        if self._devices is None:
+            self.list_devices()
+        fingerprint, name = self._fingerprints.get(device_id, (None, ""))
+        
         for sr in samplerates:
+            cached = self.device_cache.lookup(fingerprint, sr) if fingerprint else None
+            if cached is not None:
+                if cached:
+                    return sr
+                continue
+            
             try:
                 # Try to open a brief stream to test
-                with sd.RawInputStream(
-                    device=device_id,
-                    samplerate=sr,
-                    channels=1,
-                    dtype='int16',
-                    blocksize=int(sr * 0.01)  # 10ms
-                ):
-                    return sr
+                with self.backend.input_stream(device_id, sr, int(sr * 0.01)):  # 10ms
+                    ok = True
             except Exception:
-                continue
+                ok = False
+            
+            if fingerprint:
+                self.device_cache.store(fingerprint, name, sr, ok)
+            if ok:
+                return sr
         
         return None
     
     def capture_audio(self, device_id: int, samplerate: int, duration_sec: float) -> Tuple[np.ndarray, bool]:
         """Capture audio from device"""
-        frames_per_buffer = int(samplerate * 0.01)  # 10ms
-        total_frames = int(samplerate * duration_sec)
-        audio_data = []
-        had_errors = False
+        audio, had_errors, _ = self.capture_many({device_id: samplerate}, duration_sec)[device_id]
+        return audio, had_errors
+    
+    def capture_many(self, device_rates: Dict[int, int], duration_sec: float,
+                     phase: str = "capture", progress: Optional[ProgressCallback] = None,
+                     cancel_event=None) -> Dict[int, Tuple[np.ndarray, bool, Dict[str, Any]]]:
+        """Capture from several devices at once over the same time window.
+        
+        Returns (audio, had_errors, stream_stats) per device, where had_errors
+        means the stream failed to open or delivered too little audio; xruns
+        are counted in stream_stats instead. Reports live per-device RMS
+        through ``progress`` and raises ``WizardCancelled`` as soon as
+        ``cancel_event`` is set.
+        """
+        # Preallocate each capture (with headroom) so callbacks never allocate per sample
+        buffers = {
+            device_id: CaptureBuffer(int(samplerate * (duration_sec + CAPTURE_HEADROOM_SEC)))
+            for device_id, samplerate in device_rates.items()
+        }
+        blocksizes = {device_id: int(samplerate * 0.01) for device_id, samplerate in device_rates.items()}  # 10ms
+        stream_stats = {
+            device_id: StreamStats(samplerate, blocksizes[device_id],
+                                   (duration_sec + CAPTURE_HEADROOM_SEC) * samplerate / blocksizes[device_id])
+            for device_id, samplerate in device_rates.items()
+        }
+        errors = {device_id: False for device_id in device_rates}
+        levels = {device_id: 0.0 for device_id in device_rates}
         
-        try:
+        def make_callback(device_id):
+            buffer = buffers[device_id]
+            stats = stream_stats[device_id]
             def callback(indata, frames, time, status):
-                nonlocal had_errors
-                if status:
-                    had_errors = True
-                    logger.warning(f"Audio callback status: {status}")
-                audio_data.extend(indata[:, 0])  # Take first channel
-            
-            with sd.RawInputStream(
-                device=device_id,
-                samplerate=samplerate,
-                channels=1,
-                dtype='int16',
-                blocksize=frames_per_buffer,
-                callback=callback
-            ):
-                # Record for specified duration
-                sd.sleep(int(duration_sec * 1000))
+                stats.record(time, status)
+                levels[device_id] = signal_rms(buffer.write(indata))
+            return callback
+        
+        with contextlib.ExitStack() as stack:
+            # Open every stream first, then record all of them for the same window
+            for device_id, samplerate in device_rates.items():
+                try:
+                    stack.enter_context(self.backend.input_stream(
+                        device_id, samplerate, blocksizes[device_id], make_callback(device_id)
+                    ))
+                except Exception as e:
+                    logger.error(f"Capture failed on device {device_id}: {e}")
+                    errors[device_id] = True
             
-            if len(audio_data) < total_frames * 0.8:  # Allow some tolerance
-                logger.warning(f"Insufficient audio data captured: {len(audio_data)}/{total_frames}")
-                had_errors = True
-            
-            return np.array(audio_data, dtype=np.int16), had_errors
-            
-        except Exception as e:
-            logger.error(f"Capture failed: {e}")
-            return np.array([], dtype=np.int16), True
+            # Record in short slices so progress and cancellation stay responsive
+            deadline = self.backend.monotonic() + duration_sec
+            while True:
+                remaining = deadline - self.backend.monotonic()
+                if remaining <= 0:
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    raise WizardCancelled()
+                self.backend.sleep(int(min(remaining, PROGRESS_INTERVAL_SEC) * 1000))
+                if progress:
+                    progress({"type": "levels", "phase": phase, "levels": dict(levels)})
+        
+        results = {}
+        for device_id, samplerate in device_rates.items():
+            total_frames = int(samplerate * duration_sec)
+            captured = buffers[device_id].view()
+            if len(captured) < total_frames * 0.8:  # Allow some tolerance
+                logger.warning(f"Insufficient audio data captured on device {device_id}: "
+                               f"{len(captured)}/{total_frames}")
+                errors[device_id] = True
+            summary = stream_stats[device_id].summary()
+            if summary["dropouts"]:
+                logger.warning(f"Device {device_id} {phase}: {summary['overflows']} overflows, "
+                               f"{summary['underflows']} underflows, {summary['late_callbacks']} late callbacks")
+            results[device_id] = (captured, errors[device_id], summary)
+        
+        return results
     
     def detect_voice_segments(self, audio: np.ndarray, samplerate: int, 
                             frame_ms: int = 10, vad_mode: int = 1,
                             start_voiced_frames: int = 2) -> Tuple[List[bool], float, int]:
         """Use WebRTC VAD to detect voice segments"""
-        self.vad.set_mode(vad_mode)
-        
+        # The VAD only accepts 8/16/32/48 kHz; analyze every device at 16 kHz
+        audio, samplerate = to_analysis_rate(audio, samplerate)
         frame_samples = int(samplerate * frame_ms / 1000)
-        total_frames = len(audio) // frame_samples
-        voice_flags = []
-        voiced_count = 0
-        start_delay_frames = -1
-        
-        for i in range(total_frames):
-            start_idx = i * frame_samples
-            end_idx = start_idx + frame_samples
-            frame = audio[start_idx:end_idx]
-            
-            if len(frame) < frame_samples:
-                break
-            
-            # Convert to bytes for VAD
-            frame_bytes = frame.tobytes()
-            
-            try:
-                is_voice = self.vad.is_speech(frame_bytes, samplerate)
-                voice_flags.append(is_voice)
-                
-                if is_voice:
-                    voiced_count += 1
-                    if start_delay_frames == -1 and voiced_count >= start_voiced_frames:
-                        start_delay_frames = i
-                        
-            except Exception:
-                voice_flags.append(False)
-        
-        voiced_ratio = voiced_count / max(total_frames, 1)
+        flags = vad_flags(audio, samplerate, frame_samples, vad_mode)
+        return self._summarize_voice(flags, frame_ms, start_voiced_frames)
+    
+    def _summarize_voice(self, flags: np.ndarray, frame_ms: int,
+                         start_voiced_frames: int) -> Tuple[List[bool], float, int]:
+        """Voiced ratio and start delay from per-frame VAD flags"""
+        voiced_ratio = int(np.count_nonzero(flags)) / max(len(flags), 1)
+        start_delay_frames = onset_frame(flags, start_voiced_frames)
         start_delay_ms = start_delay_frames * frame_ms if start_delay_frames >= 0 else 0
-        
-        return voice_flags, voiced_ratio, start_delay_ms
+        return flags.tolist(), voiced_ratio, start_delay_ms
     
     def compute_audio_metrics(self, noise_audio: np.ndarray, voice_audio: np.ndarray, 
-                            samplerate: int, frame_ms: int = 10) -> Dict[str, float]:
-        """Compute comprehensive audio quality metrics"""
+                            samplerate: int, frame_ms: int = 10,
+                            stream_stats: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Compute comprehensive audio quality metrics.
+        
+        ``stream_stats`` are the capture_many summaries of the streams that
+        recorded the audio; their xrun counts become the dropout metric.
+        """
         eps = 1e-10
+        frame_samples = int(samplerate * frame_ms / 1000)
         
-        # RMS calculations
-        noise_rms = np.sqrt(np.mean(noise_audio.astype(float) ** 2)) / 32768.0
-        voice_rms = np.sqrt(np.mean(voice_audio.astype(float) ** 2)) / 32768.0
+        # RMS calculations (integer accumulation, no float copies of the signal)
+        noise_rms = signal_rms(noise_audio)
+        voice_rms = signal_rms(voice_audio)
         
         # SNR calculation
         snr_db = 20 * np.log10(max(voice_rms, eps) / max(noise_rms, eps))
         
-        # Voice activity detection
-        voice_flags, voiced_ratio, start_delay_ms = self.detect_voice_segments(
-            voice_audio, samplerate, frame_ms
-        )
-        
-        # Clipping detection (within 1% of int16 range)
-        clipping_threshold = int(0.99 * 32767)
-        clipped_samples = np.sum(np.abs(voice_audio) >= clipping_threshold)
+        # Voice activity detection at 16 kHz (frames below the energy floor skip the VAD)
+        analysis_audio, analysis_rate = to_analysis_rate(voice_audio, samplerate)
+        analysis_samples = int(analysis_rate * frame_ms / 1000)
+        analysis_stats = frame_stats(frame_signal(analysis_audio, analysis_samples))
+        flags = vad_flags(analysis_audio, analysis_rate, analysis_samples, 1, energy=analysis_stats["energy"])
+        _, voiced_ratio, start_delay_ms = self._summarize_voice(flags, frame_ms, 2)
+        
+        # Clipping detection (within 1% of int16 range) on the native-rate capture,
+        # since the resampling filter can smooth over clipped peaks
+        stats = frame_stats(frame_signal(voice_audio, frame_samples))
+        clipped_samples = int(stats["clipped"].sum())
         clipping_pct = (clipped_samples / max(len(voice_audio), 1)) * 100
         
-        # For now, dropout detection is basic (would need stream callback status)
-        dropouts = 0
+        # Dropouts: overflows, underflows and missing blocks across the capture phases
+        stream_stats = stream_stats or []
+        dropouts = sum(stats['dropouts'] for stats in stream_stats)
+        
+        # Hum and DC offset from the noise floor recording
+        spectrum = noise_spectrum(noise_audio, samplerate)
         
         return {
             'noise_rms': float(noise_rms),
@@ -182,7 +290,12 @@ class AudioWizard:
             'voiced_ratio': float(voiced_ratio),
             'start_delay_ms': float(start_delay_ms),
             'clipping_pct': float(clipping_pct),
-            'dropouts': int(dropouts)
+            'dropouts': int(dropouts),
+            'overflows': sum(stats['overflows'] for stats in stream_stats),
+            'underflows': sum(stats['underflows'] for stats in stream_stats),
+            'late_callbacks': sum(stats['late_callbacks'] for stats in stream_stats),
+            'jitter_ms': max((stats['jitter_ms'] for stats in stream_stats), default=0.0),
+            **spectrum
         }
     
     def compute_device_score(self, metrics: Dict[str, float]) -> float:
@@ -208,12 +321,22 @@ class AudioWizard:
         # Dropout penalty (target 0)
         dropout_penalty = min(metrics['dropouts'] / 10.0, 1)
         
+        # Mains hum penalty (prominence above the detection threshold, full at +20 dB)
+        hum_penalty = 0.0
+        if metrics.get('hum_hz'):
+            hum_penalty = np.clip((metrics.get('hum_db', 0.0) - HUM_THRESHOLD_DB) / 20.0, 0, 1)
+        
+        # DC offset penalty (full at 5% of full scale)
+        dc_penalty = np.clip(abs(metrics.get('dc_offset', 0.0)) / 0.05, 0, 1)
+        
         # Weighted score
         score = (0.50 * snr_norm + 
                 0.20 * voice_score - 
                 0.15 * delay_penalty - 
                 0.10 * clipping_penalty - 
-                0.05 * dropout_penalty)
+                0.05 * dropout_penalty -
+                0.05 * hum_penalty -
+                0.05 * dc_penalty)
         
         return max(0.0, score)
     
@@ -231,7 +354,7 @@ class AudioWizard:
         try:
             # Phase 1: Noise floor (1 second)
             logger.debug(f"  Phase 1: Recording noise floor")
-            noise_audio, noise_errors = self.capture_audio(device_id, samplerate, 1.0)
+            noise_audio, noise_errors, noise_stats = self.capture_many({device_id: samplerate}, 1.0)[device_id]
             if noise_errors or len(noise_audio) == 0:
                 logger.warning(f"Device {device_id} noise capture failed")
                 return None
@@ -247,37 +370,129 @@ class AudioWizard:
                 pass  # Skip beep if not available
             
             # Record voice with preroll
-            voice_audio, voice_errors = self.capture_audio(device_id, samplerate, 6.0)  # 6 seconds for voice test
+            voice_audio, voice_errors, voice_stats = self.capture_many({device_id: samplerate}, 6.0)[device_id]  # 6 seconds for voice test
             if voice_errors or len(voice_audio) == 0:
                 logger.warning(f"Device {device_id} voice capture failed")
                 return None
             
-            # Compute metrics
-            metrics = self.compute_audio_metrics(
-                noise_audio, voice_audio, samplerate, 
-                config.get('frame_ms', 10)
-            )
-            
-            # Compute score
-            score = self.compute_device_score(metrics)
-            
-            result = {
-                'id': device_id,
-                'name': device_name,
-                'samplerate': samplerate,
-                'score': score,
-                **metrics
-            }
-            
-            logger.info(f"  Results: SNR={metrics['snr_db']:.1f}dB, Voiced={metrics['voiced_ratio']*100:.1f}%, Score={score*100:.1f}")
-            return result
+            return self.score_device(device_id, device_name, samplerate, noise_audio, voice_audio, config,
+                                     [noise_stats, voice_stats])
             
         except Exception as e:
             logger.error(f"Device {device_id} test failed: {e}")
             return None
     
-    def run_wizard(self, config: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Run the complete mic wizard"""
+    def score_device(self, device_id: int, device_name: str, samplerate: int,
+                     noise_audio: np.ndarray, voice_audio: np.ndarray,
+                     config: Dict[str, Any],
+                     stream_stats: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Compute metrics and score for one device from its captured audio"""
+        metrics = self.compute_audio_metrics(
+            noise_audio, voice_audio, samplerate, 
+            config.get('frame_ms', 10), stream_stats
+        )
+        score = self.compute_device_score(metrics)
+        
+        logger.info(f"  Device {device_id}: SNR={metrics['snr_db']:.1f}dB, "
+                    f"Voiced={metrics['voiced_ratio']*100:.1f}%, Dropouts={metrics['dropouts']}, "
+                    f"Score={score*100:.1f}")
+        return {
+            'id': device_id,
+            'name': device_name,
+            'samplerate': samplerate,
+            'score': score,
+            **metrics
+        }
+    
+    def test_devices_concurrently(self, devices: List[Dict[str, Any]], config: Dict[str, Any],
+                                  progress: Optional[ProgressCallback] = None,
+                                  cancel_event=None,
+                                  recorder: Optional[SessionRecorder] = None,
+                                  captures: Optional[Dict[int, Tuple[np.ndarray, np.ndarray]]] = None) -> List[Dict[str, Any]]:
+        """Record every device through one shared noise and voice phase, then score them in parallel.
+        
+        If ``captures`` is given it receives each scored device's (noise, voice) audio.
+        """
+        def report(event):
+            if progress:
+                progress(event)
+        
+        # Probe samplerates (each probe is a brief open/close)
+        candidates = {}
+        report({"type": "phase", "phase": "probe"})
+        for device in devices:
+            if cancel_event is not None and cancel_event.is_set():
+                raise WizardCancelled()
+            samplerate = self.test_device_samplerates(device['id'], config.get('samplerates', [16000, 48000, 44100]))
+            report({"type": "probe", "device": device['id'], "name": device['name'], "samplerate": samplerate})
+            if samplerate:
+                candidates[device['id']] = (device, samplerate)
+            else:
+                logger.warning(f"Device {device['id']} failed all samplerate tests")
+        
+        if not candidates:
+            return []
+        
+        device_rates = {device_id: samplerate for device_id, (_, samplerate) in candidates.items()}
+        
+        # Phase 1: Noise floor (1 second), all devices at once
+        logger.info(f"Phase 1: Recording noise floor on {len(device_rates)} devices")
+        report({"type": "phase", "phase": "noise", "duration_sec": 1.0})
+        noise = self.capture_many(device_rates, 1.0, "noise", progress, cancel_event)
+        
+        # Phase 2: Voice test, all devices hear the same utterance
+        logger.info(f"Phase 2: Voice test - say '{config.get('voice_prompt', 'testing one two three')}'")
+        report({"type": "phase", "phase": "voice", "duration_sec": 6.0,
+                "prompt": config.get('voice_prompt', 'testing one two three')})
+        try:
+            import winsound
+            winsound.Beep(800, 200)  # 800Hz for 200ms
+        except:
+            pass  # Skip beep if not available
+        voice = self.capture_many(device_rates, 6.0, "voice", progress, cancel_event)
+        
+        # Save the raw takes for offline replay
+        if recorder:
+            for phase, takes in (("noise", noise), ("voice", voice)):
+                for device_id, (audio, _, stats) in takes.items():
+                    device, samplerate = candidates[device_id]
+                    recorder.add_take(phase, device_id, device['name'], samplerate, audio, stats)
+        
+        # Score every device that captured cleanly, in parallel
+        jobs = []
+        for device_id, (device, samplerate) in candidates.items():
+            noise_audio, noise_errors, noise_stats = noise[device_id]
+            voice_audio, voice_errors, voice_stats = voice[device_id]
+            if noise_errors or len(noise_audio) == 0 or voice_errors or len(voice_audio) == 0:
+                logger.warning(f"Device {device_id} capture failed")
+                continue
+            jobs.append((device_id, device['name'], samplerate, noise_audio, voice_audio, config,
+                         [noise_stats, voice_stats]))
+            if captures is not None:
+                captures[device_id] = (noise_audio, voice_audio)
+        
+        report({"type": "phase", "phase": "scoring"})
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), os.cpu_count() or 1))) as executor:
+            futures = [executor.submit(self.score_device, *job) for job in jobs]
+            for future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Device scoring failed: {e}")
+                    continue
+                results.append(result)
+                report({"type": "result", "device": result['id'], "result": result})
+        
+        return results
+    
+    def run_wizard(self, config: Dict[str, Any] = None, progress: Optional[ProgressCallback] = None,
+                   cancel_event=None) -> Dict[str, Any]:
+        """Run the complete mic wizard.
+        
+        Blocking. ``progress`` receives event dicts (phase, probe, levels, result);
+        setting ``cancel_event`` (a threading.Event) stops the run without saving.
+        """
         if config is None:
             config = {}
         
@@ -289,6 +504,8 @@ class AudioWizard:
         config.setdefault('silence_hold_ms', 5000)
         config.setdefault('preroll_ms', 500)
         config.setdefault('voice_prompt', 'testing one two three')
+        config.setdefault('record_session', False)
+        config.setdefault('auto_tune_vad', True)
         
         logger.info("Starting Mic Wizard")
         
@@ -298,13 +515,26 @@ class AudioWizard:
             return {"ok": False, "error": "no_input_devices"}
         
         logger.info(f"Found {len(devices)} candidate devices")
+        if progress:
+            progress({"type": "devices", "devices": devices})
         
-        # Test each device
-        results = []
-        for device in devices:
-            result = self.test_single_device(device['id'], device['name'], config)
-            if result:
-                results.append(result)
+        # Optionally record the raw captures (WAV + session.json) for offline replay
+        recorder = None
+        if config['record_session']:
+            session_dir = config['record_session'] if isinstance(config['record_session'], str) else \
+                os.path.join(self.zandalee_home, "wizard_sessions", datetime.now().strftime("%Y%m%d-%H%M%S"))
+            recorder = SessionRecorder(session_dir)
+        
+        # Test all devices through one shared noise/voice pass
+        try:
+            captures = {}
+            results = self.test_devices_concurrently(devices, config, progress, cancel_event, recorder, captures)
+        except WizardCancelled:
+            logger.info("Mic Wizard cancelled")
+            return {"ok": False, "error": "cancelled"}
+        
+        if recorder:
+            recorder.finish(config, {"results": results})
         
         if not results:
             return {"ok": False, "error": "no_working_devices"}
@@ -314,6 +544,14 @@ class AudioWizard:
         
         # Choose best device
         chosen_device = results[0]
+        
+        # Tune VAD mode and hysteresis on the chosen device's own captures
+        vad_tuning = None
+        if config['auto_tune_vad']:
+            if progress:
+                progress({"type": "phase", "phase": "tuning"})
+            vad_tuning = self.tune_vad_settings(chosen_device, captures[chosen_device['id']], config)
+        
         chosen_config = {
             'id': chosen_device['id'],
             'name': chosen_device['name'],
@@ -331,48 +569,80 @@ class AudioWizard:
         
         logger.info(f"Wizard complete. Chosen device: {chosen_device['name']} (score: {chosen_device['score']*100:.1f})")
         
-        return {
+        response = {
             "ok": True,
             "results": results,
             "chosen": chosen_config
         }
+        if vad_tuning is not None:
+            response["vad_tuning"] = vad_tuning
+        if recorder:
+            response["session_dir"] = recorder.session_dir
+        return response
+    
+    def tune_vad_settings(self, device: Dict[str, Any], audio: Tuple[np.ndarray, np.ndarray],
+                          config: Dict[str, Any]) -> Dict[str, Any]:
+        """Grid-search VAD settings for a device and apply the best one to ``config``.
+        
+        The requested settings are always part of the grid so the report can
+        compare them with the tuned choice. ``config`` is left untouched if
+        no setting detects the speech.
+        """
+        noise_audio, voice_audio = audio
+        requested = {
+            'vad_mode': config['vad_mode'],
+            'start_voiced_frames': config['start_voiced_frames'],
+            'silence_hold_ms': config['silence_hold_ms']
+        }
+        tuning = tune_vad(
+            noise_audio, voice_audio, device['samplerate'], config['frame_ms'], config['preroll_ms'],
+            vad_modes=sorted(set(VAD_MODES) | {requested['vad_mode']}),
+            start_voiced_frames=sorted(set(START_VOICED_FRAMES) | {requested['start_voiced_frames']}),
+            silence_hold_ms=sorted(set(SILENCE_HOLD_MS) | {requested['silence_hold_ms']})
+        )
+        
+        report = {"ok": tuning["ok"], "requested": requested}
+        if not tuning["ok"]:
+            logger.warning(f"VAD tuning skipped: {tuning['error']}")
+            report["error"] = tuning["error"]
+            return report
+        
+        best = tuning["best"]
+        for key in requested:
+            config[key] = best[key]
+        report.update({
+            "onset_ms": tuning["onset_ms"],
+            "chosen": best,
+            "requested_result": evaluate_setting(tuning, **requested),
+            "curve": tuning["curve"]
+        })
+        return report
     
     def save_audio_config(self, config: Dict[str, Any]) -> bool:
-        """Save audio configuration to local JSON file"""
-        try:
-            full_config = {
-                "machine": platform.node(),
-                "device_id": config['id'],
-                "device_name": config['name'],
-                "samplerate": config['samplerate'],
-                "frame_ms": config['frame_ms'],
-                "vad_mode": config['vad_mode'],
-                "start_voiced_frames": config['start_voiced_frames'],
-                "end_unvoiced_frames": config['end_unvoiced_frames'],
-                "preroll_ms": config['preroll_ms'],
-                "silence_hold_ms": config['silence_hold_ms'],
-                "updated_at": datetime.now().isoformat()
-            }
-            
-            with open(self.audio_config_path, 'w') as f:
-                json.dump(full_config, f, indent=2)
-            
+        """Save the chosen device and VAD settings into config/audio.json"""
+        updates = {
+            "input_device": {"id": config['id'], "name": config['name']},
+            "samplerate": config['samplerate'],
+            "frame_ms": config['frame_ms'],
+            "vad_mode": config['vad_mode'],
+            "start_voiced_frames": config['start_voiced_frames'],
+            "end_unvoiced_frames": config['end_unvoiced_frames'],
+            "preroll_ms": config['preroll_ms'],
+            "silence_hold_ms": config['silence_hold_ms']
+        }
+        success, error_msg = self.config_manager.update_config("audio", updates)
+        if success:
             logger.info(f"Audio config saved to {self.audio_config_path}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to save audio config: {e}")
-            return False
+        else:
+            logger.error(f"Failed to save audio config: {error_msg}")
+        return success
     
     def load_audio_config(self) -> Optional[Dict[str, Any]]:
-        """Load audio configuration from local JSON file"""
-        try:
-            if os.path.exists(self.audio_config_path):
-                with open(self.audio_config_path, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load audio config: {e}")
-        return None
+        """Current audio config, or None until an input device has been chosen"""
+        config = self.config_manager.load_config("audio")
+        if config.get("input_device", {}).get("id", -1) < 0:
+            return None
+        return config
     
     def use_device(self, device_id: int) -> Dict[str, Any]:
         """Manually set a device (bypassing wizard)"""
@@ -0,0 +1,67 @@
+"""
+Benchmark: wizard frame analysis throughput (seconds of audio per second).
+
+Compares the old per-frame loop (a Python slice, ``tobytes`` copy and VAD call
+for every 10ms frame, plus float copies for RMS and clipping) with the
+vectorized engine in audio_analysis.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analysis [--samplerate 48000] [--seconds 6]
+"""
+
+import argparse
+import time
+import numpy as np
+import webrtcvad
+
+from audio_wizard import AudioWizard
+from synthetic_audio import speech_like
+
+
+def legacy_metrics(noise_audio, voice_audio, samplerate, frame_ms=10):
+    """The per-frame implementation the wizard used before audio_analysis"""
+    noise_rms = np.sqrt(np.mean(noise_audio.astype(float) ** 2)) / 32768.0
+    voice_rms = np.sqrt(np.mean(voice_audio.astype(float) ** 2)) / 32768.0
+
+    vad = webrtcvad.Vad(1)
+    frame_samples = int(samplerate * frame_ms / 1000)
+    total_frames = len(voice_audio) // frame_samples
+    voice_flags = []
+    for i in range(total_frames):
+        frame = voice_audio[i * frame_samples:(i + 1) * frame_samples]
+        try:
+            voice_flags.append(vad.is_speech(frame.tobytes(), samplerate))
+        except Exception:
+            voice_flags.append(False)
+
+    clipped = np.sum(np.abs(voice_audio) >= int(0.99 * 32767))
+    return noise_rms, voice_rms, voice_flags, clipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wizard frame analysis benchmark")
+    parser.add_argument("--samplerate", type=int, default=48000)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    noise = np.random.default_rng(1).normal(0, 30, int(args.samplerate)).astype(np.int16)
+    voice = speech_like(args.samplerate, args.seconds)
+    wizard = AudioWizard()
+    audio_seconds = (len(noise) + len(voice)) / args.samplerate
+
+    print(f"{audio_seconds:.1f}s of audio at {args.samplerate} Hz")
+    for name, fn in [
+        ("per-frame loop", lambda: legacy_metrics(noise, voice, args.samplerate)),
+        ("vectorized", lambda: wizard.compute_audio_metrics(noise, voice, args.samplerate)),
+    ]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        print(f"  {name:15s} {best * 1000:8.2f} ms  ({audio_seconds / best:8.0f} s of audio/s)")
+
+
+if __name__ == "__main__":
+    main()
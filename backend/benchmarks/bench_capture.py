@@ -0,0 +1,70 @@
+"""
+Microbenchmark: cost of the capture callback per 10ms block.
+
+Compares the old list-based callback (one Python int per sample plus a final
+np.array conversion) with CaptureBuffer writes into a preallocated array.
+
+Usage (from backend/):
+    python -m benchmarks.bench_capture [--samplerate 48000] [--seconds 6]
+"""
+
+import argparse
+import time
+import numpy as np
+
+from capture_buffer import CaptureBuffer
+
+
+def _blocks(samplerate: int, seconds: float, block_ms: int = 10):
+    block = int(samplerate * block_ms / 1000)
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 3000, int(samplerate * seconds)).astype(np.int16)
+    n_blocks = len(audio) // block
+    # PortAudio hands RawInputStream callbacks a raw byte buffer
+    return [audio[i * block:(i + 1) * block].tobytes() for i in range(n_blocks)]
+
+
+def bench_list_extend(blocks):
+    audio_data = []
+    start = time.perf_counter()
+    for raw in blocks:
+        audio_data.extend(np.frombuffer(raw, dtype=np.int16))
+    callback_s = time.perf_counter() - start
+    start = time.perf_counter()
+    np.array(audio_data, dtype=np.int16)
+    return callback_s, time.perf_counter() - start
+
+
+def bench_capture_buffer(blocks):
+    samples = sum(len(raw) // 2 for raw in blocks)
+    buffer = CaptureBuffer(samples)
+    start = time.perf_counter()
+    for raw in blocks:
+        buffer.write(raw)
+    callback_s = time.perf_counter() - start
+    start = time.perf_counter()
+    buffer.view()
+    return callback_s, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture callback microbenchmark")
+    parser.add_argument("--samplerate", type=int, default=48000)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    blocks = _blocks(args.samplerate, args.seconds)
+    block_budget_us = 10_000  # a 10ms block must be handled well within 10ms
+
+    print(f"{len(blocks)} blocks of 10ms at {args.samplerate} Hz")
+    for name, fn in [("list.extend", bench_list_extend), ("CaptureBuffer", bench_capture_buffer)]:
+        best_cb, best_final = min(fn(blocks) for _ in range(args.repeat))
+        per_block_us = best_cb / len(blocks) * 1e6
+        print(f"  {name:14s} {per_block_us:8.2f} us/block "
+              f"({per_block_us / block_budget_us * 100:.3f}% of budget), "
+              f"finalize {best_final * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
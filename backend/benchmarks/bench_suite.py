@@ -0,0 +1,235 @@
+"""
+Benchmark suite for the wizard's analysis hot paths.
+
+Generates deterministic synthetic takes (room noise, tones with hum, speech-like
+bursts, hard clipping, dropouts) at every samplerate and duration, then times
+each analysis stage and records its peak allocation (tracemalloc, measured in
+a separate untimed run). Results can be saved as a JSON baseline and later
+runs compared against it; the run exits non-zero if any stage got slower or
+allocates more than the tolerance allows.
+
+Without a local baseline, ``--compare`` uses the committed reference
+(``reference_baseline.json``). Timings are only compared against a local
+baseline recorded on the same machine; the reference gates allocations only.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suite [--quick] [--save-baseline]
+    python -m benchmarks.bench_suite --compare [--baseline PATH] [--time-tolerance 0.5]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_analysis import noise_spectrum
+from resampler import to_analysis_rate
+from synthetic_audio import mix, speech_like, tone, white_noise, with_dropouts
+
+SAMPLERATES = (16000, 32000, 44100, 48000)
+DURATIONS = (1.0, 6.0, 30.0)
+NOISE_SECONDS = 1.0
+
+# Local baseline (machine-specific, gitignored) and the committed reference
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+REFERENCE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference_baseline.json")
+
+# Metadata that must match before timings are comparable
+MACHINE_KEYS = ("machine", "platform", "python", "numpy")
+
+# A stage regresses when it is this much slower (or allocates this much more)
+TIME_TOLERANCE = 0.5
+ALLOC_TOLERANCE = 0.10
+# Differences below these are timer/allocator noise
+MIN_DELTA_MS = 0.2
+MIN_DELTA_KIB = 64.0
+
+
+def _speech(samplerate: int, seconds: float, gain: float = 1.0) -> np.ndarray:
+    return speech_like(samplerate, seconds, amplitude=6000.0 * gain, onset_sec=0.3)
+
+
+# name -> (samplerate, seconds) -> voice take; every signal shares the same noise take
+SIGNALS: Dict[str, Callable[[int, float], np.ndarray]] = {
+    "noise": lambda sr, sec: white_noise(sr, sec, rms=60.0, seed=2),
+    "tone": lambda sr, sec: mix(tone(sr, sec, 440.0, 4000.0), tone(sr, sec, 50.0, 300.0)),
+    "speech": lambda sr, sec: _speech(sr, sec),
+    "clipped": lambda sr, sec: mix(_speech(sr, sec, gain=8.0), clip=32767),
+    "dropouts": lambda sr, sec: with_dropouts(_speech(sr, sec), sr, count=max(1, int(sec)), seed=3),
+}
+
+
+def _stages(wizard) -> Dict[str, Callable]:
+    """name -> fn(noise, voice, samplerate, metrics)"""
+    return {
+        "to_analysis_rate": lambda noise, voice, sr, metrics: to_analysis_rate(voice, sr),
+        "detect_voice_segments": lambda noise, voice, sr, metrics: wizard.detect_voice_segments(voice, sr),
+        "noise_spectrum": lambda noise, voice, sr, metrics: noise_spectrum(noise, sr),
+        "compute_audio_metrics": lambda noise, voice, sr, metrics: wizard.compute_audio_metrics(noise, voice, sr),
+        "compute_device_score": lambda noise, voice, sr, metrics: wizard.compute_device_score(metrics),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Best and median wall time over ``repeat`` runs, then peak allocation of one more run"""
+    fn()  # warm caches (filter design, VAD instances)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(times) * 1000, 4),
+        "median_ms": round(float(np.median(times)) * 1000, 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_suite(samplerates=SAMPLERATES, durations=DURATIONS, signals=None, stages=None,
+              repeat: int = 5, log=print) -> Dict[str, Any]:
+    """Run every stage on every signal/samplerate/duration; returns the results document"""
+    from audio_wizard import AudioWizard
+    wizard = AudioWizard()
+    stage_fns = _stages(wizard)
+    stage_names = list(stages or stage_fns)
+    signal_names = list(signals or SIGNALS)
+
+    results = {}
+    for samplerate in samplerates:
+        noise = mix(white_noise(samplerate, NOISE_SECONDS, seed=1), tone(samplerate, NOISE_SECONDS, 50.0, 60.0))
+        for seconds in durations:
+            for signal in signal_names:
+                voice = SIGNALS[signal](samplerate, seconds)
+                metrics = wizard.compute_audio_metrics(noise, voice, samplerate)
+                for stage in stage_names:
+                    fn = stage_fns[stage]
+                    result = measure(lambda: fn(noise, voice, samplerate, metrics), repeat)
+                    result["audio_sec_per_sec"] = round(seconds / max(result["best_ms"] / 1000, 1e-9), 1)
+                    key = f"{stage}/{signal}/{samplerate}/{seconds:g}s"
+                    results[key] = result
+                    log(f"  {key:48s} {result['best_ms']:9.3f} ms  {result['peak_kib']:9.1f} KiB")
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def same_machine(baseline: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """Whether both runs come from the same machine and library versions"""
+    before, now = baseline.get("meta", {}), current.get("meta", {})
+    return all(before.get(key) == now.get(key) for key in MACHINE_KEYS)
+
+
+def resolve_baseline(path: Optional[str]) -> str:
+    """An explicit ``--baseline``, else the local baseline if saved, else the committed reference"""
+    if path:
+        return path
+    return DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) else REFERENCE_BASELINE
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], time_tolerance: Optional[float] = TIME_TOLERANCE,
+            alloc_tolerance: float = ALLOC_TOLERANCE) -> List[Dict[str, Any]]:
+    """Stages that got slower or allocate more than the baseline allows; ``time_tolerance=None`` skips timings"""
+    regressions = []
+    for key, now in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if before is None:
+            continue
+        checks: List[Tuple[str, float, float]] = [("peak_kib", alloc_tolerance, MIN_DELTA_KIB)]
+        if time_tolerance is not None:
+            checks.insert(0, ("best_ms", time_tolerance, MIN_DELTA_MS))
+        for field, tolerance, min_delta in checks:
+            old, new = before[field], now[field]
+            if new - old > max(old * tolerance, min_delta):
+                regressions.append({
+                    "benchmark": key,
+                    "field": field,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": round(new / old, 2) if old else None,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wizard analysis benchmark suite")
+    parser.add_argument("--samplerates", type=int, nargs="+", default=list(SAMPLERATES))
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DURATIONS))
+    parser.add_argument("--signals", nargs="+", choices=list(SIGNALS))
+    parser.add_argument("--stages", nargs="+")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="16 and 48 kHz, 1s and 6s takes only")
+    parser.add_argument("--baseline", help="default: benchmarks/baseline.json; --compare falls back to "
+                                           "benchmarks/reference_baseline.json when it does not exist")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="fail on regressions against --baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--alloc-tolerance", type=float, default=ALLOC_TOLERANCE)
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.samplerates, args.durations = [16000, 48000], [1.0, 6.0]
+
+    # The wizard creates its config directory on construction; keep it out of the real home
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["ZANDALEE_HOME"] = home
+        current = run_suite(args.samplerates, args.durations, args.signals, args.stages, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        path = args.baseline or DEFAULT_BASELINE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline saved to {path}")
+
+    if args.compare:
+        path = resolve_baseline(args.baseline)
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"comparing against {path}")
+        time_tolerance = args.time_tolerance
+        if path == REFERENCE_BASELINE or not same_machine(baseline, current):
+            # Wall times only mean something against a baseline from this machine
+            print("baseline was not recorded on this machine; comparing allocations only")
+            time_tolerance = None
+        regressions = compare(baseline, current, time_tolerance, args.alloc_tolerance)
+        missing = set(current["results"]) - set(baseline.get("results", {}))
+        if missing:
+            print(f"{len(missing)} benchmarks not in the baseline")
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']} {r['field']}: {r['baseline']} -> {r['current']} (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Run the complete mic wizard offline through the replay backend.
+
+Replays a session recorded with ``record_session`` (WAV takes plus
+session.json) or a built-in synthetic scenario, faster than realtime, and
+prints the per-device results and wall time. ``--profile`` adds a cProfile
+summary of the run.
+
+Usage (from backend/):
+    python -m benchmarks.bench_wizard [--session DIR] [--speed 20] [--profile]
+"""
+
+import os
+import json
+import time
+import pstats
+import argparse
+import cProfile
+import tempfile
+
+from capture_backends import DEFAULT_REPLAY_SPEED, ReplayBackend
+from synthetic_audio import mix, speech_like, tone, white_noise
+
+
+def synthetic_devices(noise_sec: float = 1.0, voice_sec: float = 6.0):
+    """Three mics hearing the same scene: clean 16 kHz, 44.1 kHz with hum, clipping 48 kHz"""
+    devices = {}
+    for name, samplerate, extra in [
+        ("Headset Mic (synthetic)", 16000, {}),
+        ("USB Mic with hum (synthetic)", 44100, {"hum": 400.0}),
+        ("Hot Webcam Mic (synthetic)", 48000, {"gain": 8.0}),
+    ]:
+        hum = tone(samplerate, noise_sec, 50.0, extra.get("hum", 0.0))
+        noise = mix(white_noise(samplerate, noise_sec, seed=1), hum)
+        voice = speech_like(samplerate, voice_sec, amplitude=6000.0 * extra.get("gain", 1.0), onset_sec=0.3)
+        voice = mix(voice, tone(samplerate, voice_sec, 50.0, extra.get("hum", 0.0)), clip=32767)
+        devices[name] = {"samplerate": samplerate, "takes": [noise, voice]}
+    return devices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline mic wizard replay")
+    parser.add_argument("--session", help="session directory saved by a recorded wizard run")
+    parser.add_argument("--speed", type=float, default=DEFAULT_REPLAY_SPEED)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    if args.session:
+        backend = ReplayBackend.from_session(args.session, args.speed)
+    else:
+        backend = ReplayBackend.from_signals(synthetic_devices(), args.speed)
+
+    # Keep the replayed choice out of the real audio.json
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["ZANDALEE_HOME"] = home
+        from audio_wizard import AudioWizard
+        wizard = AudioWizard(backend=backend)
+
+        profiler = cProfile.Profile() if args.profile else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        result = wizard.run_wizard({})
+        if profiler:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+    for device in result.get("results", []):
+        print(f"{device['name']:32s} {device['samplerate']:6d} Hz  score {device['score'] * 100:5.1f}  "
+              f"snr {device['snr_db']:5.1f} dB  voiced {device['voiced_ratio'] * 100:5.1f}%  "
+              f"clip {device['clipping_pct']:5.2f}%  hum {device['hum_hz']}")
+    if not result.get("ok"):
+        print(json.dumps(result))
+    else:
+        print(f"chosen: {result['chosen']['name']}")
+    print(f"wall time {elapsed:.2f}s at {args.speed:g}x realtime")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+HTTP load test for the memory, diary and upload endpoints.
+
+Seeds a scratch ZANDALEE_HOME with deterministic synthetic memories, diary
+entries and photos (bulk inserts straight into the app's schema, so 1M rows
+take a minute or two instead of a million API calls), then drives the FastAPI app with a fixed number of
+concurrent clients and a weighted request mix. Requests go through httpx's
+ASGI transport in-process by default, or to a running backend with --url.
+Prints and optionally writes a JSON report with throughput and latency
+percentiles per endpoint.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --memories 100000 --diary 100000 --photos 200
+    python -m benchmarks.load_test --concurrency 32 --requests 5000 --mix search=6,diary=3,upload=1
+    python -m benchmarks.load_test --home D:/scratch --seed-only      # then start the backend on it
+    python -m benchmarks.load_test --home D:/scratch --no-seed --url http://127.0.0.1:8759
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import sqlite3
+import argparse
+import platform
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+WORDS = (
+    "coffee garden meeting birthday recipe project music walk rain sunset train paint book "
+    "doctor school holiday beach guitar email budget plan dinner movie friend family dog "
+    "cat kitchen office morning evening weekend market photo letter call river mountain "
+    "bike camera lesson concert museum bread tea storm snow summer winter autumn spring"
+).split()
+TAGS = ("work", "family", "health", "travel", "ideas", "home", "music", "food", "friends", "todo")
+EMOTIONS = ("happy", "calm", "excited", "sad", "tired", "grateful", "anxious", None)
+KINDS = ("semantic", "episodic", "procedural", "working", "event")
+
+# Rows per executemany batch while seeding
+SEED_BATCH = 10000
+
+DEFAULT_MIX = "search=5,diary=3,diary_search=1,upload=1"
+
+
+def _text(rng: random.Random, low: int = 8, high: int = 30) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _timestamp(rng: random.Random, start: datetime, span_days: int) -> str:
+    return (start + timedelta(seconds=rng.randrange(span_days * 86400))).isoformat()
+
+
+def make_png(rng: random.Random, size: int = 32) -> bytes:
+    """Small random-pixel PNG; distinct seeds give distinct files (no upload deduplication)"""
+    from PIL import Image
+    image = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def seed(memory_manager, memories: int, diary: int, photos: int, photo_ratio: float = 0.2,
+         seed_value: int = 0, log=print) -> Dict[str, Any]:
+    """Fill the memory database with synthetic rows; returns counts and timings.
+
+    Photos go through the real content-addressed store; ``photo_ratio`` of
+    memories and diary entries reference one of them, and the blobs'
+    refcounts are set to match so the photo GC keeps them.
+    """
+    rng = random.Random(seed_value)
+    start = datetime.now() - timedelta(days=3 * 365)
+    timings = {}
+
+    t0 = time.perf_counter()
+    photo_paths = []
+    for _ in range(photos):
+        stored = memory_manager.photo_store.put(io.BytesIO(make_png(rng)))
+        photo_paths.append(stored["path"])
+    timings["photos_sec"] = round(time.perf_counter() - t0, 3)
+
+    refs: Counter = Counter()
+
+    def photo():
+        if photo_paths and rng.random() < photo_ratio:
+            path = rng.choice(photo_paths)
+            refs[path] += 1
+            return path
+        return None
+
+    def memory_rows():
+        for _ in range(memories):
+            tags = ",".join(rng.sample(TAGS, rng.randint(0, 3)))
+            yield (f"{rng.getrandbits(128):032x}", _text(rng), rng.choice(KINDS), tags,
+                   round(rng.random(), 3), round(rng.random(), 3), photo(), rng.choice(EMOTIONS),
+                   "loadtest", "told", _timestamp(rng, start, 3 * 365))
+
+    def diary_rows():
+        for _ in range(diary):
+            path = photo()
+            url = memory_manager.photo_store.url_for(path) if path else None
+            yield (f"{rng.getrandbits(128):032x}", _text(rng, 20, 80), url, rng.choice(EMOTIONS),
+                   _timestamp(rng, start, 3 * 365))
+
+    def batches(rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= SEED_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    with sqlite3.connect(memory_manager.db_path) as conn:
+        conn.execute("PRAGMA synchronous=OFF")
+        t0 = time.perf_counter()
+        for batch in batches(memory_rows()):
+            conn.executemany("""
+                INSERT INTO memories (id, text, kind, tags, importance, relevance,
+                                      image_path, emotion, source, trust, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+        timings["memories_sec"] = round(time.perf_counter() - t0, 3)
+
+        t0 = time.perf_counter()
+        for batch in batches(diary_rows()):
+            conn.executemany("""
+                INSERT INTO diary_entries (id, text, photo_url, emotion_tag, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, batch)
+        timings["diary_sec"] = round(time.perf_counter() - t0, 3)
+
+        for path, count in refs.items():
+            sha256 = memory_manager.photo_store.parse_ref(path)
+            conn.execute("UPDATE blobs SET refcount = refcount + ? WHERE sha256 = ?", (count, sha256))
+        conn.commit()
+        totals = {
+            "memories": conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0],
+            "diary_entries": conn.execute("SELECT COUNT(*) FROM diary_entries").fetchone()[0],
+            "photos": conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+        }
+
+    log(f"seeded {memories} memories, {diary} diary entries, {photos} photos "
+        f"({timings['memories_sec'] + timings['diary_sec'] + timings['photos_sec']:.1f}s); "
+        f"database now has {totals}")
+    return {"added": {"memories": memories, "diary_entries": diary, "photos": photos},
+            "totals": totals, "timings": timings}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+# scenario -> (endpoint label, request builder(rng, uploads) -> httpx request kwargs)
+SCENARIOS: Dict[str, Tuple[str, Callable[[random.Random, List[bytes]], Dict[str, Any]]]] = {
+    "search": ("GET /memory/search", lambda rng, uploads: {
+        "method": "GET", "url": "/memory/search",
+        "params": {"q": rng.choice(WORDS), "limit": 20, **({"tags": rng.choice(TAGS)} if rng.random() < 0.3 else {})}
+    }),
+    "diary": ("GET /diary/list", lambda rng, uploads: {
+        "method": "GET", "url": "/diary/list", "params": {"limit": 20}
+    }),
+    "diary_search": ("GET /diary/search", lambda rng, uploads: {
+        "method": "GET", "url": "/diary/search", "params": {"q": rng.choice(WORDS), "limit": 20}
+    }),
+    "upload": ("POST /files/upload", lambda rng, uploads: {
+        "method": "POST", "url": "/files/upload",
+        "files": {"file": ("load.png", rng.choice(uploads), "image/png")}
+    }),
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None}
+    ordered = sorted(samples)
+
+    def at(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 3)
+
+    return {"p50_ms": at(50), "p90_ms": at(90), "p99_ms": at(99), "max_ms": round(ordered[-1], 3),
+            "mean_ms": round(sum(ordered) / len(ordered), 3)}
+
+
+async def drive(client: httpx.AsyncClient, weights: Dict[str, float], concurrency: int,
+                requests: Optional[int], duration: Optional[float], seed_value: int = 0,
+                upload_pool: int = 50) -> Dict[str, Any]:
+    """Run ``concurrency`` clients until ``requests`` are sent or ``duration`` passes"""
+    rng = random.Random(seed_value + 1)
+    names = list(weights)
+    plan_weights = [weights[n] for n in names]
+    uploads = [make_png(rng) for _ in range(upload_pool)] if "upload" in weights else []
+    latencies: Dict[str, List[float]] = {SCENARIOS[n][0]: [] for n in names}
+    statuses: Dict[str, Counter] = {SCENARIOS[n][0]: Counter() for n in names}
+    errors: Dict[str, Counter] = {SCENARIOS[n][0]: Counter() for n in names}
+    sent = 0
+    deadline = None if duration is None else time.perf_counter() + duration
+
+    async def client_loop(client_id: int):
+        nonlocal sent
+        local = random.Random(f"{seed_value}/{client_id}")
+        while True:
+            if requests is not None and sent >= requests:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            sent += 1
+            name = local.choices(names, plan_weights)[0]
+            label, build = SCENARIOS[name]
+            start = time.perf_counter()
+            try:
+                response = await client.request(**build(local, uploads))
+                ok = response.status_code < 400 and response.json().get("ok", True) is not False
+                statuses[label][str(response.status_code)] += 1
+                if not ok:
+                    errors[label]["not_ok"] += 1
+            except Exception as e:
+                errors[label][type(e).__name__] += 1
+            latencies[label].append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client_loop(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for label, samples in latencies.items():
+        endpoints[label] = {
+            "count": len(samples),
+            "errors": sum(errors[label].values()),
+            "error_kinds": dict(errors[label]),
+            "status": dict(statuses[label]),
+            "rps": round(len(samples) / elapsed, 2) if elapsed else None,
+            **percentiles(samples)
+        }
+    everything = [ms for samples in latencies.values() for ms in samples]
+    return {
+        "elapsed_sec": round(elapsed, 3),
+        "total": {"count": len(everything), "errors": sum(e["errors"] for e in endpoints.values()),
+                  "rps": round(len(everything) / elapsed, 2) if elapsed else None, **percentiles(everything)},
+        "endpoints": endpoints
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "home": os.environ["ZANDALEE_HOME"],
+            "target": args.url or "in-process (ASGI)",
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration_sec": args.duration,
+            "mix": parse_mix(args.mix),
+        }
+    }
+
+    # Imported only now: main reads ZANDALEE_HOME at import time (and configures logging)
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    if not args.no_seed:
+        report["seeding"] = await asyncio.to_thread(seed, main.memory_manager.get(), args.memories, args.diary,
+                                                    args.photos, args.photo_ratio, args.seed,
+                                                    lambda line: print(line, file=sys.stderr))
+    if args.seed_only:
+        return report
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=60)
+    async with client:
+        report["load"] = await drive(client, report["meta"]["mix"], args.concurrency, args.requests,
+                                     args.duration, args.seed)
+        if not args.url:
+            server = (await client.get("/debug/metrics")).json()
+            # Server-side view (excludes client and transport overhead); buckets dropped for brevity
+            routes = {route: {k: v for k, v in h.items() if k != "buckets"} for route, h in server["routes"].items()}
+            report["server"] = {"routes": routes, "slow_queries": len(server["slow_queries"])}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory/diary/upload HTTP load test")
+    parser.add_argument("--home", help="scratch ZANDALEE_HOME (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--memories", type=int, default=10000)
+    parser.add_argument("--diary", type=int, default=10000)
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--photo-ratio", type=float, default=0.2, help="share of rows that reference a photo")
+    parser.add_argument("--no-seed", action="store_true", help="use --home as it is")
+    parser.add_argument("--seed-only", action="store_true", help="seed --home and exit")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="total requests (default 2000 unless --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted scenarios (default {DEFAULT_MIX})")
+    parser.add_argument("--url", help="drive a running backend instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data and request order")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 2000
+    if (args.seed_only or args.no_seed) and not args.home:
+        parser.error("--seed-only and --no-seed need --home")
+
+    # Nothing to warm up and no microphone: subsystems are only built if a request needs them
+    os.environ["ZANDALEE_LAZY_INIT"] = "1"
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ["ZANDALEE_HOME"] = os.path.abspath(args.home or scratch)
+        report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if report.get("load", {}).get("total", {}).get("errors"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import wave
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Replay runs this many times faster than realtime unless told otherwise
+DEFAULT_REPLAY_SPEED = 20.0
+
+SESSION_FILE = "session.json"
+
+
+def write_wav(path: str, audio: np.ndarray, samplerate: int):
+    """Write mono int16 audio as a PCM WAV file"""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(samplerate)
+        wav.writeframes(np.ascontiguousarray(audio, dtype="<i2").tobytes())
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Read a 16-bit PCM WAV file; returns (first channel, samplerate)"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        channels = wav.getnchannels()
+        samplerate = wav.getframerate()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    return audio[::channels].astype(np.int16), samplerate
+
+
+class _TrackedStream:
+    """Wraps a backend stream and reports its close to the owning StreamTracker"""
+
+    def __init__(self, tracker: "StreamTracker", stream):
+        self._tracker = tracker
+        self.stream = stream
+        self._open = True
+
+    def __enter__(self):
+        try:
+            self.stream.__enter__()
+        except BaseException:
+            close = getattr(self.stream, "close", None)
+            if close is not None:
+                close()
+            self._release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self.stream.__exit__(*exc)
+        finally:
+            self._release()
+
+    def _release(self):
+        if self._open:
+            self._open = False
+            self._tracker.released()
+
+
+class StreamTracker:
+    """Counts a backend's open streams so a device rescan never runs under one.
+
+    Re-initializing PortAudio tears down every stream it owns, including the
+    level monitor's and a running wizard capture, so ``rescan`` is refused
+    while any stream is open. Opening a stream and rescanning share one lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def track(self, open_stream: Callable[[], Any]) -> _TrackedStream:
+        """Create a stream with ``open_stream`` and count it until it is closed"""
+        with self._lock:
+            stream = open_stream()
+            self.open += 1
+        return _TrackedStream(self, stream)
+
+    def released(self):
+        with self._lock:
+            self.open -= 1
+
+    def rescan(self, reinitialize: Callable[[], None]) -> bool:
+        """Run ``reinitialize`` unless a stream is open; returns whether it ran"""
+        with self._lock:
+            if self.open:
+                logger.info(f"Device rescan skipped: {self.open} capture stream(s) open")
+                return False
+            reinitialize()
+            return True
+
+
+class SoundDeviceBackend:
+    """Live capture through PortAudio.
+
+    sounddevice is imported on first use, so the rest of the backend can be
+    imported (and tested) on machines without PortAudio.
+    """
+
+    name = "sounddevice"
+
+    def __init__(self):
+        self._sd = None
+        self.streams = StreamTracker()
+
+    @property
+    def sd(self):
+        if self._sd is None:
+            import sounddevice
+            self._sd = sounddevice
+        return self._sd
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        return list(self.sd.query_devices())
+
+    def hostapi_name(self, index: int) -> str:
+        return self.sd.query_hostapis(index)['name']
+
+    def _reinitialize(self):
+        self.sd._terminate()
+        self.sd._initialize()
+
+    def rescan(self) -> bool:
+        """Re-initialize PortAudio so hotplugged devices show up; False (skipped) while streams are open"""
+        return self.streams.rescan(self._reinitialize)
+
+    def input_stream(self, device: int, samplerate: int, blocksize: int, callback: Optional[Callable] = None):
+        """Mono int16 input stream; used as a context manager"""
+        return self.streams.track(lambda: self.sd.RawInputStream(
+            device=device,
+            samplerate=samplerate,
+            channels=1,
+            dtype='int16',
+            blocksize=blocksize,
+            callback=callback
+        ))
+
+    def sleep(self, ms: int):
+        self.sd.sleep(ms)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class ReplayDevice:
+    """A fake input device that plays back one take per capture"""
+
+    def __init__(self, name: str, samplerate: int, takes: List[np.ndarray]):
+        self.name = name
+        self.samplerate = samplerate
+        self.takes = list(takes)
+        self.next_take = 0
+
+
+class _ReplayTime:
+    """Callback time info, mirroring PortAudio's field name"""
+
+    def __init__(self, adc_time: float):
+        self.inputBufferAdcTime = adc_time
+
+
+class _ReplayStatus:
+    """Callback status flags; replayed streams never overflow"""
+
+    input_overflow = False
+    input_underflow = False
+
+    def __bool__(self):
+        return False
+
+
+class _ProbeStream:
+    """Callback-less stream opened only to check a samplerate"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ReplayStream:
+    """Feeds one take to a capture callback in 10ms blocks on a paced thread.
+
+    Closing the stream delivers whatever the thread has not sent yet, so a
+    replayed capture always contains the whole take no matter how the
+    thread was scheduled; that keeps replays deterministic.
+    """
+
+    def __init__(self, backend: "ReplayBackend", audio: np.ndarray, samplerate: int,
+                 blocksize: int, callback: Callable):
+        self.backend = backend
+        self.audio = np.ascontiguousarray(audio, dtype=np.int16)
+        self.samplerate = samplerate
+        self.blocksize = max(1, blocksize)
+        self.callback = callback
+        self.block_sec = self.blocksize / self.samplerate
+        self.n_blocks = -(-len(self.audio) // self.blocksize)
+        self._next_block = 0
+        self._start = 0.0
+        self._status = _ReplayStatus()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _deliver(self, n: int):
+        block = self.audio[n * self.blocksize:(n + 1) * self.blocksize]
+        self.callback(block.tobytes(), len(block), _ReplayTime(self._start + n * self.block_sec), self._status)
+        self._next_block = n + 1
+
+    def _run(self):
+        while self._next_block < self.n_blocks:
+            # Deliver the next block once its last sample would have been captured
+            n = self._next_block
+            delay = (self._start + (n + 1) * self.block_sec - self.backend.monotonic()) / self.backend.speed
+            if delay > 0 and self._stop.wait(delay):
+                return
+            if self._stop.is_set():
+                return
+            self._deliver(n)
+
+    def __enter__(self):
+        self._start = self.backend.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        while self._next_block < self.n_blocks:
+            self._deliver(self._next_block)
+        return False
+
+
+class ReplayBackend:
+    """Hardware-free backend that replays recorded or synthetic takes.
+
+    Each device only opens at its recorded samplerate. Every capture stream
+    consumes the device's next take (a wizard run records the noise take,
+    then the voice take). Time runs ``speed`` times faster than realtime.
+    """
+
+    name = "replay"
+
+    def __init__(self, devices: List[ReplayDevice], speed: float = DEFAULT_REPLAY_SPEED):
+        self.devices = devices
+        self.speed = max(float(speed), 1e-6)
+        self._epoch = time.monotonic()
+        self.streams = StreamTracker()
+        self.rescans = 0  # completed rescans (there is nothing to re-initialize)
+
+    @classmethod
+    def from_signals(cls, devices: Dict[str, Dict[str, Any]], speed: float = DEFAULT_REPLAY_SPEED) -> "ReplayBackend":
+        """Build from ``{name: {"samplerate": int, "takes": [noise, voice, ...]}}``"""
+        return cls([ReplayDevice(name, spec["samplerate"], spec["takes"]) for name, spec in devices.items()], speed)
+
+    @classmethod
+    def from_session(cls, session_dir: str, speed: float = DEFAULT_REPLAY_SPEED) -> "ReplayBackend":
+        """Load a session saved by ``SessionRecorder``"""
+        with open(os.path.join(session_dir, SESSION_FILE), "r", encoding="utf-8") as f:
+            session = json.load(f)
+
+        devices = []
+        for device in session["devices"]:
+            takes = []
+            for take in device["takes"]:
+                audio, samplerate = read_wav(os.path.join(session_dir, take["file"]))
+                if samplerate != device["samplerate"]:
+                    raise ValueError(f"{take['file']}: samplerate {samplerate} != {device['samplerate']}")
+                takes.append(audio)
+            devices.append(ReplayDevice(device["name"], device["samplerate"], takes))
+        return cls(devices, speed)
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        return [{
+            'name': device.name,
+            'max_input_channels': 1,
+            'max_output_channels': 0,
+            'default_samplerate': float(device.samplerate),
+            'hostapi': 0
+        } for device in self.devices]
+
+    def hostapi_name(self, index: int) -> str:
+        return "Replay"
+
+    def _reinitialize(self):
+        self.rescans += 1
+
+    def rescan(self) -> bool:
+        return self.streams.rescan(self._reinitialize)
+
+    def input_stream(self, device: int, samplerate: int, blocksize: int, callback: Optional[Callable] = None):
+        return self.streams.track(lambda: self._open_stream(device, samplerate, blocksize, callback))
+
+    def _open_stream(self, device: int, samplerate: int, blocksize: int, callback: Optional[Callable]):
+        replay = self.devices[device]
+        if samplerate != replay.samplerate:
+            raise RuntimeError(f"Invalid sample rate {samplerate} for replay device {device}")
+        if callback is None:
+            return _ProbeStream()
+
+        if replay.next_take < len(replay.takes):
+            audio = replay.takes[replay.next_take]
+            replay.next_take += 1
+        else:
+            logger.warning(f"Replay device {device} has no takes left")
+            audio = np.zeros(0, dtype=np.int16)
+        return ReplayStream(self, audio, samplerate, blocksize, callback)
+
+    def sleep(self, ms: int):
+        time.sleep(ms / 1000 / self.speed)
+
+    def monotonic(self) -> float:
+        """Virtual clock running ``speed`` times faster than the wall clock"""
+        return (time.monotonic() - self._epoch) * self.speed
+
+
+class SessionRecorder:
+    """Saves the raw takes of a wizard run as WAV files plus session.json"""
+
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        self.devices: Dict[int, Dict[str, Any]] = {}
+        os.makedirs(session_dir, exist_ok=True)
+
+    def add_take(self, phase: str, device_id: int, device_name: str, samplerate: int,
+                 audio: np.ndarray, stream_stats: Optional[Dict[str, Any]] = None):
+        filename = f"{phase}-{device_id}.wav"
+        write_wav(os.path.join(self.session_dir, filename), audio, samplerate)
+        device = self.devices.setdefault(device_id, {
+            "id": device_id,
+            "name": device_name,
+            "samplerate": samplerate,
+            "takes": []
+        })
+        device["takes"].append({
+            "phase": phase,
+            "file": filename,
+            "samples": int(len(audio)),
+            "stream_stats": stream_stats
+        })
+
+    def finish(self, config: Dict[str, Any], result: Optional[Dict[str, Any]] = None) -> str:
+        """Write session.json; returns the session directory"""
+        session = {
+            "created_at": datetime.now().isoformat(),
+            "config": config,
+            "devices": list(self.devices.values()),
+            "result": result
+        }
+        with open(os.path.join(self.session_dir, SESSION_FILE), "w", encoding="utf-8") as f:
+            json.dump(session, f, indent=2)
+        return self.session_dir
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class CaptureBuffer:
+    """Preallocated int16 ring buffer filled from a PortAudio callback.
+
+    The callback is the only writer: it copies each block into the array
+    through an ``np.frombuffer`` view (no per-sample Python objects) and then
+    advances ``written``. Readers only look at samples below a snapshot of
+    ``written``, so no lock is needed.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1):
+        self.capacity = max(1, int(capacity))
+        self.channels = channels
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+        self._written = 0  # total samples ever written (monotonic)
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def write(self, indata) -> np.ndarray:
+        """Append one callback block (raw int16 bytes or array); returns the block as a view"""
+        block = np.frombuffer(indata, dtype=np.int16)
+        if self.channels > 1:
+            block = block[::self.channels]  # first channel, strided view
+
+        n = block.size
+        if n >= self.capacity:
+            # Block larger than the whole ring: keep its tail, laid out where
+            # those samples would have landed so view()/latest() stay in order
+            tail = block[-self.capacity:]
+            start = (self._written + n) % self.capacity
+            split = self.capacity - start
+            self._data[start:] = tail[:split]
+            self._data[:start] = tail[split:]
+        else:
+            start = self._written % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                self._data[start:end] = block
+            else:
+                split = self.capacity - start
+                self._data[start:] = block[:split]
+                self._data[:end - self.capacity] = block[split:]
+
+        # Publish only after the samples are in place
+        self._written += n
+        return block
+
+    def view(self) -> np.ndarray:
+        """Captured samples in order; a zero-copy view unless the ring has wrapped"""
+        written = self._written
+        if written <= self.capacity:
+            return self._data[:written]
+
+        start = written % self.capacity
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+    def latest(self, n: int) -> np.ndarray:
+        """The most recent ``n`` samples (fewer if not yet captured)"""
+        written = self._written
+        n = min(n, written, self.capacity)
+        end = written % self.capacity
+        if end == 0 and written:
+            end = self.capacity
+        if n <= end:
+            return self._data[end - n:end]
+        return np.concatenate((self._data[self.capacity - (n - end):], self._data[:end]))
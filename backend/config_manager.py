@@ -1,13 +1,71 @@
 
 import os
+import copy
 import json
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Debounced saves (e.g. a UI slider being dragged) hit the disk this long after the last change
+SAVE_DEBOUNCE_SEC = 0.5
+
+# How often the watcher looks for config files edited outside the backend
+WATCH_INTERVAL_SEC = 1.0
+
+# audio.json keys, grouped by the subsystem that applies them
+DEVICE_KEYS = ("input_device", "samplerate")
+VOICE_KEYS = ("output_device", "volume")
+
+# Playback volume the TTS script uses when it is not given one
+DEFAULT_VOLUME = 0.8
+
+# Written on every save; never reported as a change
+METADATA_KEYS = ("updated_at", "machine")
+
+
+class ConfigChange:
+    """One config update: ``changed`` maps each changed key to ``(old, new)``"""
+
+    def __init__(self, config_type: str, old: Dict[str, Any], new: Dict[str, Any], source: str):
+        self.config_type = config_type
+        self.old = old
+        self.new = new
+        self.source = source  # "save" or "file"
+        self.changed: Dict[str, Tuple[Any, Any]] = {
+            key: (old.get(key), new.get(key))
+            for key in sorted(set(old) | set(new))
+            if key not in METADATA_KEYS and old.get(key) != new.get(key)
+        }
+
+    def touches(self, *keys: str) -> bool:
+        return any(key in self.changed for key in keys)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed)
+
+    def __repr__(self) -> str:
+        return f"ConfigChange({self.config_type}, {sorted(self.changed)}, source={self.source})"
+
+
 class ConfigManager:
+    """Loads and saves the JSON config files under ``config/``.
+
+    Configs are served from an in-memory cache that is revalidated against
+    the file's mtime and size on every read, so edits made outside the
+    backend are still picked up. Writes go to a temp file that is renamed
+    over the config, and ``save_config(..., debounce=True)`` coalesces rapid
+    changes into one write. Missing or invalid files fall back to the
+    defaults without touching the disk.
+
+    Subscribers get a ``ConfigChange`` for every save and for every file
+    edited on disk (noticed on the next read, or by ``start_watching``), so
+    running subsystems can apply new settings in place.
+    """
+
     def __init__(self, zandalee_home: str = None):
         self.zandalee_home = zandalee_home or os.getenv("ZANDALEE_HOME", "C:\\Users\\teren\\Documents\\Zandalee")
         self.config_dir = os.path.join(self.zandalee_home, "config")
@@ -28,7 +86,7 @@ class ConfigManager:
             "audio": {
                 "input_device": {"id": -1, "name": "Default"},
                 "output_device": {"id": -1, "name": "Default"},
-                "volume": 0.8,
+                "volume": DEFAULT_VOLUME,
                 "samplerate": 16000,
                 "frame_ms": 10,
                 "vad_mode": 1,
@@ -83,6 +141,16 @@ class ConfigManager:
             "ui": ["theme", "font_size", "zoom_level"],
             "avatar": ["enabled", "style", "lip_sync"]
         }
+        
+        # config_type -> {"config": ..., "stat": (mtime_ns, size) or None}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # Debounced saves not yet on disk; they take precedence over the file
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        
+        self._subscribers: List[Callable[[ConfigChange], None]] = []
+        self._watch_stop: Optional[threading.Event] = None
     
     def _validate_config(self, config_type: str, config_data: Dict[str, Any]) -> tuple[bool, str]:
         """Validate configuration data"""
@@ -103,6 +171,10 @@ class ConfigManager:
         if config_type == "audio":
             if not isinstance(config_data["volume"], (int, float)) or not 0 <= config_data["volume"] <= 1:
                 return False, "Volume must be a number between 0 and 1"
+            
+            for field in ("input_device", "output_device"):
+                if not isinstance(config_data[field], dict) or not isinstance(config_data[field].get("id"), int):
+                    return False, f"{field} must be an object with an integer id"
         
         elif config_type == "llm":
             valid_providers = ["openai", "deepseek", "custom", "gemini", "meta", "ollama"]
@@ -129,18 +201,42 @@ class ConfigManager:
         
         return True, ""
     
-    def load_config(self, config_type: str) -> Dict[str, Any]:
-        """Load configuration from disk with fallback to defaults"""
-        if config_type not in self.config_files:
-            logger.error(f"Unknown config type: {config_type}")
-            return {}
+    def _normalize(self, config_type: str, config_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Bring older layouts up to the current schema.
         
+        The mic wizard used to write audio.json with flat ``device_id`` and
+        ``device_name`` keys and no volume/output device. Those files are
+        read as ``input_device`` plus defaults; the flat keys are kept as a
+        mirror of ``input_device`` for older readers.
+        """
+        if config_type != "audio" or not isinstance(config_data, dict):
+            return config_data
+        
+        config_data = dict(config_data)
+        if "input_device" not in config_data and "device_id" in config_data:
+            config_data["input_device"] = {"id": config_data["device_id"], "name": config_data.get("device_name", "")}
+        for key, value in self.defaults["audio"].items():
+            config_data.setdefault(key, copy.deepcopy(value))
+        if isinstance(config_data["input_device"], dict):
+            config_data["device_id"] = config_data["input_device"].get("id")
+            config_data["device_name"] = config_data["input_device"].get("name")
+        return config_data
+    
+    def _file_stat(self, config_file: str) -> Optional[tuple]:
+        try:
+            st = os.stat(config_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _read_config(self, config_type: str) -> Dict[str, Any]:
+        """Read and validate one config file, falling back to defaults (never writes)"""
         config_file = self.config_files[config_type]
         
         try:
             if os.path.exists(config_file):
                 with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
+                    config_data = self._normalize(config_type, json.load(f))
                 
                 # Validate loaded config
                 is_valid, error_msg = self._validate_config(config_type, config_data)
@@ -155,36 +251,104 @@ class ConfigManager:
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Failed to load {config_type} config: {e}. Using defaults.")
         
-        # Return defaults if loading failed
-        default_config = self.defaults[config_type].copy()
-        self.save_config(config_type, default_config)  # Save defaults to disk
-        return default_config
+        return self._normalize(config_type, copy.deepcopy(self.defaults[config_type]))
+    
+    def load_config(self, config_type: str) -> Dict[str, Any]:
+        """Load configuration, from memory unless the file changed on disk"""
+        if config_type not in self.config_files:
+            logger.error(f"Unknown config type: {config_type}")
+            return {}
+        
+        change = None
+        with self._lock:
+            if config_type in self._pending:
+                return copy.deepcopy(self._pending[config_type])
+            
+            stat = self._file_stat(self.config_files[config_type])
+            previous = self._cache.get(config_type)
+            cached = previous
+            if cached is None or cached["stat"] != stat:
+                config_data = self._read_config(config_type)
+                # Stat again after reading: a write racing the read just invalidates the entry
+                cached = {"config": config_data, "stat": self._file_stat(self.config_files[config_type])}
+                if cached["stat"] != stat:
+                    cached["stat"] = None
+                self._cache[config_type] = cached
+                if previous is not None:
+                    change = ConfigChange(config_type, previous["config"], config_data, "file")
+            result = copy.deepcopy(cached["config"])
+        
+        if change:
+            self._notify(change)
+        return result
+    
+    def _write_atomic(self, config_file: str, config_data: Dict[str, Any]):
+        """Write JSON to a temp file in the same directory, then rename it over the target"""
+        directory = os.path.dirname(config_file)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(config_file)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, config_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
     
-    def save_config(self, config_type: str, config_data: Dict[str, Any]) -> tuple[bool, str]:
-        """Save configuration to disk with validation"""
+    def save_config(self, config_type: str, config_data: Dict[str, Any],
+                    debounce: bool = False) -> tuple[bool, str]:
+        """Save configuration with validation.
+        
+        With ``debounce`` the new config is served immediately but only
+        written once no further change arrived for ``SAVE_DEBOUNCE_SEC``.
+        """
         if config_type not in self.config_files:
             return False, f"Unknown config type: {config_type}"
         
         # Validate config before saving
+        config_data = self._normalize(config_type, config_data)
         is_valid, error_msg = self._validate_config(config_type, config_data)
         if not is_valid:
             return False, error_msg
         
-        config_file = self.config_files[config_type]
+        # Add metadata
+        config_with_meta = copy.deepcopy(config_data)
+        config_with_meta["updated_at"] = self._get_timestamp()
+        config_with_meta["machine"] = os.environ.get("COMPUTERNAME", "unknown")
+        
+        with self._lock:
+            old = self.load_config(config_type)
+            if debounce:
+                self._pending[config_type] = config_with_meta
+                self._schedule_flush()
+                result = (True, "")
+            else:
+                self._pending.pop(config_type, None)
+                result = self._write_config(config_type, config_with_meta)
+        
+        if result[0]:
+            self._notify(ConfigChange(config_type, old, copy.deepcopy(config_with_meta), "save"))
+        return result
+    
+    def update_config(self, config_type: str, updates: Dict[str, Any],
+                      debounce: bool = False) -> tuple[bool, str]:
+        """Merge ``updates`` into the current config and save it"""
+        if config_type not in self.config_files:
+            return False, f"Unknown config type: {config_type}"
         
+        with self._lock:
+            config_data = self.load_config(config_type)
+            config_data.update(updates)
+            return self.save_config(config_type, config_data, debounce=debounce)
+    
+    def _write_config(self, config_type: str, config_with_meta: Dict[str, Any]) -> tuple[bool, str]:
+        config_file = self.config_files[config_type]
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(config_file), exist_ok=True)
-            
-            # Add metadata
-            config_with_meta = config_data.copy()
-            config_with_meta["updated_at"] = self._get_timestamp()
-            config_with_meta["machine"] = os.environ.get("COMPUTERNAME", "unknown")
-            
-            # Write to file
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_with_meta, f, indent=2, ensure_ascii=False)
-            
+            self._write_atomic(config_file, config_with_meta)
+            self._cache[config_type] = {"config": config_with_meta, "stat": self._file_stat(config_file)}
             logger.info(f"Saved {config_type} config to {config_file}")
             return True, ""
         
@@ -193,6 +357,70 @@ class ConfigManager:
             logger.error(error_msg)
             return False, error_msg
     
+    def _schedule_flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(SAVE_DEBOUNCE_SEC, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def flush(self) -> bool:
+        """Write every debounced save now; returns False if any write failed"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._pending = self._pending, {}
+            ok = True
+            for config_type, config_with_meta in pending.items():
+                success, _ = self._write_config(config_type, config_with_meta)
+                ok = ok and success
+            return ok
+    
+    def subscribe(self, callback: Callable[[ConfigChange], None]):
+        """Call ``callback(change)`` after every config change (on the thread that made or noticed it)"""
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[ConfigChange], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _notify(self, change: ConfigChange):
+        if not change:
+            return
+        logger.info(f"Config changed: {change}")
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Config subscriber failed on {change}: {e}")
+    
+    def check_for_changes(self):
+        """Revalidate every cached config against its file; changed files notify subscribers"""
+        for config_type in self.config_files:
+            self.load_config(config_type)
+    
+    def start_watching(self, interval: float = WATCH_INTERVAL_SEC):
+        """Poll the config files on a background thread until ``stop_watching``"""
+        if self._watch_stop is not None:
+            return
+        self.check_for_changes()
+        stop = self._watch_stop = threading.Event()
+        
+        def watch():
+            while not stop.wait(interval):
+                try:
+                    self.check_for_changes()
+                except Exception as e:
+                    logger.error(f"Config watcher failed: {e}")
+        
+        threading.Thread(target=watch, name="config-watcher", daemon=True).start()
+    
+    def stop_watching(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+    
     def get_all_configs(self) -> Dict[str, Dict[str, Any]]:
         """Load all configuration types"""
         return {
@@ -210,5 +438,5 @@ class ConfigManager:
         if config_type not in self.defaults:
             return False, f"Unknown config type: {config_type}"
         
-        default_config = self.defaults[config_type].copy()
+        default_config = copy.deepcopy(self.defaults[config_type])
         return self.save_config(config_type, default_config)
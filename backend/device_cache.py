@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# A failed probe may just mean the device was busy; retry it after this long
+NEGATIVE_TTL_SEC = 600
+
+
+def device_fingerprint(name: str, hostapi: str, max_input_channels: int, max_output_channels: int) -> str:
+    """Stable identity of a device across restarts and PortAudio index changes"""
+    key = f"{name.strip()}|{hostapi}|{int(max_input_channels)}|{int(max_output_channels)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def device_list_signature(fingerprints: Iterable[str]) -> str:
+    """Identity of the whole device list; changes on hotplug or driver changes"""
+    return hashlib.sha1("\n".join(fingerprints).encode("utf-8")).hexdigest()[:16]
+
+
+class DeviceCapabilityCache:
+    """Persisted per-device samplerate probe results.
+
+    Entries are keyed by device fingerprint and stored in
+    ``config/device_cache.json``. The whole cache is dropped as soon as the
+    device list signature differs from the one it was built against.
+    Successful probes are kept until then; failed probes expire after
+    ``NEGATIVE_TTL_SEC``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[str] = None
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._signature = data.get("signature")
+            self._devices = data.get("devices", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable device cache {self.path}: {e}")
+
+    def _save(self):
+        data = {"signature": self._signature, "devices": self._devices}
+        directory = os.path.dirname(self.path) or "."
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".device_cache.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save device cache: {e}")
+
+    def validate(self, signature: str) -> bool:
+        """Drop every entry if the device list changed; returns True if the cache was kept"""
+        with self._lock:
+            if signature == self._signature:
+                return True
+            if self._devices:
+                logger.info("Device list changed, clearing device capability cache")
+            self._signature = signature
+            self._devices = {}
+            self._save()
+            return False
+
+    def lookup(self, fingerprint: str, samplerate: int) -> Optional[bool]:
+        """Cached probe result for a rate, or None if it must be probed"""
+        with self._lock:
+            entry = self._devices.get(fingerprint, {}).get("samplerates", {}).get(str(samplerate))
+        if entry is None:
+            return None
+        if not entry["ok"] and time.time() - entry["probed_at"] > NEGATIVE_TTL_SEC:
+            return None
+        return entry["ok"]
+
+    def store(self, fingerprint: str, name: str, samplerate: int, ok: bool):
+        with self._lock:
+            device = self._devices.setdefault(fingerprint, {"name": name, "samplerates": {}})
+            device["samplerates"][str(samplerate)] = {"ok": ok, "probed_at": time.time()}
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._signature = None
+            self._devices = {}
+            self._save()
@@ -0,0 +1,103 @@
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator
+
+import anyio
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it the stdlib encoder is used
+    orjson = None
+
+# NDJSON lines are sent in chunks of about this size rather than one write per row
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values orjson/json cannot encode natively (e.g. numpy scalars, sets)"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (stdlib json if it is not installed).
+
+    As ``default_response_class`` it speeds up every route's final encode.
+    Returning it directly from an endpoint also skips FastAPI's
+    ``jsonable_encoder`` pass, so rows are copied once, not three times.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def dict_factory(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+    """Row factory building plain dicts straight from the cursor (no sqlite3.Row + dict(row) copy)"""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def ndjson_chunks(rows: Iterable[Any], chunk_bytes: int = NDJSON_CHUNK_BYTES) -> Iterator[bytes]:
+    """One JSON document per line, buffered into chunks of about ``chunk_bytes``.
+
+    Only one chunk is held at a time, so memory does not grow with the
+    number of rows.
+    """
+    buffer = bytearray()
+    for row in rows:
+        buffer += dumps(row)
+        buffer += b"\n"
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streams an iterable of rows as ``application/x-ndjson``.
+
+    Starlette pulls from a plain (sync) iterator in a worker thread, so a
+    row generator reading from SQLite does not block the event loop. The rows
+    are closed once the response ends, also when the client disconnects
+    mid-stream, so a generator's ``finally`` (closing its connection) runs
+    right away rather than at garbage collection.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, rows: Iterable[Any], **kwargs):
+        self._chunks = ndjson_chunks(rows)
+        self._rows = rows
+        super().__init__(self._chunks, media_type=NDJSON_MEDIA_TYPE, **kwargs)
+
+    def _close(self):
+        self._chunks.close()
+        close = getattr(self._rows, "close", None)
+        if close is not None:
+            close()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Shielded: a cancelled request still releases the cursor
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(self._close)
@@ -0,0 +1,199 @@
+import os
+import re
+import stat
+import logging
+import mimetypes
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+logger = logging.getLogger(__name__)
+
+# Uploaded files never change once written (UUID or content-hash names)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Stand-ins (e.g. the original served before its thumbnail exists) must not stick
+NO_STORE_CACHE_CONTROL = "no-store"
+
+# In-memory cache budget for hot files (e.g. the active avatar)
+MEMORY_CACHE_BYTES = 32 * 1024 * 1024
+MEMORY_CACHE_MAX_ITEM_BYTES = 2 * 1024 * 1024
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_HASH_NAME_RE = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ByteBudgetCache:
+    """LRU cache of file contents bounded by total bytes"""
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_BYTES, max_item_bytes: int = MEMORY_CACHE_MAX_ITEM_BYTES):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._items: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple[str, int, int], data: bytes):
+        if len(data) > self.max_item_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+file_cache = ByteBudgetCache()
+
+
+def make_etag(full_path: str, stat_result: os.stat_result) -> str:
+    """Strong ETag: the content hash for content-addressed files, else mtime and size"""
+    # Only originals (blobs/<aa>/<bb>/<sha256>.<ext>) carry the hash; their
+    # thumbnails (thumbs/<width>/blobs/...) share the stem but not the bytes
+    parts = os.path.normpath(full_path).split(os.sep)
+    stem = os.path.splitext(parts[-1])[0]
+    is_original = len(parts) >= 4 and parts[-4] == "blobs" and not (len(parts) >= 6 and parts[-6] == "thumbs")
+    if _HASH_NAME_RE.match(stem) and is_original:
+        return f'"{stem}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (multiple or malformed ranges)
+    and raises a 416 when the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    start_str, end_str = match.groups()
+    if not start_str and not end_str:
+        return None
+
+    if not start_str:
+        # Suffix range: the last N bytes
+        length = int(end_str)
+        if length == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        return max(0, size - length), size - 1
+
+    start = int(start_str)
+    end = int(end_str) if end_str else size - 1
+    if start >= size or end < start:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(full_path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(full_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _read_file(full_path: str) -> bytes:
+    with open(full_path, "rb") as f:
+        return f.read()
+
+
+async def immutable_file_response(full_path: str, stat_result: os.stat_result, request_headers: Headers,
+                                  method: str = "GET", media_type: Optional[str] = None,
+                                  cacheable: bool = True) -> Response:
+    """Build a cache-friendly response for a write-once file.
+
+    Honors If-None-Match and single-range Range/If-Range requests, and serves
+    small files from the in-memory cache. With ``cacheable=False`` (a stand-in
+    served under another file's URL) it sends ``no-store`` and no ETag.
+    """
+    size = stat_result.st_size
+    etag = make_etag(full_path, stat_result) if cacheable else None
+    media_type = media_type or mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL if cacheable else NO_STORE_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    headers["Accept-Ranges"] = "bytes"
+
+    if_none_match = request_headers.get("if-none-match")
+    if etag and if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request_headers.get("range")
+    if range_header:
+        if_range = request_headers.get("if-range")
+        if if_range is None or (etag and if_range.strip() == etag):
+            byte_range = parse_range(range_header, size)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    if method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    # Small files come from (or go into) the in-memory cache
+    if size <= file_cache.max_item_bytes:
+        key = (full_path, stat_result.st_mtime_ns, size)
+        data = file_cache.get(key)
+        if data is None:
+            data = await anyio.to_thread.run_sync(_read_file, full_path)
+            file_cache.put(key, data)
+        return Response(data[start:end + 1], status_code=status_code, headers=headers, media_type=media_type)
+
+    if status_code == 206:
+        return StreamingResponse(_iter_file_range(full_path, start, end), status_code=206,
+                                 headers=headers, media_type=media_type)
+
+    return FileResponse(full_path, stat_result=stat_result, headers=headers, media_type=media_type)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for write-once uploads: long-lived caching, strong ETags, Range and a hot-file cache"""
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        return await immutable_file_response(full_path, stat_result, Headers(scope=scope), scope["method"])
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Subsystem check states
+OK = "ok"
+STARTING = "starting"
+DEGRADED = "degraded"
+ERROR = "error"
+
+# The UI is usable without voice or a microphone; it is not without the database
+REQUIRED_CHECKS = ("database",)
+
+
+def check_database(memory_manager) -> Dict[str, Any]:
+    """Memory database opens and answers a trivial query (builds the memory manager if needed)"""
+    try:
+        with sqlite3.connect(memory_manager.db_path, timeout=1.0) as conn:
+            conn.execute("SELECT 1").fetchone()
+        return {"status": OK, "path": memory_manager.db_path}
+    except Exception as e:
+        return {"status": ERROR, "error": str(e)}
+
+
+def check_voice_bridge(voice_core) -> Dict[str, Any]:
+    """Bridge script and the voice stack's interpreter both exist"""
+    if not voice_core.initialized:
+        return {"status": STARTING}
+    missing = [path for path in (voice_core.bridge_path, voice_core.voice_py) if not os.path.exists(path)]
+    if missing:
+        return {"status": DEGRADED, "error": "not_found", "missing": missing}
+    return {"status": OK, "busy": voice_core.voice_active}
+
+
+def check_audio_device(audio_wizard) -> Dict[str, Any]:
+    """At least one input device, and whether the configured one is among them"""
+    if not audio_wizard.initialized:
+        return {"status": STARTING}
+    try:
+        devices = audio_wizard.list_devices()
+    except Exception as e:
+        return {"status": DEGRADED, "error": str(e)}
+    if not devices:
+        return {"status": DEGRADED, "error": "no_input_devices"}
+
+    result = {"status": OK, "input_devices": len(devices)}
+    config = audio_wizard.load_audio_config()
+    if config:
+        name = config["input_device"].get("name")
+        result["configured"] = name
+        result["configured_present"] = any(d["name"] == name for d in devices)
+        if not result["configured_present"]:
+            result["status"] = DEGRADED
+    return result
+
+
+def collect_health(subsystems: List, memory_manager, voice_core, audio_wizard,
+                   warming_up: bool = False) -> Dict[str, Any]:
+    """Liveness plus per-subsystem readiness.
+
+    ``ok`` is always true once the server answers. ``ready`` means the
+    startup warm-up (if any) has finished and every required check passes;
+    optional checks that fail only mark the backend as degraded.
+    """
+    checks = {
+        "database": check_database(memory_manager),
+        "voice_bridge": check_voice_bridge(voice_core),
+        "audio_device": check_audio_device(audio_wizard),
+    }
+    status = {subsystem.name: subsystem.status() for subsystem in subsystems}
+    failed = [name for name in REQUIRED_CHECKS if checks[name]["status"] != OK]
+    ready = not warming_up and not failed
+
+    if ready:
+        degraded = [name for name, check in checks.items() if check["status"] in (DEGRADED, ERROR)]
+        degraded += [name for name, s in status.items() if s["error"]]
+        msg = f"ready (degraded: {', '.join(degraded)})" if degraded else "ready"
+    elif warming_up:
+        pending = [name for name, s in status.items() if not s["ready"] and not s["error"]]
+        msg = f"starting: {', '.join(pending)}"
+    else:
+        msg = f"not ready: {', '.join(failed)}"
+
+    return {
+        "ok": True,
+        "ready": ready,
+        "msg": msg,
+        "checks": checks,
+        "subsystems": status,
+    }
@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import uuid
+import bisect
+import sqlite3
+import logging
+import threading
+import contextvars
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds; anything slower lands in the overflow bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Queries slower than this are logged with their query plan
+SLOW_QUERY_MS = float(os.getenv("ZANDALEE_SLOW_QUERY_MS", "50"))
+
+# Slow queries kept for /debug/metrics
+MAX_SLOW_QUERIES = 50
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 2)
+        return round(self.max_ms, 2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{b}": n for b, n in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["overflow"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets
+        }
+
+
+class LatencyRegistry:
+    """Named histograms (routes, queries) behind one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, key: str, ms: float):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: h.snapshot() for key, h in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+route_latency = LatencyRegistry()
+query_latency = LatencyRegistry()
+slow_queries: Deque[Dict[str, Any]] = deque(maxlen=MAX_SLOW_QUERIES)
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """Route template (``/memory/{memory_id}``), not the raw path, to keep the key set bounded"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        endpoint = scope.get("endpoint")
+        path = getattr(endpoint, "__name__", None) or "<unmatched>"
+    return f"{scope.get('method', 'WS')} {path}"
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware: per-route latency histograms and request IDs.
+
+    The request ID comes from an incoming ``X-Request-ID`` header or is
+    generated, is echoed on the response, and is available to log records
+    (``%(request_id)s``) for everything that runs while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:12]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(REQUEST_ID_HEADER.encode(), request_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            route_latency.observe(_route_label(scope), (time.perf_counter() - start) * 1000)
+            request_id_var.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds ``record.request_id`` ("-" outside a request)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+def install_request_id_logging(fmt: str = "%(levelname)s:%(name)s:[%(request_id)s] %(message)s"):
+    """Tag every root handler's records with the current request ID"""
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(RequestIdFilter())
+        handler.setFormatter(logging.Formatter(fmt))
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times each statement and explains the slow ones.
+
+    Timing covers executing the statement up to its first row; rows fetched
+    later are not included.
+    """
+
+    def execute(self, sql: str, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, parameters, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, None, (time.perf_counter() - start) * 1000)
+
+    def _record(self, sql: str, parameters, ms: float):
+        statement = _normalize_sql(sql)
+        query_latency.observe(statement, ms)
+        if ms >= SLOW_QUERY_MS:
+            plan = self._query_plan(sql, parameters)
+            slow_queries.append({
+                "sql": statement,
+                "ms": round(ms, 3),
+                "plan": plan,
+                "request_id": request_id_var.get(),
+                "at": time.time()
+            })
+            logger.warning(f"Slow query ({ms:.1f}ms): {statement} | plan: {'; '.join(plan) or 'n/a'}")
+
+    def _query_plan(self, sql: str, parameters) -> List[str]:
+        """``EXPLAIN QUERY PLAN`` details, one line per step"""
+        if parameters is None or not sql.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")):
+            return []
+        try:
+            rows = sqlite3.Cursor.execute(self.connection.cursor(), f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error as e:
+            return [f"explain failed: {e}"]
+        return [row[-1] for row in rows]
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``conn.execute``) are TimedCursors"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect_timed(db_path: str, **kwargs) -> sqlite3.Connection:
+    """``sqlite3.connect`` with per-query timing and the slow-query log"""
+    return sqlite3.connect(db_path, factory=TimedConnection, **kwargs)
+
+
+def metrics_snapshot() -> Dict[str, Any]:
+    return {
+        "routes": route_latency.snapshot(),
+        "queries": query_latency.snapshot(),
+        "slow_queries": list(slow_queries),
+        "slow_query_ms": SLOW_QUERY_MS
+    }
@@ -0,0 +1,126 @@
+import time
+import logging
+import threading
+import contextlib
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Wall-clock breakdown of backend startup: module imports and subsystem inits.
+
+    Times are milliseconds; ``offset_ms`` is when a step started relative to
+    the profile's creation (the top of main.py), so concurrent inits show up
+    as overlapping intervals.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timed(self, kind: str, name: str):
+        """Time the block as an ``import`` or ``init`` step"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(kind, name, start, ok=False)
+            raise
+        self.record(kind, name, start)
+
+    def record(self, kind: str, name: str, start: float, ok: bool = True):
+        """Record a step that began at ``start`` (a perf_counter value) and ends now"""
+        end = time.perf_counter()
+        with self._lock:
+            self.steps.append({
+                "kind": kind,
+                "name": name,
+                "offset_ms": round((start - self.started) * 1000, 1),
+                "duration_ms": round((end - start) * 1000, 1),
+                "thread": threading.current_thread().name,
+                "ok": ok
+            })
+
+    def report(self, subsystems: Optional[List["LazySubsystem"]] = None) -> Dict[str, Any]:
+        with self._lock:
+            steps = list(self.steps)
+        report = {
+            "uptime_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "imports": [s for s in steps if s["kind"] == "import"],
+            "inits": [s for s in steps if s["kind"] == "init"]
+        }
+        if subsystems is not None:
+            report["subsystems"] = {s.name: s.status() for s in subsystems}
+        return report
+
+    def format(self, subsystems: Optional[List["LazySubsystem"]] = None) -> str:
+        """Human-readable table of the report"""
+        report = self.report(subsystems)
+        lines = [f"{'kind':7s} {'name':28s} {'start ms':>9s} {'took ms':>9s}  thread"]
+        for step in sorted(report["imports"] + report["inits"], key=lambda s: s["offset_ms"]):
+            flag = "" if step["ok"] else "  FAILED"
+            lines.append(f"{step['kind']:7s} {step['name']:28s} {step['offset_ms']:9.1f} "
+                         f"{step['duration_ms']:9.1f}  {step['thread']}{flag}")
+        lines.append(f"uptime {report['uptime_ms']:.1f} ms")
+        return "\n".join(lines)
+
+
+class LazySubsystem:
+    """Proxy that builds a subsystem on first attribute access.
+
+    ``factory`` runs at most once, under a lock, so a request that arrives
+    while a background warm-up is still building the subsystem waits for
+    that build instead of starting another. A failed build is retried on
+    the next access.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], profile: StartupProfile):
+        self._name = name
+        self._factory = factory
+        self._profile = profile
+        self._instance = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                try:
+                    with self._profile.timed("init", self._name):
+                        self._instance = self._factory()
+                except Exception as e:
+                    self._error = str(e)
+                    logger.error(f"Failed to initialize {self._name}: {e}")
+                    raise
+                self._error = None
+                logger.info(f"Initialized {self._name}")
+            return self._instance
+
+    def status(self) -> Dict[str, Any]:
+        inits = [s for s in self._profile.report()["inits"] if s["name"] == self._name]
+        return {
+            "ready": self.initialized,
+            "init_ms": inits[-1]["duration_ms"] if inits else None,
+            "error": self._error
+        }
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = "ready" if self.initialized else "deferred"
+        return f"<LazySubsystem {self._name} ({state})>"
@@ -0,0 +1,224 @@
+import time
+import asyncio
+import logging
+import contextlib
+import numpy as np
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from audio_analysis import CLIP_THRESHOLD, FULL_SCALE
+from audio_wizard import AudioWizard
+from config_manager import DEVICE_KEYS, ConfigChange
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UI_RATE_HZ = 30.0
+MONITOR_BLOCK_MS = 10
+RETRY_DELAY_SEC = 5.0
+
+# vu_level maps this dBFS range onto 0-100
+VU_FLOOR_DBFS = -60.0
+
+
+def _dbfs(value: float) -> float:
+    return float(20 * np.log10(max(value, 1e-10)))
+
+
+class _LevelWindow:
+    """Running stats for one UI frame; touched only by the PortAudio callback thread"""
+
+    def __init__(self):
+        self.energy = 0
+        self.samples = 0
+        self.peak = 0
+        self.clipped = 0
+
+    def add(self, block: np.ndarray):
+        self.energy += int(np.einsum("i,i->", block, block, dtype=np.int64))
+        self.samples += block.size
+        peak = max(int(block.max()), -int(block.min()))
+        if peak > self.peak:
+            self.peak = peak
+        if peak >= CLIP_THRESHOLD:
+            self.clipped += int(np.count_nonzero((block >= CLIP_THRESHOLD) | (block <= -CLIP_THRESHOLD)))
+
+
+class LevelMonitor:
+    """Always-on level meter for the configured input device.
+
+    The stream is only open while at least one subscriber is listening.
+    Each callback block adds to a running window; once the window spans one
+    UI frame (1/30 s by default), the frame is handed to the event loop and
+    every subscriber queue receives it. Queues hold just the latest frame,
+    so a slow client skips frames instead of building a backlog.
+    """
+
+    def __init__(self, audio_wizard: AudioWizard, ui_rate_hz: float = DEFAULT_UI_RATE_HZ):
+        self.audio_wizard = audio_wizard
+        self.ui_rate_hz = ui_rate_hz
+        self.subscribers: List[asyncio.Queue] = []
+        self.latest: Optional[Dict[str, Any]] = None
+        self.xruns = 0
+        self._stream = None
+        self._device: Optional[Dict[str, Any]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = asyncio.Lock()
+        self._retry: Optional[asyncio.TimerHandle] = None
+        self._pauses = 0
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None
+
+    def _resolve_device(self) -> Optional[Dict[str, Any]]:
+        """Configured device from audio.json, matched by name in case the index moved"""
+        config = self.audio_wizard.load_audio_config()
+        if not config:
+            return None
+
+        device_id = config["input_device"]["id"]
+        name = config["input_device"].get("name")
+        devices = self.audio_wizard.list_devices()
+        match = next((d for d in devices if d["name"] == name), None)
+        if match:
+            device_id = match["id"]
+        return {"id": device_id, "name": name, "samplerate": int(config.get("samplerate", 16000))}
+
+    def _make_callback(self, samplerate: int):
+        frame_samples = max(1, int(samplerate / self.ui_rate_hz))
+        state = {"window": _LevelWindow()}
+
+        def callback(indata, frames, time_info, status):
+            if status and (getattr(status, "input_overflow", False) or getattr(status, "input_underflow", False)):
+                self.xruns += 1
+            block = np.frombuffer(indata, dtype=np.int16)
+            if block.size == 0:
+                return
+
+            window = state["window"]
+            window.add(block)
+            if window.samples >= frame_samples:
+                state["window"] = _LevelWindow()
+                self._loop.call_soon_threadsafe(self._publish_window, window)
+
+        return callback
+
+    def _open(self, device: Dict[str, Any]):
+        """Open and start the input stream (blocking; runs on a worker thread)"""
+        samplerate = device["samplerate"]
+        stream = self.audio_wizard.backend.input_stream(
+            device["id"], samplerate, int(samplerate * MONITOR_BLOCK_MS / 1000), self._make_callback(samplerate)
+        )
+        stream.__enter__()
+        return stream
+
+    def _close(self, stream):
+        try:
+            stream.__exit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Level monitor stream close failed: {e}")
+
+    def _publish_window(self, window: _LevelWindow):
+        rms = np.sqrt(window.energy / window.samples) / FULL_SCALE
+        peak = window.peak / FULL_SCALE
+        rms_dbfs = _dbfs(rms)
+        self._publish({
+            "type": "vu",
+            "data": {
+                "device": self._device["id"] if self._device else None,
+                "rms": round(float(rms), 5),
+                "peak": round(float(peak), 5),
+                "rms_dbfs": round(rms_dbfs, 1),
+                "peak_dbfs": round(_dbfs(peak), 1),
+                "vu_level": round(float(np.clip((rms_dbfs - VU_FLOOR_DBFS) / -VU_FLOOR_DBFS * 100, 0, 100)), 1),
+                "clipped": window.clipped,
+                "xruns": self.xruns,
+                "ts": time.time()
+            }
+        })
+
+    def _publish(self, frame: Dict[str, Any]):
+        """Hand a frame to every subscriber, replacing any frame they have not read yet"""
+        if frame["type"] == "vu":
+            self.latest = frame
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    async def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.subscribers.append(queue)
+        await self._ensure_running()
+        return queue
+
+    async def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+        if not self.subscribers:
+            await self.stop()
+
+    async def _ensure_running(self):
+        async with self._lock:
+            if self._stream is not None or not self.subscribers:
+                return
+            self._loop = asyncio.get_running_loop()
+            if self._pauses:
+                self._publish({"type": "vu_error", "error": "paused"})
+                return
+
+            device = await asyncio.to_thread(self._resolve_device)
+            if device is None:
+                self._publish({"type": "vu_error", "error": "no_audio_config"})
+                return
+
+            try:
+                self._stream = await asyncio.to_thread(self._open, device)
+                self._device = device
+                logger.info(f"Level monitor started on device {device['id']} ({device['name']})")
+            except Exception as e:
+                logger.warning(f"Level monitor could not open device {device['id']}: {e}")
+                self._publish({"type": "vu_error", "error": str(e)})
+                self._schedule_retry()
+
+    def _schedule_retry(self):
+        if self._retry is None:
+            def retry():
+                self._retry = None
+                asyncio.ensure_future(self._ensure_running())
+            self._retry = self._loop.call_later(RETRY_DELAY_SEC, retry)
+
+    async def stop(self):
+        """Close the stream (the monitor restarts on the next subscriber)"""
+        async with self._lock:
+            if self._retry is not None:
+                self._retry.cancel()
+                self._retry = None
+            stream, self._stream = self._stream, None
+            if stream is not None:
+                await asyncio.to_thread(self._close, stream)
+                logger.info("Level monitor paused")
+
+    @contextlib.asynccontextmanager
+    async def paused(self) -> AsyncIterator[None]:
+        """Keep the input stream closed for the duration, e.g. while a wizard job captures the device"""
+        self._pauses += 1
+        try:
+            await self.stop()
+            yield
+        finally:
+            self._pauses -= 1
+            if not self._pauses:
+                await self._ensure_running()
+
+    async def restart(self):
+        """Reopen on the currently configured device, if anyone is listening"""
+        await self.stop()
+        await self._ensure_running()
+
+    def on_config_change(self, change: ConfigChange):
+        """ConfigManager subscriber: follow input device and samplerate changes (any thread)"""
+        if change.config_type != "audio" or not change.touches(*DEVICE_KEYS):
+            return
+        if self._loop is None or not self.subscribers:
+            return
+        self._loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.restart()))
@@ -5,26 +5,46 @@ import subprocess
 import json
 import time
 import uuid
-import shutil
 from datetime import datetime, date
-from typing import Dict, List, Optional, Any
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File, Form
+from typing import Dict, Iterator, List, Optional, Any, Union
+
+from lazy_init import LazySubsystem, StartupProfile
+
+# Started before any third-party import so the report covers the whole startup
+startup_profile = StartupProfile()
+_imports_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
 from pydantic import BaseModel
 import sqlite3
 import logging
 
-# Import the new audio wizard and config manager
-from audio_wizard import AudioWizard
-from config_manager import ConfigManager
+# Audio modules (numpy, scipy, webrtcvad) are imported when their subsystem is first built
+from wizard_jobs import WizardJobManager, DEFAULT_WIZARD_TIMEOUT_SEC
+from config_manager import DEFAULT_VOLUME, VOICE_KEYS, ConfigChange, ConfigManager
+from health import collect_health
+from worker_coordination import SharedVoiceState
+from instrumentation import InstrumentationMiddleware, connect_timed, install_request_id_logging, metrics_snapshot
+from sampling_profiler import MAX_PROFILE_SEC, SamplingProfiler
+from fast_json import FastJSONResponse, NDJSONResponse, dict_factory
+from upload_pipeline import (ALLOWED_IMAGE_TYPES, MAX_UPLOAD_BYTES, MAX_UPLOAD_FILES, MULTIPART_OVERHEAD_BYTES,
+                             UploadError, UploadSizeLimitMiddleware)
+from photo_store import PhotoStore, FILES_BASE_URL
+from thumbnails import ThumbnailService, DEFAULT_THUMB_WIDTH
+from file_server import ImmutableStaticFiles, immutable_file_response
+from photo_gc import PhotoGarbageCollector
+from photo_index import PhotoIndex
+
+startup_profile.record("import", "main", _imports_started)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
+install_request_id_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Zandalee AI Backend", version="1.0.0")
+app = FastAPI(title="Zandalee AI Backend", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -33,8 +53,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Refuse oversized upload bodies before Starlette spools the multipart form
+app.add_middleware(UploadSizeLimitMiddleware)
+# Avatars are a single file plus a name field
+app.add_middleware(UploadSizeLimitMiddleware, paths=("/avatar/upload",),
+                   max_body_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+# Per-route latency histograms and request IDs (outermost, so it times the whole request)
+app.add_middleware(InstrumentationMiddleware)
+
 # ... keep existing code (Enhanced Pydantic models for photo-aware system)
 class MemoryItem(BaseModel):
     text: str
@@ -73,6 +103,8 @@ class MicWizardConfig(BaseModel):
     silence_hold_ms: Optional[int] = 5000
     preroll_ms: Optional[int] = 500
     voice_prompt: Optional[str] = "testing one two three"
+    record_session: Optional[bool] = False
+    auto_tune_vad: Optional[bool] = True
 
 class MicUseRequest(BaseModel):
     id: int
@@ -83,34 +115,72 @@ class ConfigData(BaseModel):
 
 # ... keep existing code (VoiceCore class implementation)
 class VoiceCore:
-    def __init__(self):
+    def __init__(self, shared_state: Optional[SharedVoiceState] = None):
         # Environment configuration
         self.voice_py = os.getenv("VOICE_PY", "C:\\Users\\teren\\Documents\\Zandalee\\local-talking-llm\\.venv\\Scripts\\python.exe")
         self.zandalee_root = os.getenv("ZANDALEE_ROOT", "C:\\Users\\teren\\Documents\\Zandalee")
         self.bridge_path = os.path.join(self.zandalee_root, "voice_client.py")
         
-        # Half-duplex control
+        # Half-duplex control; with several workers the lock and metrics are also shared between them
         self._voice_lock = asyncio.Lock()
+        self._shared = shared_state
         self._voice_active = False
         self._last_tts_ms = 0
         self._last_error = None
         
+        # Output device and volume from audio.json, passed to the bridge on every call
+        self._output_device_id = -1
+        self._volume = None
+        
         # Validate bridge exists
         if not os.path.exists(self.bridge_path):
             logger.error(f"Bridge not found at {self.bridge_path}")
             self._last_error = "voice_client.py not found"
+            if self._shared is not None:
+                self._shared.update(last_error=self._last_error)
+    
+    async def _set_state(self, **fields):
+        for name, value in fields.items():
+            setattr(self, f"_{name}", value)
+        if self._shared is not None:
+            # The shared state sits behind a file lock another worker may hold
+            await asyncio.to_thread(self._shared.update, **fields)
+    
+    def _state(self) -> Dict[str, Any]:
+        if self._shared is not None:
+            return self._shared.read(blocking=False)
+        return {"voice_active": self._voice_active, "last_tts_ms": self._last_tts_ms, "last_error": self._last_error}
     
     @property
     def voice_active(self) -> bool:
-        return self._voice_active
+        return self._state()["voice_active"]
     
     @property
     def last_tts_ms(self) -> int:
-        return self._last_tts_ms
+        return self._state()["last_tts_ms"]
     
     @property
     def last_error(self) -> Optional[str]:
-        return self._last_error
+        return self._state()["last_error"]
+    
+    def apply_audio_config(self, config: Dict[str, Any]):
+        """Use new output device/volume settings from the next utterance on"""
+        self._output_device_id = config.get("output_device", {}).get("id", -1)
+        self._volume = config.get("volume")
+        logger.info(f"Voice settings: output device {self._output_device_id}, volume {self._volume}")
+    
+    def _voice_args(self) -> List[str]:
+        """Bridge arguments for a non-default output device and volume.
+        
+        Defaults add nothing, so TTS scripts that do not know these flags keep
+        working until the user picks a device or volume.
+        """
+        args = []
+        if self._output_device_id is not None and self._output_device_id >= 0:
+            args += ["--output-device", str(self._output_device_id)]
+        if self._volume is not None and self._volume != DEFAULT_VOLUME:
+            args += ["--volume", str(self._volume)]
+        return args
     
     async def speak(self, text: str) -> Dict[str, Any]:
         """Real TTS via bridge with half-duplex enforcement"""
@@ -119,17 +189,18 @@ class VoiceCore:
         
         # Check if bridge exists
         if not os.path.exists(self.bridge_path):
-            self._last_error = "voice_client.py not found"
-            return {"ok": False, "error": self._last_error}
+            await self._set_state(last_error="voice_client.py not found")
+            return {"ok": False, "error": "voice_client.py not found"}
         
-        # Enforce half-duplex - acquire lock
+        # Enforce half-duplex - acquire lock (and the cross-worker one, if any)
         if self._voice_lock.locked():
             return {"ok": False, "error": "busy"}
         
         async with self._voice_lock:
+            if self._shared is not None and not await asyncio.to_thread(self._shared.try_begin_utterance):
+                return {"ok": False, "error": "busy"}
             try:
-                self._voice_active = True
-                self._last_error = None
+                await self._set_state(voice_active=True, last_error=None)
                 start_time = time.time()
                 
                 # Construct command for bridge
@@ -137,7 +208,8 @@ class VoiceCore:
                     self.voice_py,
                     self.bridge_path,
                     "--transport", "STDIO",
-                    "--speak", text.strip()
+                    "--speak", text.strip(),
+                    *self._voice_args()
                 ]
                 
                 logger.info(f"Executing TTS command: {' '.join(cmd)}")
@@ -154,38 +226,44 @@ class VoiceCore:
                 
                 # Measure latency
                 tts_ms = int((time.time() - start_time) * 1000)
-                self._last_tts_ms = tts_ms
+                await self._set_state(last_tts_ms=tts_ms)
                 
                 if process.returncode == 0:
                     logger.info(f"TTS completed successfully in {tts_ms}ms")
                     return {"ok": True, "tts_ms": tts_ms}
                 else:
                     error_msg = stderr.decode().strip() if stderr else f"Process failed with code {process.returncode}"
-                    self._last_error = error_msg
+                    await self._set_state(last_error=error_msg)
                     logger.error(f"TTS failed: {error_msg}")
                     return {"ok": False, "error": error_msg}
                     
             except Exception as e:
                 error_msg = str(e)
-                self._last_error = error_msg
+                await self._set_state(last_error=error_msg)
                 logger.error(f"TTS exception: {error_msg}")
                 return {"ok": False, "error": error_msg}
             finally:
                 self._voice_active = False
+                if self._shared is not None:
+                    await asyncio.to_thread(self._shared.end_utterance)
     
     async def stop(self) -> Dict[str, Any]:
         """Optional: Stop TTS playback"""
         return {"ok": False, "error": "not_supported"}
     
     def get_metrics(self) -> Dict[str, Any]:
-        """Get real-time voice metrics"""
+        """Get real-time voice metrics (the same from every worker)"""
+        state = self._state()
         return {
             "ok": True,
-            "voice_active": self._voice_active,
-            "last_tts_ms": self._last_tts_ms,
-            "last_error": self._last_error
+            "voice_active": state["voice_active"],
+            "last_tts_ms": state["last_tts_ms"],
+            "last_error": state["last_error"]
         }
 
+# Rows fetched from the cursor at a time when streaming list results
+STREAM_BATCH_ROWS = 500
+
 # ... keep existing code (PhotoAwareMemoryManager class implementation)
 class PhotoAwareMemoryManager:
     def __init__(self):
@@ -204,11 +282,24 @@ class PhotoAwareMemoryManager:
         os.makedirs(self.diary_photos_dir, exist_ok=True)
         os.makedirs(self.avatars_dir, exist_ok=True)
         
+        # Content-addressed storage for new uploads (served under /files/blobs)
+        self.photo_store = PhotoStore(self.storage_dir, self.db_path)
+        self.thumbnails = ThumbnailService(self.storage_dir)
+        # Other workers index into the same table; the similarity tree follows their writes
+        self.photo_index = PhotoIndex(self.db_path, shared=WORKERS > 1)
+        self.photo_gc = PhotoGarbageCollector(self.db_path, self.photo_store, {
+            "blobs": self.photo_store.blobs_dir,
+            "thumbs": self.thumbnails.thumbs_dir,
+            "photos": self.photos_dir,
+            "diary_photos": self.diary_photos_dir,
+            "avatars": self.avatars_dir
+        })
+        
         self.init_db()
     
     def init_db(self):
         """Initialize SQLite database with photo-aware and avatar schema"""
-        with sqlite3.connect(self.db_path) as conn:
+        with connect_timed(self.db_path) as conn:
             # Enable WAL mode for better concurrency
             conn.execute("PRAGMA journal_mode=WAL;")
             
@@ -274,62 +365,119 @@ class PhotoAwareMemoryManager:
             conn.execute("CREATE INDEX IF NOT EXISTS idx_avatars_active ON avatars(is_active);")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_avatars_created ON avatars(created_at);")
             
+            self.photo_store.init_db(conn)
+            self.photo_index.init_db(conn)
+            
             conn.commit()
     
     # ... keep existing code (all methods from save_uploaded_file through get_avatar_status)
     def save_uploaded_file(self, file: UploadFile, for_diary: bool = False, for_avatar: bool = False) -> Dict[str, Any]:
-        """Save uploaded image file and return URL"""
+        """Save uploaded image file into the content-addressed store and return URL.
+
+        Blocking: streams the upload to disk in chunks, so call it from a worker thread.
+        ``for_diary``/``for_avatar`` are accepted for compatibility; all uploads share one store.
+        """
         try:
-            # Validate file type
-            allowed_types = ["image/png", "image/jpeg", "image/webp"]
-            if file.content_type not in allowed_types:
-                return {"ok": False, "error": f"Invalid file type. Allowed: {', '.join(allowed_types)}"}
-            
-            # Check file size (10MB limit)
-            file.file.seek(0, 2)  # Seek to end
-            file_size = file.file.tell()
-            file.file.seek(0)  # Reset to beginning
-            
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return {"ok": False, "error": "File too large. Maximum size: 10MB"}
-            
-            # Choose directory based on usage
-            if for_avatar:
-                target_dir = self.avatars_dir
-                url_prefix = "avatars"
-            elif for_diary:
-                target_dir = self.diary_photos_dir
-                url_prefix = "diary_photos"
-            else:
-                target_dir = self.photos_dir
-                url_prefix = "photos"
-            
-            # Generate unique filename
-            file_id = str(uuid.uuid4())
-            
-            # Get file extension
-            ext = "png"
-            if file.content_type == "image/jpeg":
-                ext = "jpg"
-            elif file.content_type == "image/webp":
-                ext = "webp"
-            
-            filename = f"{file_id}.{ext}"
-            file_path = os.path.join(target_dir, filename)
-            
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Return URL for local serving
-            url = f"http://127.0.0.1:8759/files/{url_prefix}/{filename}"
-            
-            return {"ok": True, "path": f"{url_prefix}/{filename}", "url": url, "id": file_id}
+            # Validate declared file type
+            if file.content_type not in ALLOWED_IMAGE_TYPES:
+                return {"ok": False, "error": f"Invalid file type. Allowed: {', '.join(ALLOWED_IMAGE_TYPES)}"}
+            
+            # Stream into the store: enforces the 10MB cap, checks magic bytes and deduplicates
+            file.file.seek(0)
+            stored = self.photo_store.put(file.file)
+            
+            # Derivatives and photo metadata are produced in the background on process pools
+            self.thumbnails.enqueue(stored["path"])
+            if not stored["deduplicated"]:
+                self.photo_index.enqueue(
+                    stored["sha256"], stored["path"],
+                    self.photo_store.abspath_for(stored["sha256"], stored["ext"])
+                )
+            
+            return {
+                "ok": True,
+                "path": stored["path"],
+                "url": stored["url"],
+                "thumb_url": self.thumb_url(stored["path"]),
+                "id": stored["sha256"],
+                "size": stored["size"],
+                "sha256": stored["sha256"],
+                "deduplicated": stored["deduplicated"]
+            }
             
+        except UploadError as e:
+            return {"ok": False, "error": str(e)}
         except Exception as e:
             logger.error(f"File upload error: {e}")
             return {"ok": False, "error": str(e)}
     
+    def thumb_url(self, value: Optional[str], size: int = DEFAULT_THUMB_WIDTH) -> Optional[str]:
+        """Thumbnail URL for a photo path or /files URL"""
+        if not value:
+            return None
+        relpath = value[len(FILES_BASE_URL) + 1:] if value.startswith(FILES_BASE_URL + "/") else value
+        relpath = relpath.replace("\\", "/").lstrip("/")
+        return f"{FILES_BASE_URL}/thumb/{size}/{relpath}"
+    
+    def _rows(self, sql: str, params, thumb_field: str, stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """Run a list query; rows are built as dicts straight from the cursor, with a thumb_url.
+
+        With ``stream`` the query runs now (so SQL errors raise here) but rows
+        are fetched lazily in batches of ``STREAM_BATCH_ROWS``; the iterator may
+        be resumed from any thread and closes its connection when done.
+        """
+        conn = connect_timed(self.db_path, check_same_thread=False)
+        try:
+            conn.row_factory = dict_factory
+            cursor = conn.execute(sql, params)
+        except Exception:
+            conn.close()
+            raise
+        rows = self._iter_cursor(conn, cursor, thumb_field)
+        return rows if stream else list(rows)
+    
+    def _iter_cursor(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, thumb_field: str) -> Iterator[Dict]:
+        try:
+            while True:
+                batch = cursor.fetchmany(STREAM_BATCH_ROWS)
+                if not batch:
+                    return
+                for item in batch:
+                    item["thumb_url"] = self.thumb_url(item.get(thumb_field))
+                    yield item
+        finally:
+            conn.close()
+    
+    def find_similar_photos(self, ref: str, max_distance: int = 10, limit: int = 20) -> Dict[str, Any]:
+        """Find stored photos that look like the referenced one"""
+        sha256 = self.photo_store.parse_ref(ref)
+        if not sha256:
+            return {"ok": False, "error": "Not a stored photo reference"}
+        if not self.photo_index.get(sha256):
+            return {"ok": False, "error": "Photo not indexed"}
+        
+        items = self.photo_index.similar(sha256, max_distance, limit)
+        return {"ok": True, "items": self._with_photo_urls(items)}
+    
+    def list_photos_by_date(self, start: str = None, end: str = None, limit: int = 100) -> List[Dict]:
+        """List stored photos by EXIF capture time"""
+        return self._with_photo_urls(self.photo_index.by_date(start, end, limit))
+    
+    def reindex_photos(self) -> Dict[str, Any]:
+        """Queue metadata extraction for stored photos that are not indexed yet"""
+        queued = 0
+        for sha256, ext in self.photo_index.missing():
+            path = self.photo_store.relpath_for(sha256, ext)
+            if self.photo_index.enqueue(sha256, path, self.photo_store.abspath_for(sha256, ext)):
+                queued += 1
+        return {"ok": True, "queued": queued}
+    
+    def _with_photo_urls(self, items: List[Dict]) -> List[Dict]:
+        for item in items:
+            item["url"] = self.photo_store.url_for(item["path"])
+            item["thumb_url"] = self.thumb_url(item["path"])
+        return items
+    
     def learn_memory(self, memory: MemoryItem) -> Dict[str, Any]:
         """Store a new memory with photo and emotion support"""
         try:
@@ -337,7 +485,13 @@ class PhotoAwareMemoryManager:
             now = datetime.now().isoformat()
             tags_csv = ",".join(memory.tags)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
+                # Store photos by their content-addressed path
+                image_path = memory.image
+                blob = self.photo_store.resolve(conn, image_path)
+                if blob:
+                    image_path = blob["path"]
+                
                 conn.execute("""
                     INSERT INTO memories (
                         id, text, kind, tags, importance, relevance, 
@@ -345,9 +499,10 @@ class PhotoAwareMemoryManager:
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     memory_id, memory.text, memory.kind, tags_csv,
-                    memory.importance, memory.relevance, memory.image,
+                    memory.importance, memory.relevance, image_path,
                     memory.emotion, memory.source, memory.trust, now
                 ))
+                self.photo_store.incref(conn, image_path)
                 conn.commit()
             
             return {"ok": True, "id": memory_id}
@@ -355,35 +510,30 @@ class PhotoAwareMemoryManager:
             logger.error(f"Memory learn error: {e}")
             return {"ok": False, "error": str(e)}
     
-    def search_memories(self, query: str = "", tags: List[str] = [], emotion: str = None, limit: int = 10) -> List[Dict]:
-        """Search memories with photo and emotion filtering"""
+    def search_memories(self, query: str = "", tags: List[str] = [], emotion: str = None, limit: int = 10,
+                        stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """Search memories with photo and emotion filtering (``stream``: see ``_rows``)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                sql = "SELECT * FROM memories WHERE retired = 0"
-                params = []
-                
-                if query:
-                    sql += " AND text LIKE ?"
-                    params.append(f"%{query}%")
-                
-                if tags:
-                    for tag in tags:
-                        sql += " AND tags LIKE ?"
-                        params.append(f"%{tag}%")
-                
-                if emotion:
-                    sql += " AND emotion = ?"
-                    params.append(emotion)
-                
-                sql += " ORDER BY importance DESC, created_at DESC LIMIT ?"
-                params.append(limit)
-                
-                cursor = conn.execute(sql, params)
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            sql = "SELECT * FROM memories WHERE retired = 0"
+            params = []
+            
+            if query:
+                sql += " AND text LIKE ?"
+                params.append(f"%{query}%")
+            
+            if tags:
+                for tag in tags:
+                    sql += " AND tags LIKE ?"
+                    params.append(f"%{tag}%")
+            
+            if emotion:
+                sql += " AND emotion = ?"
+                params.append(emotion)
+            
+            sql += " ORDER BY importance DESC, created_at DESC LIMIT ?"
+            params.append(limit)
+            
+            return self._rows(sql, params, "image_path", stream)
         except Exception as e:
             logger.error(f"Memory search error: {e}")
             return []
@@ -398,11 +548,15 @@ class PhotoAwareMemoryManager:
             if "tags" in patch and isinstance(patch["tags"], list):
                 patch["tags"] = ",".join(patch["tags"])
             
+            # The API field "image" maps to the image_path column
+            if "image" in patch:
+                patch["image_path"] = patch.pop("image")
+            
             # Build UPDATE query
             set_clauses = []
             params = []
             for key, value in patch.items():
-                if key in ["text", "tags", "importance", "relevance", "emotion", "image", "retired"]:
+                if key in ["text", "tags", "importance", "relevance", "emotion", "image_path", "retired"]:
                     set_clauses.append(f"{key} = ?")
                     params.append(value)
             
@@ -412,10 +566,20 @@ class PhotoAwareMemoryManager:
             params.append(memory_id)
             sql = f"UPDATE memories SET {', '.join(set_clauses)} WHERE id = ?"
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
+                old_image = None
+                if "image_path" in patch:
+                    row = conn.execute("SELECT image_path FROM memories WHERE id = ?", (memory_id,)).fetchone()
+                    old_image = row[0] if row else None
+                
                 cursor = conn.execute(sql, params)
                 if cursor.rowcount == 0:
                     return {"ok": False, "error": "Memory not found"}
+                
+                # Move the photo reference over to the new image
+                if "image_path" in patch and old_image != patch["image_path"]:
+                    self.photo_store.incref(conn, patch["image_path"])
+                    self.photo_store.decref(conn, old_image)
                 conn.commit()
             
             return {"ok": True}
@@ -429,11 +593,12 @@ class PhotoAwareMemoryManager:
             entry_id = str(uuid.uuid4())
             now = datetime.now().isoformat()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 conn.execute("""
                     INSERT INTO diary_entries (id, text, photo_url, emotion_tag, created_at)
                     VALUES (?, ?, ?, ?, ?)
                 """, (entry_id, text, photo_url, emotion_tag, now))
+                self.photo_store.incref(conn, photo_url)
                 conn.commit()
             
             return {"ok": True, "id": entry_id}
@@ -441,49 +606,38 @@ class PhotoAwareMemoryManager:
             logger.error(f"Diary append error: {e}")
             return {"ok": False, "error": str(e)}
     
-    def list_diary_entries(self, limit: int = 20) -> List[Dict]:
-        """List diary entries from diary_entries table"""
+    def list_diary_entries(self, limit: int = 20, stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """List diary entries from diary_entries table (``stream``: see ``_rows``)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                cursor = conn.execute("""
-                    SELECT id, text, photo_url, emotion_tag, created_at
-                    FROM diary_entries 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                """, (limit,))
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            return self._rows("""
+                SELECT id, text, photo_url, emotion_tag, created_at
+                FROM diary_entries 
+                ORDER BY created_at DESC 
+                LIMIT ?
+            """, (limit,), "photo_url", stream)
         except Exception as e:
             logger.error(f"Diary list error: {e}")
             return []
     
-    def search_diary_entries(self, query: str = "", emotion: str = None, limit: int = 20) -> List[Dict]:
-        """Search diary entries"""
+    def search_diary_entries(self, query: str = "", emotion: str = None, limit: int = 20,
+                             stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """Search diary entries (``stream``: see ``_rows``)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                sql = "SELECT id, text, photo_url, emotion_tag, created_at FROM diary_entries WHERE 1=1"
-                params = []
-                
-                if query:
-                    sql += " AND text LIKE ?"
-                    params.append(f"%{query}%")
-                
-                if emotion:
-                    sql += " AND emotion_tag = ?"
-                    params.append(emotion)
-                
-                sql += " ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
-                
-                cursor = conn.execute(sql, params)
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            sql = "SELECT id, text, photo_url, emotion_tag, created_at FROM diary_entries WHERE 1=1"
+            params = []
+            
+            if query:
+                sql += " AND text LIKE ?"
+                params.append(f"%{query}%")
+            
+            if emotion:
+                sql += " AND emotion_tag = ?"
+                params.append(emotion)
+            
+            sql += " ORDER BY created_at DESC LIMIT ?"
+            params.append(limit)
+            
+            return self._rows(sql, params, "photo_url", stream)
         except Exception as e:
             logger.error(f"Diary search error: {e}")
             return []
@@ -497,11 +651,12 @@ class PhotoAwareMemoryManager:
             ts_str = now.isoformat()
             tags_csv = ",".join(entry.tags)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 conn.execute("""
                     INSERT INTO diary (id, date, ts, text, image_path, emotion, tags)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 """, (entry_id, date_str, ts_str, entry.text, entry.image, entry.emotion, tags_csv))
+                self.photo_store.incref(conn, entry.image)
                 conn.commit()
             
             return {"ok": True, "id": entry_id}
@@ -510,39 +665,33 @@ class PhotoAwareMemoryManager:
             return {"ok": False, "error": str(e)}
 
     def list_diary(self, date_filter: str = None, since: str = None, limit: int = 50, 
-                   tags: List[str] = [], emotion: str = None) -> List[Dict]:
-        """Legacy diary list for backward compatibility"""
+                   tags: List[str] = [], emotion: str = None, stream: bool = False) -> Union[List[Dict], Iterator[Dict]]:
+        """Legacy diary list for backward compatibility (``stream``: see ``_rows``)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                sql = "SELECT * FROM diary WHERE 1=1"
-                params = []
-                
-                if date_filter:
-                    sql += " AND date = ?"
-                    params.append(date_filter)
-                
-                if since:
-                    sql += " AND ts >= ?"
-                    params.append(since)
-                
-                if tags:
-                    for tag in tags:
-                        sql += " AND tags LIKE ?"
-                        params.append(f"%{tag}%")
-                
-                if emotion:
-                    sql += " AND emotion = ?"
-                    params.append(emotion)
-                
-                sql += " ORDER BY ts DESC LIMIT ?"
-                params.append(limit)
-                
-                cursor = conn.execute(sql, params)
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            sql = "SELECT * FROM diary WHERE 1=1"
+            params = []
+            
+            if date_filter:
+                sql += " AND date = ?"
+                params.append(date_filter)
+            
+            if since:
+                sql += " AND ts >= ?"
+                params.append(since)
+            
+            if tags:
+                for tag in tags:
+                    sql += " AND tags LIKE ?"
+                    params.append(f"%{tag}%")
+            
+            if emotion:
+                sql += " AND emotion = ?"
+                params.append(emotion)
+            
+            sql += " ORDER BY ts DESC LIMIT ?"
+            params.append(limit)
+            
+            return self._rows(sql, params, "image_path", stream)
         except Exception as e:
             logger.error(f"Legacy diary list error: {e}")
             return []
@@ -555,15 +704,16 @@ class PhotoAwareMemoryManager:
             if not upload_result["ok"]:
                 return upload_result
             
-            # Store in database
-            avatar_id = upload_result["id"]
+            # Store in database (photos are shared, so the avatar gets its own id)
+            avatar_id = str(uuid.uuid4())
             now = datetime.now().isoformat()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 conn.execute("""
                     INSERT INTO avatars (id, name, photo_url, created_at)
                     VALUES (?, ?, ?, ?)
                 """, (avatar_id, name, upload_result["url"], now))
+                self.photo_store.incref(conn, upload_result["url"])
                 conn.commit()
             
             return {"ok": True, "id": avatar_id, "name": name, "photo_url": upload_result["url"]}
@@ -574,17 +724,11 @@ class PhotoAwareMemoryManager:
     def list_avatars(self) -> List[Dict]:
         """List all avatars"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                cursor = conn.execute("""
-                    SELECT id, name, photo_url, is_active, created_at
-                    FROM avatars 
-                    ORDER BY created_at DESC
-                """)
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            return self._rows("""
+                SELECT id, name, photo_url, is_active, created_at
+                FROM avatars 
+                ORDER BY created_at DESC
+            """, (), "photo_url")
         except Exception as e:
             logger.error(f"Avatar list error: {e}")
             return []
@@ -592,7 +736,7 @@ class PhotoAwareMemoryManager:
     def select_avatar(self, avatar_id: str) -> Dict[str, Any]:
         """Set active avatar"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 # First, deactivate all avatars
                 conn.execute("UPDATE avatars SET is_active = 0")
                 
@@ -611,7 +755,7 @@ class PhotoAwareMemoryManager:
     def get_avatar_status(self) -> Dict[str, Any]:
         """Get current active avatar"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 conn.row_factory = sqlite3.Row
                 
                 cursor = conn.execute("""
@@ -627,10 +771,11 @@ class PhotoAwareMemoryManager:
                         "ok": True,
                         "active_avatar_id": row["id"],
                         "name": row["name"],
-                        "photo_url": row["photo_url"]
+                        "photo_url": row["photo_url"],
+                        "thumb_url": self.thumb_url(row["photo_url"])
                     }
                 else:
-                    return {"ok": True, "active_avatar_id": None, "name": None, "photo_url": None}
+                    return {"ok": True, "active_avatar_id": None, "name": None, "photo_url": None, "thumb_url": None}
         except Exception as e:
             logger.error(f"Avatar status error: {e}")
             return {"ok": False, "error": str(e)}
@@ -638,7 +783,7 @@ class PhotoAwareMemoryManager:
     def delete_avatar(self, avatar_id: str) -> Dict[str, Any]:
         """Delete avatar from database and storage"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect_timed(self.db_path) as conn:
                 conn.row_factory = sqlite3.Row
                 
                 # Get avatar info first
@@ -648,9 +793,11 @@ class PhotoAwareMemoryManager:
                 if not row:
                     return {"ok": False, "error": "Avatar not found"}
                 
-                # Extract filename from URL and delete file
+                # Release the stored photo; legacy avatar files are deleted directly
                 photo_url = row["photo_url"]
-                if "avatars/" in photo_url:
+                if self.photo_store.parse_ref(photo_url):
+                    self.photo_store.decref(conn, photo_url)
+                elif "avatars/" in photo_url:
                     filename = photo_url.split("avatars/")[-1]
                     file_path = os.path.join(self.avatars_dir, filename)
                     if os.path.exists(file_path):
@@ -665,20 +812,81 @@ class PhotoAwareMemoryManager:
             logger.error(f"Avatar delete error: {e}")
             return {"ok": False, "error": str(e)}
 
-# Initialize components
-voice_core = VoiceCore()
-memory_manager = PhotoAwareMemoryManager()
-audio_wizard = AudioWizard()
-config_manager = ConfigManager()
+# Initialize components on first use (or in the background after startup)
+def _build_config_manager() -> ConfigManager:
+    manager = ConfigManager()
+    manager.subscribe(apply_config_change)
+    return manager
+
+# uvicorn worker processes serving this app (main's __main__ and the launcher set it)
+WORKERS = max(1, int(os.getenv("ZANDALEE_WORKERS", "1")))
+
+def _run_dir() -> str:
+    """Where workers keep the state they share"""
+    return os.path.join(os.getenv("ZANDALEE_HOME", "C:\\Users\\teren\\Documents\\Zandalee"), "run")
+
+def _build_voice_core() -> VoiceCore:
+    shared = None
+    if WORKERS > 1:
+        shared = SharedVoiceState(_run_dir())
+    core = VoiceCore(shared)
+    core.apply_audio_config(config_manager.load_config("audio"))
+    return core
+
+def _build_audio_wizard():
+    with startup_profile.timed("import", "audio_wizard"):
+        from audio_wizard import AudioWizard
+    rescan_marker = os.path.join(_run_dir(), "devices.rescan") if WORKERS > 1 else None
+    return AudioWizard(config_manager=config_manager.get(), rescan_marker=rescan_marker)
+
+def _build_level_monitor():
+    with startup_profile.timed("import", "level_monitor"):
+        from level_monitor import LevelMonitor
+    return LevelMonitor(audio_wizard.get())
+
+config_manager = LazySubsystem("config_manager", _build_config_manager, startup_profile)
+voice_core = LazySubsystem("voice_core", _build_voice_core, startup_profile)
+memory_manager = LazySubsystem("memory_manager", PhotoAwareMemoryManager, startup_profile)
+audio_wizard = LazySubsystem("audio_wizard", _build_audio_wizard, startup_profile)
+wizard_jobs = LazySubsystem(
+    "wizard_jobs",
+    # Wizard captures use the same devices as the VU meter; keep its stream closed meanwhile
+    lambda: WizardJobManager(audio_wizard.get(), capture_guard=lambda: level_monitor.paused(),
+                             run_dir=_run_dir() if WORKERS > 1 else None),
+    startup_profile
+)
+level_monitor = LazySubsystem("level_monitor", _build_level_monitor, startup_profile)
+SUBSYSTEMS = [config_manager, voice_core, memory_manager, audio_wizard, wizard_jobs, level_monitor]
+
+def apply_config_change(change: ConfigChange):
+    """Hand config changes (API saves, wizard results, edits on disk) to the running subsystems"""
+    if change.config_type == "audio" and change.touches(*VOICE_KEYS) and voice_core.initialized:
+        voice_core.apply_audio_config(change.new)
+    if level_monitor.initialized:
+        level_monitor.on_config_change(change)
+
+# Background build started by the startup hook; /health is not ready while it runs
+_warm_up_task: Optional[asyncio.Future] = None
 
-# Mount static files for serving uploaded images and avatars
-app.mount("/files", StaticFiles(directory=memory_manager.storage_dir), name="files")
+async def warm_up_subsystems():
+    """Build every subsystem concurrently on worker threads, then log the startup report"""
+    results = await asyncio.gather(*(asyncio.to_thread(s.get) for s in SUBSYSTEMS), return_exceptions=True)
+    for subsystem, result in zip(SUBSYSTEMS, results):
+        if isinstance(result, Exception):
+            logger.error(f"Warm-up of {subsystem.name} failed: {result}")
+    logger.info("Startup timing:\n" + startup_profile.format(SUBSYSTEMS))
 
 # ... keep existing code (API routes for voice, mic, memory, diary, avatar)
 @app.get("/")
 async def root():
     return {"message": "Zandalee AI Backend", "status": "active"}
 
+@app.get("/health")
+async def health():
+    """Liveness (``ok``) and readiness (``ready``) with database, voice bridge and audio device checks"""
+    warming_up = _warm_up_task is not None and not _warm_up_task.done()
+    return await asyncio.to_thread(collect_health, SUBSYSTEMS, memory_manager, voice_core, audio_wizard, warming_up)
+
 # REAL VOICE ENDPOINTS (No Mocks)
 @app.post("/speak")
 async def speak(command: VoiceCommand):
@@ -699,29 +907,142 @@ async def stop_voice():
 
 # MIC WIZARD ENDPOINTS (NEW)
 @app.get("/mic/list")
-async def list_mic_devices():
-    """List available input devices (real, no mocks)"""
-    devices = audio_wizard.list_devices()
+async def list_mic_devices(refresh: bool = False):
+    """List available input devices (real, no mocks); ``refresh`` re-scans for hotplugged devices"""
+    devices = await asyncio.to_thread(audio_wizard.list_devices, refresh)
     return devices
 
 @app.post("/mic/wizard")
 async def run_mic_wizard(config: MicWizardConfig = None):
-    """Run complete mic wizard with real device testing"""
+    """Run complete mic wizard with real device testing (waits for the result)"""
     config_dict = config.dict() if config else {}
-    result = audio_wizard.run_wizard(config_dict)
-    return result
+    # Runs as a job too, so it can never capture alongside a background job
+    return await wizard_jobs.run(config_dict)
+
+@app.post("/mic/wizard/jobs")
+async def start_mic_wizard_job(config: MicWizardConfig = None, timeout_sec: float = DEFAULT_WIZARD_TIMEOUT_SEC):
+    """Start the mic wizard in the background and return its job id"""
+    config_dict = config.dict() if config else {}
+    return wizard_jobs.start(config_dict, timeout_sec)
+
+@app.get("/mic/wizard/jobs/{job_id}")
+async def get_mic_wizard_job(job_id: str):
+    """Current status, phase, levels and per-device results of a wizard job"""
+    # With several workers the job may be another worker's, read from disk
+    job = await asyncio.to_thread(wizard_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@app.get("/mic/wizard/jobs/{job_id}/events")
+async def stream_mic_wizard_job(job_id: str, request: Request, since: int = 0):
+    """Stream wizard progress as server-sent events"""
+    job = await asyncio.to_thread(wizard_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Resume after the last event the browser saw when it reconnects
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id) + 1
+    
+    return StreamingResponse(
+        wizard_jobs.stream(job, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/mic/wizard/jobs/{job_id}/cancel")
+async def cancel_mic_wizard_job(job_id: str):
+    """Cancel a running wizard job"""
+    return await asyncio.to_thread(wizard_jobs.cancel, job_id)
 
 @app.post("/mic/use")
 async def use_mic_device(request: MicUseRequest):
     """Manually set a specific device"""
-    result = audio_wizard.use_device(request.id)
-    return result
+    return await asyncio.to_thread(audio_wizard.use_device, request.id)
+
+@app.websocket("/ws/vu")
+async def vu_stream(websocket: WebSocket):
+    """Live mic levels (~30 Hz) from the configured device; the mic is only open while someone listens"""
+    await websocket.accept()
+    queue = await level_monitor.subscribe()
+    # Watch for the client going away even when no frames are flowing
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                message = receiver.result()
+                if message["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.ensure_future(websocket.receive())
+                continue
+            await websocket.send_json(getter.result())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+        await level_monitor.unsubscribe(queue)
 
 # FILE UPLOAD ENDPOINT
 @app.post("/files/upload")
-async def upload_file(file: UploadFile = File(...), for_diary: bool = False, for_avatar: bool = False):
-    """Upload image file for memories/diary/avatars"""
-    return memory_manager.save_uploaded_file(file, for_diary, for_avatar)
+async def upload_file(file: List[UploadFile] = File(...), for_diary: bool = False, for_avatar: bool = False):
+    """Upload one or more image files for memories/diary/avatars"""
+    if len(file) > MAX_UPLOAD_FILES:
+        raise HTTPException(status_code=413, detail=f"Too many files. Maximum per request: {MAX_UPLOAD_FILES}")
+    
+    # Each file is streamed to disk in its own worker thread so the event loop stays free
+    results = await asyncio.gather(*[
+        asyncio.to_thread(memory_manager.save_uploaded_file, f, for_diary, for_avatar)
+        for f in file
+    ])
+    
+    # Single uploads keep the original response shape
+    if len(results) == 1:
+        return results[0]
+    return {"ok": all(r["ok"] for r in results), "items": results}
+
+@app.get("/files/thumb/{size}/{path:path}")
+async def get_thumbnail(size: int, path: str, request: Request):
+    """Serve the nearest WebP derivative of a stored image, generating it if needed"""
+    source_path = memory_manager.thumbnails.source_path(path)
+    if source_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    thumb_path = await memory_manager.thumbnails.get(size, path)
+    if thumb_path is None:
+        # Pillow missing or undecodable image: fall back to the original, uncached,
+        # so the browser picks up the WebP once it exists
+        return await immutable_file_response(source_path, os.stat(source_path), request.headers,
+                                             request.method, cacheable=False)
+    
+    return await immutable_file_response(thumb_path, os.stat(thumb_path), request.headers, request.method)
+
+@app.post("/files/gc")
+async def collect_photo_garbage(dry_run: bool = False, grace_hours: float = 24.0):
+    """Delete stored photos and thumbnails that nothing references any more"""
+    result = await asyncio.to_thread(memory_manager.photo_gc.run, grace_hours * 3600, dry_run=dry_run)
+    return {"ok": True, **result}
+
+# PHOTO INDEX ENDPOINTS
+@app.get("/photos/similar")
+async def find_similar_photos(ref: str, max_distance: int = 10, limit: int = 20):
+    """Find photos similar to a stored photo (hash, path or URL) by perceptual hash"""
+    return await asyncio.to_thread(memory_manager.find_similar_photos, ref, max_distance, limit)
+
+@app.get("/photos/by_date")
+async def list_photos_by_date(start: str = None, end: str = None, limit: int = 100):
+    """List photos captured within a date range (ISO8601)"""
+    results = await asyncio.to_thread(memory_manager.list_photos_by_date, start, end, limit)
+    return FastJSONResponse({"ok": True, "items": results})
+
+@app.post("/photos/reindex")
+async def reindex_photos():
+    """Index metadata for photos uploaded before the index existed"""
+    return await asyncio.to_thread(memory_manager.reindex_photos)
 
 # ENHANCED MEMORY ENDPOINTS
 @app.post("/memory/learn")
@@ -729,12 +1050,18 @@ async def learn_memory(memory: MemoryItem):
     """Learn a new memory with photo and emotion support"""
     return memory_manager.learn_memory(memory)
 
+def _list_response(rows, format: str):
+    """``{"ok": true, "items": [...]}`` encoded in one pass, or one row per line with ``format=ndjson``"""
+    if format == "ndjson":
+        return NDJSONResponse(rows)
+    return FastJSONResponse({"ok": True, "items": rows})
+
 @app.get("/memory/search")
-async def search_memory(q: str = "", tags: str = "", emotion: str = None, limit: int = 10):
-    """Search memories with photo and emotion filtering"""
+async def search_memory(q: str = "", tags: str = "", emotion: str = None, limit: int = 10, format: str = "json"):
+    """Search memories with photo and emotion filtering (``format=ndjson`` streams rows)"""
     tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
-    results = memory_manager.search_memories(q, tag_list, emotion, limit)
-    return {"ok": True, "items": results}
+    results = await asyncio.to_thread(memory_manager.search_memories, q, tag_list, emotion, limit, format == "ndjson")
+    return _list_response(results, format)
 
 @app.post("/memory/update")
 async def update_memory(update: MemoryUpdate):
@@ -748,16 +1075,16 @@ async def append_diary_entry(text: str = Form(...), photo_url: str = Form(None),
     return memory_manager.append_diary_entry(text, photo_url, emotion_tag)
 
 @app.get("/diary/list")
-async def list_diary_entries(limit: int = 20):
-    """List recent diary entries"""
-    results = memory_manager.list_diary_entries(limit)
-    return {"ok": True, "items": results}
+async def list_diary_entries(limit: int = 20, format: str = "json"):
+    """List recent diary entries (``format=ndjson`` streams rows)"""
+    results = await asyncio.to_thread(memory_manager.list_diary_entries, limit, format == "ndjson")
+    return _list_response(results, format)
 
 @app.get("/diary/search")
-async def search_diary_entries(q: str = "", emotion: str = None, limit: int = 20):
-    """Search diary entries"""
-    results = memory_manager.search_diary_entries(q, emotion, limit)
-    return {"ok": True, "items": results}
+async def search_diary_entries(q: str = "", emotion: str = None, limit: int = 20, format: str = "json"):
+    """Search diary entries (``format=ndjson`` streams rows)"""
+    results = await asyncio.to_thread(memory_manager.search_diary_entries, q, emotion, limit, format == "ndjson")
+    return _list_response(results, format)
 
 # LEGACY DIARY ENDPOINTS (Backward Compatibility)
 @app.post("/diary/append_legacy")
@@ -767,23 +1094,24 @@ async def append_diary_legacy(entry: DiaryEntry):
 
 @app.get("/diary/list_legacy")
 async def list_diary_legacy(date: str = None, since: str = None, limit: int = 50, 
-                    tags: str = "", emotion: str = None):
-    """Legacy diary list for backward compatibility"""
+                    tags: str = "", emotion: str = None, format: str = "json"):
+    """Legacy diary list for backward compatibility (``format=ndjson`` streams rows)"""
     tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
-    results = memory_manager.list_diary(date, since, limit, tag_list, emotion)
-    return {"ok": True, "items": results}
+    results = await asyncio.to_thread(memory_manager.list_diary, date, since, limit, tag_list, emotion,
+                                      format == "ndjson")
+    return _list_response(results, format)
 
 # NEW AVATAR ENDPOINTS
 @app.post("/avatar/upload")
 async def upload_avatar(file: UploadFile = File(...), name: str = Form(...)):
     """Upload avatar image"""
-    return memory_manager.upload_avatar(file, name)
+    return await asyncio.to_thread(memory_manager.upload_avatar, file, name)
 
 @app.get("/avatar/list")
 async def list_avatars():
     """List all avatars"""
-    results = memory_manager.list_avatars()
-    return {"ok": True, "items": results}
+    results = await asyncio.to_thread(memory_manager.list_avatars)
+    return FastJSONResponse({"ok": True, "items": results})
 
 @app.post("/avatar/select")
 async def select_avatar(request: AvatarSelect):
@@ -811,12 +1139,17 @@ async def get_config(config_type: str):
     return {"ok": True, "config": config_data}
 
 @app.post("/config/{config_type}")
-async def set_config(config_type: str, config_data: ConfigData):
-    """Set configuration by type with validation"""
+async def set_config(config_type: str, config_data: ConfigData, debounce: bool = False):
+    """Set configuration by type with validation.
+    
+    ``?debounce=true`` coalesces rapid changes (slider drags) into one write.
+    """
     if config_type not in ["audio", "llm", "ui", "avatar"]:
         raise HTTPException(status_code=400, detail="Invalid config type")
     
-    success, error_msg = config_manager.save_config(config_type, config_data.data)
+    # A debounced save is only visible in this worker until it is flushed, so other workers would serve stale config
+    debounce = debounce and WORKERS == 1
+    success, error_msg = config_manager.save_config(config_type, config_data.data, debounce=debounce)
     if not success:
         raise HTTPException(status_code=400, detail=error_msg)
     
@@ -840,6 +1173,82 @@ async def reset_config(config_type: str):
     
     return {"ok": True, "message": f"{config_type} config reset to defaults"}
 
+@app.get("/debug/metrics")
+async def get_debug_metrics():
+    """Per-route and per-query latency histograms and the recent slow queries (with plans)"""
+    return {"ok": True, **metrics_snapshot()}
+
+@app.get("/debug/profile")
+async def get_debug_profile(seconds: float = 5.0, interval_ms: float = 5.0, idle: bool = False):
+    """Sample every thread's stack for ``seconds`` of live traffic.
+    
+    Returns collapsed stacks (``flamegraph.pl``, speedscope) as text/plain.
+    """
+    if not 0 < seconds <= MAX_PROFILE_SEC:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SEC}]")
+    profiler = SamplingProfiler(interval=max(interval_ms, 1.0) / 1000, include_idle=idle)
+    collapsed = await asyncio.to_thread(profiler.run, seconds)
+    if collapsed is None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(collapsed)
+
+@app.get("/debug/startup")
+async def get_startup_report():
+    """Import and init timings per subsystem, and which subsystems are built yet"""
+    return {"ok": True, **startup_profile.report(SUBSYSTEMS)}
+
+@app.on_event("startup")
+async def start_background_services():
+    """Watch the config files and build the remaining subsystems in the background.
+    
+    Set ``ZANDALEE_LAZY_INIT=1`` to skip the warm-up and build each subsystem on first use.
+    """
+    global _warm_up_task
+    config_manager.start_watching()
+    if os.getenv("ZANDALEE_LAZY_INIT") != "1":
+        _warm_up_task = asyncio.ensure_future(warm_up_subsystems())
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop background worker pools and write pending config saves"""
+    if memory_manager.initialized:
+        memory_manager.thumbnails.shutdown()
+        memory_manager.photo_index.shutdown()
+    if level_monitor.initialized:
+        await level_monitor.stop()
+    config_manager.stop_watching()
+    config_manager.flush()
+
+# Mount static files for serving uploaded images and avatars.
+# Mounted after the routes so it does not shadow /files/upload. The directory
+# is derived here rather than from memory_manager so mounting does not build it.
+STORAGE_DIR = os.path.join(os.getenv("ZANDALEE_HOME", "C:\\Users\\teren\\Documents\\Zandalee"), "storage")
+os.makedirs(STORAGE_DIR, exist_ok=True)
+app.mount("/files", ImmutableStaticFiles(directory=STORAGE_DIR), name="files")
+
 if __name__ == "__main__":
+    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Zandalee AI Backend")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="build every subsystem, print the startup timing report and exit")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="uvicorn worker processes (default: $ZANDALEE_WORKERS or 1)")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        # One at a time, so each init is timed without contention
+        for subsystem in SUBSYSTEMS:
+            subsystem.get()
+        print(startup_profile.format(SUBSYSTEMS))
+        sys.exit(0)
+    
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8759)
+    port = int(os.getenv("ZANDALEE_PORT", "8759"))
+    if args.workers > 1:
+        # Workers re-import main; they coordinate voice through ZANDALEE_HOME/run
+        os.environ["ZANDALEE_WORKERS"] = str(args.workers)
+        uvicorn.run("main:app", host="127.0.0.1", port=port, workers=args.workers)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=port)
@@ -0,0 +1,199 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+from photo_store import PhotoStore
+
+logger = logging.getLogger(__name__)
+
+# Files younger than this are never collected (uploads not yet referenced)
+DEFAULT_GRACE_SECONDS = 24 * 3600
+DEFAULT_BATCH_SIZE = 500
+
+# Columns holding photo references: (table, column, extra WHERE clause)
+REFERENCE_COLUMNS = [
+    ("memories", "image_path", "retired = 0"),
+    ("diary", "image_path", None),
+    ("diary_entries", "photo_url", None),
+    ("avatars", "photo_url", None),
+]
+
+_URL_PREFIX_RE = re.compile(r"^https?://[^/]+/files/")
+
+
+def _strip_ext(relpath: str) -> str:
+    return os.path.splitext(relpath)[0]
+
+
+class PhotoGarbageCollector:
+    """Mark-and-sweep collector for uploaded photos and their derivatives.
+
+    Mark streams every photo reference out of the database; sweep walks the
+    storage directories in batches and deletes unreferenced files older than
+    the grace period. Files are compared by their path without extension, so
+    a thumbnail is live exactly when its source photo is.
+    """
+
+    def __init__(self, db_path: str, photo_store: PhotoStore, roots: Dict[str, str]):
+        # roots maps a reference prefix (e.g. "blobs", "avatars") to its directory
+        self.db_path = db_path
+        self.photo_store = photo_store
+        self.roots = roots
+
+    def _reference_key(self, value: str) -> Optional[str]:
+        """Normalize a stored path or URL to the key used while sweeping"""
+        sha256 = self.photo_store.parse_ref(value)
+        if sha256:
+            return _strip_ext(self.photo_store.relpath_for(sha256, "x"))
+
+        relpath = _URL_PREFIX_RE.sub("", value.strip()).replace("\\", "/").lstrip("/")
+        return _strip_ext(relpath) if relpath else None
+
+    def mark(self, conn: sqlite3.Connection) -> Tuple[Set[str], Dict[str, int]]:
+        """Collect live reference keys and a snapshot of blob refcounts"""
+        # Snapshot refcounts first: any reference added after this point bumps
+        # the count, which makes the conditional delete in sweep skip the blob.
+        refcounts = {
+            sha256: refcount
+            for sha256, refcount in conn.execute("SELECT sha256, refcount FROM blobs")
+        }
+
+        live: Set[str] = set()
+        for table, column, where in REFERENCE_COLUMNS:
+            sql = f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''"
+            if where:
+                sql += f" AND {where}"
+            for (value,) in conn.execute(sql):
+                key = self._reference_key(value)
+                if key:
+                    live.add(key)
+
+        return live, refcounts
+
+    def _walk(self) -> Iterator[Tuple[str, str, os.DirEntry]]:
+        """Yield (prefix, relative key, entry) for every stored file, one directory at a time"""
+        for prefix, root in self.roots.items():
+            stack = [root]
+            while stack:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except FileNotFoundError:
+                    continue
+
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        rel = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                        yield prefix, rel, entry
+
+    def _key_for_file(self, prefix: str, rel: str) -> Tuple[str, bool]:
+        """Reference key of a stored file, and whether it is a derivative"""
+        if prefix == "thumbs":
+            # thumbs/<width>/<source path>.webp
+            parts = rel.split("/", 1)
+            return _strip_ext(parts[1] if len(parts) == 2 else rel), True
+        return _strip_ext(f"{prefix}/{rel}"), False
+
+    def run(self, grace_seconds: float = DEFAULT_GRACE_SECONDS, batch_size: int = DEFAULT_BATCH_SIZE,
+            pause_seconds: float = 0.0, dry_run: bool = False, max_files: Optional[int] = None) -> Dict[str, Any]:
+        """Run one collection pass and report what was reclaimed"""
+        start = time.perf_counter()
+        cutoff = time.time() - grace_seconds
+        stats = {
+            "scanned": 0,
+            "deleted": 0,
+            "deleted_derivatives": 0,
+            "reclaimed_bytes": 0,
+            "kept_recent": 0,
+            "kept_referenced": 0,
+            "dry_run": dry_run,
+        }
+
+        with sqlite3.connect(self.db_path) as conn:
+            live, refcounts = self.mark(conn)
+        stats["referenced"] = len(live)
+        mark_ms = (time.perf_counter() - start) * 1000
+
+        batch: List[Tuple[str, os.DirEntry, bool]] = []
+        for prefix, rel, entry in self._walk():
+            if max_files is not None and stats["scanned"] >= max_files:
+                break
+            stats["scanned"] += 1
+
+            key, is_derivative = self._key_for_file(prefix, rel)
+            if key in live:
+                stats["kept_referenced"] += 1
+                continue
+
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime > cutoff:
+                stats["kept_recent"] += 1
+                continue
+
+            batch.append((key, entry, is_derivative))
+            if len(batch) >= batch_size:
+                self._sweep_batch(batch, refcounts, cutoff, stats, dry_run)
+                batch = []
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+
+        if batch:
+            self._sweep_batch(batch, refcounts, cutoff, stats, dry_run)
+
+        stats["mark_ms"] = round(mark_ms, 1)
+        stats["runtime_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            f"Photo GC: scanned {stats['scanned']} files, deleted {stats['deleted']} "
+            f"({stats['reclaimed_bytes']} bytes) in {stats['runtime_ms']}ms"
+        )
+        return stats
+
+    def _sweep_batch(self, batch: List[Tuple[str, os.DirEntry, bool]], refcounts: Dict[str, int],
+                     cutoff: float, stats: Dict[str, Any], dry_run: bool):
+        """Delete one batch of unreferenced files"""
+        with sqlite3.connect(self.db_path) as conn:
+            for key, entry, is_derivative in batch:
+                # Fresh stat: a deduplicated upload since the walk touches the file
+                try:
+                    st = os.stat(entry.path, follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if st.st_mtime > cutoff:
+                    stats["kept_recent"] += 1
+                    continue
+
+                sha256 = None if is_derivative else self.photo_store.parse_ref(key)
+                if sha256 and sha256 in refcounts and not dry_run:
+                    # Only drop the blob row if nobody referenced it since mark
+                    cursor = conn.execute(
+                        "DELETE FROM blobs WHERE sha256 = ? AND refcount = ?",
+                        (sha256, refcounts[sha256])
+                    )
+                    if cursor.rowcount == 0:
+                        stats["kept_referenced"] += 1
+                        continue
+
+                try:
+                    if not dry_run:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    logger.warning(f"Photo GC could not remove {entry.path}: {e}")
+                    continue
+
+                stats["deleted"] += 1
+                stats["reclaimed_bytes"] += st.st_size
+                if is_derivative:
+                    stats["deleted_derivatives"] += 1
+
+            conn.commit()
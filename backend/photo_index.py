@@ -0,0 +1,330 @@
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it photos are simply not indexed
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+PHASH_SIZE = 32      # image is reduced to 32x32 before the DCT
+PHASH_BITS_SIDE = 8  # top-left 8x8 low-frequency block -> 64-bit hash
+
+# EXIF tags
+_EXIF_IFD = 0x8769
+_DATETIME_ORIGINAL = 0x9003
+_DATETIME = 0x0132
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two 64-bit hashes"""
+    return bin(a ^ b).count("1")
+
+
+def _to_signed64(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def perceptual_hash(img) -> int:
+    """64-bit DCT perceptual hash of a Pillow image"""
+    from scipy.fft import dctn
+
+    gray = img.convert("L").resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.float32)
+    coeffs = dctn(pixels, type=2, norm="ortho")[:PHASH_BITS_SIDE, :PHASH_BITS_SIDE].ravel()
+
+    # Compare against the median, ignoring the DC term
+    bits = coeffs > np.median(coeffs[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _exif_datetime(img) -> Optional[str]:
+    """Capture time from EXIF as ISO8601, if present"""
+    try:
+        exif = img.getexif()
+    except Exception:
+        return None
+
+    raw = None
+    try:
+        raw = exif.get_ifd(_EXIF_IFD).get(_DATETIME_ORIGINAL)
+    except Exception:
+        pass
+    raw = raw or exif.get(_DATETIME)
+    if not raw:
+        return None
+
+    try:
+        return datetime.strptime(str(raw).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+    except ValueError:
+        return None
+
+
+def extract_photo_metadata(path: str) -> Dict[str, Any]:
+    """Capture time, dimensions and perceptual hash of an image file.
+
+    Runs in a worker process, so it must stay a picklable module-level function.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+
+    with Image.open(path) as img:
+        taken_at = _exif_datetime(img)
+        img = ImageOps.exif_transpose(img)
+        return {
+            "width": img.width,
+            "height": img.height,
+            "taken_at": taken_at,
+            "phash": perceptual_hash(img),
+        }
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance.
+
+    The triangle inequality lets a query with radius r skip every child whose
+    edge distance lies outside [d - r, d + r], so lookups touch a small part
+    of the tree instead of every photo.
+    """
+
+    def __init__(self):
+        self._root: Optional[Tuple[int, List[str], Dict[int, Any]]] = None
+        self.size = 0
+
+    def add(self, value: int, key: str):
+        if self._root is None:
+            self._root = (value, [key], {})
+            self.size += 1
+            return
+
+        node = self._root
+        while True:
+            node_value, keys, children = node
+            distance = hamming(value, node_value)
+            if distance == 0:
+                if key not in keys:
+                    keys.append(key)
+                    self.size += 1
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (value, [key], {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, str]]:
+        """All (distance, key) pairs within ``max_distance``, nearest first"""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node_value, keys, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                results.extend((distance, key) for key in keys)
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+
+        results.sort()
+        return results
+
+
+class PhotoIndex:
+    """Indexed photo metadata (capture time, size, perceptual hash) for stored blobs.
+
+    Metadata is extracted on a single background worker process at upload time;
+    similarity queries go through an in-memory BK-tree built from the table.
+    With ``shared`` set (several server workers on one database) other workers
+    also write rows, so the tree is rebuilt whenever the table has changed.
+    """
+
+    def __init__(self, db_path: str, shared: bool = False):
+        self.db_path = db_path
+        self.shared = shared
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tree: Optional[BKTree] = None
+        self._tree_version: Optional[Tuple[int, Optional[str]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def init_db(self, conn: sqlite3.Connection):
+        """Create the photo metadata table"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS photos (
+                sha256       TEXT PRIMARY KEY,
+                path         TEXT NOT NULL,
+                width        INTEGER,
+                height       INTEGER,
+                taken_at     TEXT,
+                phash        INTEGER,
+                indexed_at   TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_taken ON photos(taken_at);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_phash ON photos(phash);")
+
+    def enqueue(self, sha256: str, relpath: str, abspath: str) -> Optional[Future]:
+        """Queue metadata extraction for a stored photo"""
+        if not self.available:
+            return None
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1)
+            future = self._executor.submit(extract_photo_metadata, abspath)
+
+        future.add_done_callback(lambda f: self._on_extracted(sha256, relpath, f))
+        return future
+
+    def _on_extracted(self, sha256: str, relpath: str, future: Future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.warning(f"Photo indexing failed for {relpath}: {exc}")
+            return
+
+        meta = future.result()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO photos (sha256, path, width, height, taken_at, phash, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    sha256, relpath, meta["width"], meta["height"], meta["taken_at"],
+                    _to_signed64(meta["phash"]), datetime.now().isoformat()
+                ))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Photo index write error: {e}")
+            return
+
+        with self._lock:
+            if self._tree is not None and not self.shared:
+                self._tree.add(meta["phash"], sha256)
+
+    def _table_version(self, conn: sqlite3.Connection) -> Tuple[int, Optional[str]]:
+        """Changes whenever a row is added or re-indexed (rows are never deleted)"""
+        return tuple(conn.execute("SELECT COUNT(*), MAX(indexed_at) FROM photos").fetchone())
+
+    def _get_tree(self) -> BKTree:
+        with self._lock:
+            with sqlite3.connect(self.db_path) as conn:
+                if self._tree is not None and self.shared:
+                    version = self._table_version(conn)
+                    if version != self._tree_version:
+                        self._tree = None
+                if self._tree is None:
+                    if self.shared:
+                        self._tree_version = self._table_version(conn)
+                    tree = BKTree()
+                    for sha256, phash in conn.execute("SELECT sha256, phash FROM photos WHERE phash IS NOT NULL"):
+                        tree.add(_to_unsigned64(phash), sha256)
+                    self._tree = tree
+            return self._tree
+
+    def _rows(self, conn: sqlite3.Connection, sha256s: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Photo rows for still-stored blobs, keyed by hash"""
+        sha256s = list(sha256s)
+        rows = {}
+        for start in range(0, len(sha256s), 500):
+            chunk = sha256s[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"""
+                SELECT p.sha256, p.path, p.width, p.height, p.taken_at
+                FROM photos p JOIN blobs b ON b.sha256 = p.sha256
+                WHERE p.sha256 IN ({placeholders})
+            """, chunk)
+            for row in cursor:
+                rows[row["sha256"]] = dict(row)
+        return rows
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM photos WHERE sha256 = ?", (sha256,)).fetchone()
+        if not row:
+            return None
+        item = dict(row)
+        item["phash"] = f"{_to_unsigned64(item['phash']):016x}" if item["phash"] is not None else None
+        return item
+
+    def similar(self, sha256: str, max_distance: int = 10, limit: int = 20) -> List[Dict[str, Any]]:
+        """Photos whose perceptual hash is within ``max_distance`` bits of the given photo"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT phash FROM photos WHERE sha256 = ?", (sha256,)).fetchone()
+        if not row or row[0] is None:
+            return []
+
+        matches = [(d, key) for d, key in self._get_tree().search(_to_unsigned64(row[0]), max_distance)
+                   if key != sha256]
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = self._rows(conn, [key for _, key in matches])
+
+        results = []
+        for distance, key in matches:
+            if key in rows:
+                results.append({**rows[key], "distance": distance})
+                if len(results) >= limit:
+                    break
+        return results
+
+    def by_date(self, start: Optional[str] = None, end: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Photos captured between ``start`` and ``end`` (ISO8601, inclusive)"""
+        sql = """
+            SELECT p.sha256, p.path, p.width, p.height, p.taken_at
+            FROM photos p JOIN blobs b ON b.sha256 = p.sha256
+            WHERE p.taken_at IS NOT NULL
+        """
+        params: List[Any] = []
+        if start:
+            sql += " AND p.taken_at >= ?"
+            params.append(start)
+        if end:
+            # Date-only bounds include the whole day
+            sql += " AND p.taken_at <= ?"
+            params.append(end + "T23:59:59" if len(end) == 10 else end)
+        sql += " ORDER BY p.taken_at LIMIT ?"
+        params.append(limit)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def missing(self) -> List[Tuple[str, str]]:
+        """Stored blobs that have not been indexed yet, as (sha256, ext)"""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("""
+                SELECT b.sha256, b.ext FROM blobs b
+                LEFT JOIN photos p ON p.sha256 = b.sha256
+                WHERE p.sha256 IS NULL
+            """).fetchall()
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
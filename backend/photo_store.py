@@ -0,0 +1,138 @@
+import os
+import re
+import sqlite3
+import logging
+from datetime import datetime
+from typing import BinaryIO, Dict, Any, Optional
+
+from instrumentation import connect_timed
+from upload_pipeline import ALLOWED_IMAGE_TYPES, stream_upload, commit_upload
+
+logger = logging.getLogger(__name__)
+
+# Base URL the /files mount is served from
+FILES_BASE_URL = "http://127.0.0.1:8759/files"
+
+# A SHA-256 hex digest anywhere in a path, URL or bare reference
+_HASH_RE = re.compile(r"(?<![0-9a-f])([0-9a-f]{64})(?![0-9a-f])")
+
+
+class PhotoStore:
+    """Content-addressed photo storage with reference counting.
+
+    Files live under ``<storage_dir>/blobs/<aa>/<bb>/<sha256>.<ext>`` so each
+    directory stays small, and identical uploads share one file. The ``blobs``
+    table tracks how many memories, diary entries and avatars point at each file.
+    """
+
+    def __init__(self, storage_dir: str, db_path: str):
+        self.storage_dir = storage_dir
+        self.blobs_dir = os.path.join(storage_dir, "blobs")
+        self.tmp_dir = os.path.join(self.blobs_dir, "tmp")
+        self.db_path = db_path
+
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def init_db(self, conn: sqlite3.Connection):
+        """Create the blob reference table"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256       TEXT PRIMARY KEY,
+                ext          TEXT NOT NULL,
+                size         INTEGER NOT NULL,
+                refcount     INTEGER DEFAULT 0,
+                created_at   TEXT NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def relpath_for(sha256: str, ext: str) -> str:
+        """Relative path (under /files) of a blob"""
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}.{ext}"
+
+    def abspath_for(self, sha256: str, ext: str) -> str:
+        """Absolute filesystem path of a blob"""
+        return os.path.join(self.storage_dir, *self.relpath_for(sha256, ext).split("/"))
+
+    @staticmethod
+    def url_for(relpath: str) -> str:
+        """Public URL of a file under the /files mount"""
+        return f"{FILES_BASE_URL}/{relpath}"
+
+    @staticmethod
+    def parse_ref(value: Optional[str]) -> Optional[str]:
+        """Extract the blob hash from a path, URL or bare hash"""
+        if not value:
+            return None
+        match = _HASH_RE.search(value.lower())
+        return match.group(1) if match else None
+
+    def put(self, src: BinaryIO) -> Dict[str, Any]:
+        """Store an upload, reusing the existing file when the content is already known.
+
+        Blocking; raises ``UploadError`` for rejected uploads.
+        """
+        upload = stream_upload(src, self.tmp_dir)
+        sha256 = upload["sha256"]
+        ext = ALLOWED_IMAGE_TYPES[upload["content_type"]]
+
+        with connect_timed(self.db_path) as conn:
+            row = conn.execute("SELECT ext FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if row:
+                ext = row[0]
+
+            final_path = self.abspath_for(sha256, ext)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                os.remove(upload["tmp_path"])
+                # Restart the GC grace period: the blob may have been orphaned long ago
+                os.utime(final_path)
+            else:
+                commit_upload(upload["tmp_path"], final_path)
+
+            conn.execute("""
+                INSERT OR IGNORE INTO blobs (sha256, ext, size, refcount, created_at)
+                VALUES (?, ?, ?, 0, ?)
+            """, (sha256, ext, upload["size"], datetime.now().isoformat()))
+            conn.commit()
+
+        relpath = self.relpath_for(sha256, ext)
+        return {
+            "sha256": sha256,
+            "ext": ext,
+            "size": upload["size"],
+            "path": relpath,
+            "url": self.url_for(relpath),
+            "deduplicated": deduplicated
+        }
+
+    def resolve(self, conn: sqlite3.Connection, value: Optional[str]) -> Optional[Dict[str, str]]:
+        """Look up a stored blob from any reference to it"""
+        sha256 = self.parse_ref(value)
+        if not sha256:
+            return None
+        row = conn.execute("SELECT ext FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        if not row:
+            return None
+        return {"sha256": sha256, "path": self.relpath_for(sha256, row[0])}
+
+    def incref(self, conn: sqlite3.Connection, value: Optional[str]) -> bool:
+        """Add a reference to the blob named by ``value`` (no-op for non-blob values)"""
+        sha256 = self.parse_ref(value)
+        if not sha256:
+            return False
+        cursor = conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+        return cursor.rowcount > 0
+
+    def decref(self, conn: sqlite3.Connection, value: Optional[str]) -> bool:
+        """Drop a reference to the blob named by ``value``.
+
+        The row and file stay when the count reaches zero: ``PhotoGarbageCollector``
+        removes them after its grace period, so an upload that was just
+        deduplicated onto this blob never loses its file.
+        """
+        sha256 = self.parse_ref(value)
+        if not sha256:
+            return False
+        cursor = conn.execute("UPDATE blobs SET refcount = MAX(refcount - 1, 0) WHERE sha256 = ?", (sha256,))
+        return cursor.rowcount > 0
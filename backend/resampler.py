@@ -0,0 +1,86 @@
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+
+import numpy as np
+from scipy.signal import firwin, upfirdn
+
+# Rate used for VAD and analysis (webrtcvad accepts only 8/16/32/48 kHz)
+ANALYSIS_SAMPLERATE = 16000
+
+# Filter half-length in units of the slower rate, as in scipy.signal.resample_poly
+FILTER_HALF_LEN = 10
+KAISER_BETA = 5.0
+
+
+@lru_cache(maxsize=16)
+def design_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing lowpass for resampling by up/down, scaled by ``up`` for unity gain"""
+    max_rate = max(up, down)
+    n_taps = 2 * FILTER_HALF_LEN * max_rate + 1
+    taps = firwin(n_taps, 1.0 / max_rate, window=("kaiser", KAISER_BETA)) * up
+    taps.setflags(write=False)
+    return taps
+
+
+class StreamingResampler:
+    """Polyphase FIR resampler that can be fed audio in arbitrary chunks.
+
+    Each chunk is filtered with ``scipy.signal.upfirdn`` (a C polyphase
+    implementation) together with just enough retained history to fill the
+    filter, so chunked output is identical to resampling the whole signal at
+    once. History always starts on an input index that is a multiple of
+    ``down``, which keeps the output phase aligned across chunks.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int = ANALYSIS_SAMPLERATE):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        g = gcd(self.src_rate, self.dst_rate)
+        self.up = self.dst_rate // g
+        self.down = self.src_rate // g
+        self.taps = design_filter(self.up, self.down)
+        # Input samples that contribute to one output sample
+        self.taps_per_phase = -(-len(self.taps) // self.up)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == 1 and self.down == 1
+
+    def reset(self):
+        # Zero history is equivalent to the signal starting at the first chunk
+        self._history = np.zeros(0)
+        self._history_start = 0  # global input index of _history[0]
+        self._consumed = 0       # input samples seen so far
+        self._next_output = 0    # index of the next output sample
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Resample one chunk of int16 audio; returns int16 at ``dst_rate``"""
+        chunk = np.asarray(chunk)
+        if self.passthrough:
+            return chunk.astype(np.int16, copy=False)
+
+        signal = np.concatenate((self._history, chunk.astype(np.float64)))
+        total = self._consumed + len(chunk)
+
+        # Output n uses inputs up to n*down // up, which must already be available
+        n_end = -(-total * self.up // self.down)
+        first_local = self._history_start * self.up // self.down
+        out = upfirdn(self.taps, signal, self.up, self.down)[self._next_output - first_local:n_end - first_local]
+
+        # Keep the inputs the next outputs still need, starting on a multiple of ``down``
+        needed = max(n_end * self.down // self.up - (self.taps_per_phase - 1), 0)
+        keep_from = needed - needed % self.down
+        self._history = signal[keep_from - self._history_start:]
+        self._history_start = keep_from
+        self._consumed = total
+        self._next_output = n_end
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+def to_analysis_rate(audio: np.ndarray, samplerate: int) -> Tuple[np.ndarray, int]:
+    """Resample a complete capture to ``ANALYSIS_SAMPLERATE`` (no-op if already there)"""
+    if samplerate == ANALYSIS_SAMPLERATE:
+        return audio, samplerate
+    return StreamingResampler(samplerate).process(audio), ANALYSIS_SAMPLERATE
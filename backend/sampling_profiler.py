@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default time between stack samples
+SAMPLE_INTERVAL_SEC = 0.005
+
+# Longest profile a single request may ask for
+MAX_PROFILE_SEC = 60
+
+# Frames at the bottom of an idle thread; stacks that end in one of these are waiting, not working
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "_worker", "wait", "_wait_for_tstate_lock", "accept"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval.
+
+    Runs in its own thread, so it sees whatever the event loop and worker
+    threads are doing under live traffic. The result is in collapsed-stack
+    format (``thread;outer;...;inner count`` per line), which flamegraph.pl,
+    speedscope and inferno read directly. Only one profile runs at a time.
+    """
+
+    _running = threading.Lock()
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SEC, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _sample(self, own_ident: int, names: Dict[int, str]):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> Optional[str]:
+        """Sample for ``seconds`` (blocking the calling thread); None if a profile is already running"""
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            own_ident = threading.get_ident()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample(own_ident, names)
+                time.sleep(self.interval)
+        finally:
+            self._running.release()
+        logger.info(f"Profiled {seconds}s: {self.samples} samples, {len(self.stacks)} distinct stacks")
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
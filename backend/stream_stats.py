@@ -0,0 +1,67 @@
+import time
+import numpy as np
+from typing import Any, Dict
+
+# A callback interval this many blocks long means at least one block went missing
+LATE_INTERVAL_BLOCKS = 1.5
+
+
+class StreamStats:
+    """Per-stream xrun counters and callback timing for one capture.
+
+    ``record`` runs inside the PortAudio callback: it bumps the status
+    counters and stores two timestamps into preallocated arrays. Intervals,
+    jitter and gaps are computed afterwards in one vectorized pass.
+    """
+
+    def __init__(self, samplerate: int, blocksize: int, expected_blocks: int):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callbacks = 0
+        self.overflows = 0
+        self.underflows = 0
+        capacity = max(2, int(expected_blocks))
+        self._arrival = np.zeros(capacity)  # host clock when the callback ran
+        self._adc = np.zeros(capacity)      # PortAudio ADC time of the block (0 if unsupported)
+
+    def record(self, time_info, status):
+        """Account one callback (PortAudio callback thread only)"""
+        if status:
+            if getattr(status, "input_overflow", False):
+                self.overflows += 1
+            if getattr(status, "input_underflow", False):
+                self.underflows += 1
+
+        i = self.callbacks
+        if i < len(self._arrival):
+            self._arrival[i] = time.perf_counter()
+            self._adc[i] = getattr(time_info, "inputBufferAdcTime", 0.0) or 0.0
+        self.callbacks = i + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters plus callback jitter and blocks missing from the ADC timeline"""
+        n = min(self.callbacks, len(self._arrival))
+        expected = self.blocksize / self.samplerate
+
+        jitter_ms = 0.0
+        max_interval_ms = 0.0
+        if n >= 2:
+            intervals = np.diff(self._arrival[:n])
+            jitter_ms = float(np.std(intervals)) * 1000
+            max_interval_ms = float(intervals.max()) * 1000
+
+        # Host APIs without ADC timestamps (e.g. MME) report 0; skip gap detection there
+        late = 0
+        adc = self._adc[:n]
+        if n >= 2 and np.all(adc > 0):
+            late = int(np.count_nonzero(np.diff(adc) > expected * LATE_INTERVAL_BLOCKS))
+
+        return {
+            "callbacks": self.callbacks,
+            "overflows": self.overflows,
+            "underflows": self.underflows,
+            "late_callbacks": late,
+            "jitter_ms": round(jitter_ms, 3),
+            "max_interval_ms": round(max_interval_ms, 3),
+            "dropouts": self.overflows + self.underflows + late,
+        }
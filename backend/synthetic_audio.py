@@ -0,0 +1,49 @@
+import numpy as np
+from typing import Optional
+
+
+def _to_int16(signal: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(signal), -32768, 32767).astype(np.int16)
+
+
+def white_noise(samplerate: int, seconds: float, rms: float = 30.0, seed: int = 0) -> np.ndarray:
+    """Gaussian room noise with the given RMS (in int16 units)"""
+    rng = np.random.default_rng(seed)
+    return _to_int16(rng.normal(0, rms, int(samplerate * seconds)))
+
+
+def tone(samplerate: int, seconds: float, freq: float, amplitude: float = 1000.0) -> np.ndarray:
+    t = np.arange(int(samplerate * seconds)) / samplerate
+    return _to_int16(amplitude * np.sin(2 * np.pi * freq * t))
+
+
+def speech_like(samplerate: int, seconds: float, amplitude: float = 6000.0, pitch_hz: float = 140.0,
+                burst_hz: float = 0.5, onset_sec: float = 0.0, noise_rms: float = 20.0,
+                seed: int = 0) -> np.ndarray:
+    """Bursts of harmonic 'voice' separated by near-silence, starting after ``onset_sec``"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(samplerate * seconds)) / samplerate
+    voice = sum(np.sin(2 * np.pi * pitch_hz * k * t) / k for k in range(1, 5))
+    envelope = (np.sin(2 * np.pi * burst_hz * (t - onset_sec)) > 0) & (t >= onset_sec)
+    return _to_int16(amplitude * voice * envelope + rng.normal(0, noise_rms, len(t)))
+
+
+def mix(*signals: np.ndarray, dc_offset: float = 0.0, clip: Optional[float] = None) -> np.ndarray:
+    """Sum int16 signals of equal length, optionally adding DC and hard clipping"""
+    total = np.sum([s.astype(np.float64) for s in signals], axis=0) + dc_offset
+    if clip is not None:
+        total = np.clip(total, -clip, clip)
+    return _to_int16(total)
+
+
+def with_dropouts(audio: np.ndarray, samplerate: int, count: int = 3, gap_ms: float = 20.0,
+                  seed: int = 0) -> np.ndarray:
+    """Copy of ``audio`` with ``count`` zeroed gaps, like blocks lost to overflows"""
+    rng = np.random.default_rng(seed)
+    out = audio.copy()
+    gap = int(samplerate * gap_ms / 1000)
+    if gap <= 0 or len(out) <= gap:
+        return out
+    for start in rng.integers(0, len(out) - gap, count):
+        out[start:start + gap] = 0
+    return out
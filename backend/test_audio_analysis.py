@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+from audio_analysis import (
+    CLIP_THRESHOLD, frame_signal, frame_stats, noise_spectrum, onset_frame, signal_rms, vad_flags,
+    voiced_segments
+)
+
+
+def _reference_segments(flags, start_voiced_frames, end_unvoiced_frames):
+    """Straightforward frame-by-frame hysteresis state machine"""
+    segments, in_speech, voiced_run, unvoiced_run = [], False, 0, 0
+    seg_start = last_voiced = None
+    for i, flag in enumerate(flags):
+        if flag:
+            voiced_run += 1
+            unvoiced_run = 0
+            last_voiced = i
+            if not in_speech and voiced_run >= start_voiced_frames:
+                in_speech, seg_start = True, i - voiced_run + 1
+        else:
+            voiced_run = 0
+            unvoiced_run += 1
+            if in_speech and unvoiced_run >= end_unvoiced_frames:
+                segments.append((seg_start, last_voiced + 1))
+                in_speech = False
+    if in_speech:
+        segments.append((seg_start, last_voiced + 1))
+    return segments
+
+
+class TestAudioAnalysis(unittest.TestCase):
+    def test_frame_signal_is_a_view(self):
+        """Test framing drops the partial tail and does not copy"""
+        audio = np.arange(25, dtype=np.int16)
+        frames = frame_signal(audio, 10)
+        self.assertEqual(frames.shape, (2, 10))
+        self.assertTrue(np.shares_memory(frames, audio))
+        np.testing.assert_array_equal(frames[1], audio[10:20])
+
+    def test_frame_stats_match_float_reference(self):
+        """Test per-frame RMS, peak and clipping against a float64 computation"""
+        rng = np.random.default_rng(0)
+        audio = rng.integers(-32768, 32768, 480 * 20).astype(np.int16)
+        audio[5] = 32767
+        audio[500] = -32768
+        frames = frame_signal(audio, 480)
+        stats = frame_stats(frames)
+
+        as_float = frames.astype(np.float64)
+        np.testing.assert_allclose(stats["rms"], np.sqrt(np.mean(as_float ** 2, axis=1)) / 32768.0)
+        np.testing.assert_array_equal(stats["peak"], np.abs(as_float).max(axis=1))
+        np.testing.assert_array_equal(stats["clipped"], (np.abs(as_float) >= CLIP_THRESHOLD).sum(axis=1))
+        self.assertAlmostEqual(signal_rms(audio), np.sqrt(np.mean(audio.astype(float) ** 2)) / 32768.0)
+
+    def test_silence_never_reaches_vad(self):
+        """Test frames under the energy floor are unvoiced"""
+        flags = vad_flags(np.zeros(16000, dtype=np.int16), 16000, 160, 3)
+        self.assertEqual(len(flags), 100)
+        self.assertFalse(flags.any())
+
+    def test_onset_counts_voiced_frames(self):
+        """Test onset fires once enough voiced frames were seen, not necessarily consecutive"""
+        flags = np.array([0, 1, 0, 0, 1, 1], dtype=bool)
+        self.assertEqual(onset_frame(flags, 2), 4)
+        self.assertEqual(onset_frame(flags, 4), -1)
+        self.assertEqual(onset_frame(np.zeros(0, dtype=bool), 2), -1)
+
+    def test_voiced_segments_match_state_machine(self):
+        """Test vectorized hysteresis against a frame-by-frame loop"""
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            flags = rng.random(int(rng.integers(0, 80))) < rng.random()
+            start, end = int(rng.integers(1, 5)), int(rng.integers(1, 8))
+            self.assertEqual(voiced_segments(flags, start, end), _reference_segments(flags, start, end))
+
+    def test_noise_spectrum_finds_hum_and_dc(self):
+        """Test 50/60 Hz hum and DC offset are told apart from plain noise"""
+        rng = np.random.default_rng(2)
+        for samplerate in (16000, 44100, 48000):
+            t = np.arange(samplerate) / samplerate
+            noise = rng.normal(0, 100, samplerate)
+            clean = noise_spectrum(noise.astype(np.int16), samplerate)
+            self.assertIsNone(clean["hum_hz"])
+            self.assertFalse(clean["dc_offset_detected"])
+            self.assertAlmostEqual(clean["noise_floor_dbfs"], 20 * np.log10(100 / 32768), delta=1.0)
+
+            for mains in (50.0, 60.0):
+                hum = noise + 300 * np.sin(2 * np.pi * mains * t) + 1000
+                result = noise_spectrum(hum.astype(np.int16), samplerate)
+                self.assertEqual(result["hum_hz"], mains)
+                self.assertTrue(result["dc_offset_detected"])
+                self.assertAlmostEqual(result["dc_offset"], 1000 / 32768, places=3)
+
+if __name__ == "__main__":
+    unittest.main()
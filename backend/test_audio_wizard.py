@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from capture_backends import ReplayBackend
+from synthetic_audio import mix, speech_like, tone, white_noise
+
+
+class _TrackingBackend:
+    """ReplayBackend wrapper that records stream opens/closes and can fail one device"""
+
+    def __init__(self, backend: ReplayBackend, fail_device=None):
+        self.backend = backend
+        self.fail_device = fail_device
+        self.open = 0
+        self.max_open = 0
+        self.closed = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def input_stream(self, device, samplerate, blocksize, callback=None):
+        if callback is not None and device == self.fail_device:
+            raise RuntimeError(f"device {device} unplugged")
+        stream = self.backend.input_stream(device, samplerate, blocksize, callback)
+        if callback is None:
+            return stream
+        tracker = self
+
+        class Tracked:
+            def __enter__(self):
+                stream.__enter__()
+                with tracker._lock:
+                    tracker.open += 1
+                    tracker.max_open = max(tracker.max_open, tracker.open)
+                return self
+
+            def __exit__(self, *exc):
+                try:
+                    return stream.__exit__(*exc)
+                finally:
+                    with tracker._lock:
+                        tracker.open -= 1
+                        tracker.closed.append(device)
+
+        return Tracked()
+
+
+class TestConcurrentCapture(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.old_home = os.environ.get("ZANDALEE_HOME")
+        os.environ["ZANDALEE_HOME"] = self.home
+        from audio_wizard import AudioWizard, WizardCancelled
+        self.AudioWizard = AudioWizard
+        self.WizardCancelled = WizardCancelled
+
+    def tearDown(self):
+        if self.old_home is None:
+            os.environ.pop("ZANDALEE_HOME", None)
+        else:
+            os.environ["ZANDALEE_HOME"] = self.old_home
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def _signals(self, names):
+        specs = {
+            "Clean Mic": (16000, 0.0, 1),
+            "Humming Mic": (44100, 400.0, 2),
+            "Quiet Mic": (48000, 0.0, 3),
+        }
+        devices = {}
+        for name in names:
+            samplerate, hum, seed = specs[name]
+            noise = white_noise(samplerate, 1.0, seed=seed)
+            voice = speech_like(samplerate, 6.0, onset_sec=0.3, amplitude=6000.0 if seed != 3 else 1500.0)
+            if hum:
+                noise = mix(noise, tone(samplerate, 1.0, 50.0, hum))
+                voice = mix(voice, tone(samplerate, 6.0, 50.0, hum))
+            devices[name] = {"samplerate": samplerate, "takes": [noise, voice]}
+        return devices
+
+    def _wizard(self, names, fail_device=None):
+        backend = _TrackingBackend(ReplayBackend.from_signals(self._signals(names), speed=200), fail_device)
+        return self.AudioWizard(backend=backend), backend
+
+    def test_devices_record_at_the_same_time(self):
+        """Test every device's stream is open together and all are closed afterwards"""
+        wizard, backend = self._wizard(["Clean Mic", "Humming Mic", "Quiet Mic"])
+        captures = wizard.capture_many({0: 16000, 1: 44100, 2: 48000}, 1.0)
+
+        self.assertEqual(backend.max_open, 3)
+        self.assertEqual(backend.open, 0)
+        self.assertEqual(sorted(backend.closed), [0, 1, 2])
+        for device_id, samplerate in ((0, 16000), (1, 44100), (2, 48000)):
+            audio, had_errors, stats = captures[device_id]
+            self.assertFalse(had_errors)
+            self.assertEqual(len(audio), samplerate)
+
+    def test_failed_device_does_not_leak_streams(self):
+        """Test a device that fails to open is reported while the others still record and close"""
+        wizard, backend = self._wizard(["Clean Mic", "Humming Mic", "Quiet Mic"], fail_device=1)
+        captures = wizard.capture_many({0: 16000, 1: 44100, 2: 48000}, 1.0)
+
+        self.assertTrue(captures[1][1])
+        self.assertFalse(captures[0][1])
+        self.assertFalse(captures[2][1])
+        self.assertEqual(backend.open, 0)
+        self.assertEqual(sorted(backend.closed), [0, 2])
+
+    def test_cancel_closes_every_stream(self):
+        wizard, backend = self._wizard(["Clean Mic", "Humming Mic", "Quiet Mic"])
+        cancel = threading.Event()
+
+        def progress(event):
+            if event["type"] == "levels":
+                cancel.set()
+
+        with self.assertRaises(self.WizardCancelled):
+            wizard.capture_many({0: 16000, 1: 44100, 2: 48000}, 6.0, "voice", progress, cancel)
+        self.assertEqual(backend.max_open, 3)
+        self.assertEqual(backend.open, 0)
+        self.assertEqual(sorted(backend.closed), [0, 1, 2])
+
+    def test_results_do_not_depend_on_device_order(self):
+        """Test scoring devices in any order gives the same per-device results"""
+        names = ["Clean Mic", "Humming Mic", "Quiet Mic"]
+        keys = ("samplerate", "snr_db", "voiced_ratio", "start_delay_ms", "hum_hz", "score")
+
+        by_order = []
+        for reverse in (False, True):
+            wizard, backend = self._wizard(names)
+            devices = wizard.list_devices()
+            if reverse:
+                devices = devices[::-1]
+            results = wizard.test_devices_concurrently(devices, {"samplerates": [16000, 48000, 44100]})
+            self.assertEqual(backend.open, 0)
+            by_order.append({r["id"]: {k: r[k] for k in keys} for r in results})
+
+        self.assertEqual(len(by_order[0]), 3)
+        self.assertEqual(by_order[0], by_order[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest.mock import patch
+
+from benchmarks import bench_suite
+from benchmarks.bench_suite import (DURATIONS, REFERENCE_BASELINE, SAMPLERATES, SIGNALS, compare,
+                                    resolve_baseline, run_suite, same_machine)
+from synthetic_audio import speech_like, with_dropouts
+
+
+class TestBenchSuite(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.old_home = os.environ.get("ZANDALEE_HOME")
+        os.environ["ZANDALEE_HOME"] = self.home
+
+    def tearDown(self):
+        if self.old_home is None:
+            os.environ.pop("ZANDALEE_HOME", None)
+        else:
+            os.environ["ZANDALEE_HOME"] = self.old_home
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def test_dropouts_are_deterministic(self):
+        audio = speech_like(16000, 2.0)
+        a = with_dropouts(audio, 16000, count=2, gap_ms=20, seed=3)
+        b = with_dropouts(audio, 16000, count=2, gap_ms=20, seed=3)
+        np.testing.assert_array_equal(a, b)
+        self.assertGreaterEqual(int(np.count_nonzero((a == 0) & (audio != 0))), 300)
+
+    def test_suite_covers_every_combination(self):
+        """Test every stage/signal/samplerate/duration gets timing and allocation numbers"""
+        result = run_suite([16000, 44100], [0.5], ["speech", "clipped"],
+                           ["detect_voice_segments", "compute_device_score"], repeat=1, log=lambda line: None)
+        self.assertEqual(len(result["results"]), 2 * 1 * 2 * 2)
+        entry = result["results"]["detect_voice_segments/clipped/44100/0.5s"]
+        self.assertGreater(entry["best_ms"], 0)
+        self.assertGreater(entry["peak_kib"], 0)
+        self.assertIn("numpy", result["meta"])
+
+    def test_compare_flags_only_real_regressions(self):
+        baseline = {"results": {
+            "a": {"best_ms": 10.0, "peak_kib": 1000.0},
+            "b": {"best_ms": 0.01, "peak_kib": 1.0},
+        }}
+        current = {"results": {
+            "a": {"best_ms": 20.0, "peak_kib": 1050.0},
+            "b": {"best_ms": 0.05, "peak_kib": 2.0},
+            "new": {"best_ms": 1.0, "peak_kib": 1.0},
+        }}
+        regressions = compare(baseline, current, time_tolerance=0.5, alloc_tolerance=0.1)
+        self.assertEqual([(r["benchmark"], r["field"]) for r in regressions], [("a", "best_ms")])
+        self.assertEqual(regressions[0]["ratio"], 2.0)
+
+    def test_reference_gates_allocations_only(self):
+        """Test timings from another machine are ignored while allocation growth still fails"""
+        baseline = {"meta": {"machine": "x86_64", "platform": "Windows-10"},
+                    "results": {"a": {"best_ms": 1.0, "peak_kib": 1000.0}}}
+        current = {"meta": {"machine": "x86_64", "platform": "Linux"},
+                   "results": {"a": {"best_ms": 5.0, "peak_kib": 2000.0}}}
+        self.assertFalse(same_machine(baseline, current))
+        self.assertEqual([r["field"] for r in compare(baseline, current, time_tolerance=None)], ["peak_kib"])
+
+    def test_compare_falls_back_to_committed_reference(self):
+        """Test --compare uses the local baseline when saved and the committed reference otherwise"""
+        local = os.path.join(self.home, "baseline.json")
+        with patch.object(bench_suite, "DEFAULT_BASELINE", local):
+            self.assertEqual(resolve_baseline(None), REFERENCE_BASELINE)
+            open(local, "w").close()
+            self.assertEqual(resolve_baseline(None), local)
+            self.assertEqual(resolve_baseline("other.json"), "other.json")
+
+        with open(REFERENCE_BASELINE, encoding="utf-8") as f:
+            reference = json.load(f)
+        self.assertEqual(len(reference["results"]), len(SAMPLERATES) * len(DURATIONS) * len(SIGNALS) * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+
+import unittest
+import numpy as np
+from capture_buffer import CaptureBuffer
+
+class TestCaptureBuffer(unittest.TestCase):
+    def test_view_is_zero_copy(self):
+        """Test unwrapped captures come back as a view of the preallocated array"""
+        buffer = CaptureBuffer(100)
+        for i in range(5):
+            buffer.write(np.full(10, i, dtype=np.int16).tobytes())
+
+        view = buffer.view()
+        self.assertEqual(buffer.written, 50)
+        self.assertTrue(np.shares_memory(view, buffer._data))
+        np.testing.assert_array_equal(view, np.repeat(np.arange(5, dtype=np.int16), 10))
+
+    def test_ring_wraps_in_order(self):
+        """Test the oldest samples are overwritten once capacity is exceeded"""
+        buffer = CaptureBuffer(10)
+        data = np.arange(27, dtype=np.int16)
+        for start in range(0, 27, 3):
+            buffer.write(data[start:start + 3].tobytes())
+
+        np.testing.assert_array_equal(buffer.view(), data[-10:])
+        np.testing.assert_array_equal(buffer.latest(4), data[-4:])
+
+    def test_oversized_block_keeps_order(self):
+        """Test a block longer than the ring leaves its tail in order, whatever came before"""
+        for already in (0, 3, 10):
+            buffer = CaptureBuffer(10)
+            buffer.write(np.zeros(already, dtype=np.int16).tobytes())
+            data = np.arange(1, 24, dtype=np.int16)
+            buffer.write(data.tobytes())
+
+            np.testing.assert_array_equal(buffer.view(), data[-10:])
+            np.testing.assert_array_equal(buffer.latest(4), data[-4:])
+
+            buffer.write(np.array([99, 100], dtype=np.int16).tobytes())
+            np.testing.assert_array_equal(buffer.view(), np.concatenate((data[-8:], [99, 100])))
+
+    def test_first_channel_of_interleaved_input(self):
+        """Test multi-channel blocks keep only the first channel"""
+        buffer = CaptureBuffer(8, channels=2)
+        buffer.write(np.array([1, -1, 2, -2, 3, -3], dtype=np.int16).tobytes())
+        np.testing.assert_array_equal(buffer.view(), [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
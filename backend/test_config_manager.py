@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import config_manager
+from config_manager import ConfigManager
+
+
+class TestConfigManager(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.manager = ConfigManager(self.home)
+
+    def tearDown(self):
+        self.manager.flush()
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def _write(self, config_type, data):
+        with open(self.manager.config_files[config_type], "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_missing_file_does_not_write_defaults(self):
+        """Test reading a missing config returns defaults without creating the file"""
+        config = self.manager.load_config("ui")
+        self.assertEqual(config["theme"], "system")
+        self.assertFalse(os.path.exists(self.manager.config_files["ui"]))
+
+    def test_invalid_file_is_left_alone(self):
+        """Test an invalid file falls back to defaults but is not overwritten"""
+        self._write("ui", {"theme": "neon", "font_size": 14, "zoom_level": 1.0})
+        self.assertEqual(self.manager.load_config("ui")["theme"], "system")
+        with open(self.manager.config_files["ui"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["theme"], "neon")
+
+    def test_legacy_wizard_audio_file_is_migrated(self):
+        """Test the wizard's old flat audio.json reads as the unified schema"""
+        self._write("audio", {"device_id": 3, "device_name": "USB Mic", "samplerate": 48000, "vad_mode": 2})
+        config = self.manager.load_config("audio")
+        self.assertEqual(config["input_device"], {"id": 3, "name": "USB Mic"})
+        self.assertEqual((config["samplerate"], config["vad_mode"], config["volume"]), (48000, 2, 0.8))
+
+        self.assertTrue(self.manager.update_config("audio", {"input_device": {"id": 5, "name": "Headset"}})[0])
+        with open(self.manager.config_files["audio"], encoding="utf-8") as f:
+            saved = json.load(f)
+        self.assertEqual((saved["device_id"], saved["device_name"], saved["samplerate"]), (5, "Headset", 48000))
+
+    def test_cached_until_file_changes(self):
+        """Test repeat reads skip the disk and an external edit is picked up"""
+        self.assertTrue(self.manager.save_config("ui", {"theme": "dark", "font_size": 14, "zoom_level": 1.0})[0])
+        with patch("builtins.open", side_effect=AssertionError("read from disk")):
+            self.assertEqual(self.manager.get_all_configs()["ui"]["theme"], "dark")
+
+        self._write("ui", {"theme": "light", "font_size": 16, "zoom_level": 1.25})
+        self.assertEqual(self.manager.load_config("ui")["theme"], "light")
+
+    def test_returned_config_is_a_copy(self):
+        config = self.manager.load_config("ui")
+        config["panels"]["chat"] = False
+        self.assertTrue(self.manager.load_config("ui")["panels"]["chat"])
+
+    def test_atomic_write_leaves_no_temp_files(self):
+        self.manager.save_config("llm", {"provider": "ollama", "api_key": "", "model": "llama3"})
+        self.assertEqual(sorted(os.listdir(self.manager.config_dir)), ["llm.json"])
+
+    def test_failed_write_keeps_previous_file(self):
+        """Test a crash while writing leaves the old config intact"""
+        self.manager.save_config("ui", {"theme": "dark", "font_size": 14, "zoom_level": 1.0})
+        with patch("config_manager.json.dump", side_effect=OSError("disk full")):
+            ok, error = self.manager.save_config("ui", {"theme": "light", "font_size": 14, "zoom_level": 1.0})
+        self.assertFalse(ok)
+        self.assertIn("disk full", error)
+        with open(self.manager.config_files["ui"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["theme"], "dark")
+        self.assertEqual(os.listdir(self.manager.config_dir), ["ui.json"])
+
+    def test_debounced_saves_coalesce(self):
+        """Test rapid debounced saves are served at once and written once"""
+        writes = []
+        original = self.manager._write_atomic
+
+        def counting_write(path, data):
+            writes.append(data["volume"])
+            original(path, data)
+
+        self.manager._write_atomic = counting_write
+        with patch.object(config_manager, "SAVE_DEBOUNCE_SEC", 0.05):
+            for volume in (0.1, 0.2, 0.3, 0.4):
+                config = dict(self.manager.defaults["audio"], volume=volume)
+                self.assertTrue(self.manager.save_config("audio", config, debounce=True)[0])
+                self.assertEqual(self.manager.load_config("audio")["volume"], volume)
+            self.assertFalse(os.path.exists(self.manager.config_files["audio"]))
+            time.sleep(0.2)
+
+        self.assertEqual(writes, [0.4])
+        with open(self.manager.config_files["audio"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["volume"], 0.4)
+
+    def test_flush_writes_pending_saves(self):
+        config = dict(self.manager.defaults["audio"], volume=0.5)
+        self.manager.save_config("audio", config, debounce=True)
+        self.assertTrue(self.manager.flush())
+        with open(self.manager.config_files["audio"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["volume"], 0.5)
+
+    def test_save_notifies_typed_diff(self):
+        """Test subscribers get only the keys that changed, with old and new values"""
+        changes = []
+        self.manager.subscribe(changes.append)
+        self.manager.update_config("audio", {"vad_mode": 3, "volume": 0.8})
+        self.manager.update_config("audio", {"vad_mode": 3})
+
+        self.assertEqual(len(changes), 1)
+        change = changes[0]
+        self.assertEqual((change.config_type, change.source), ("audio", "save"))
+        self.assertEqual(change.changed, {"vad_mode": (1, 3)})
+        self.assertTrue(change.touches("vad_mode", "samplerate"))
+        self.assertFalse(change.touches("input_device"))
+
+    def test_external_edit_notifies(self):
+        """Test a file edited on disk is reported once, by the watcher's next check"""
+        self.manager.save_config("ui", {"theme": "dark", "font_size": 14, "zoom_level": 1.0})
+        changes = []
+        self.manager.subscribe(changes.append)
+        self._write("ui", {"theme": "light", "font_size": 14, "zoom_level": 1.0})
+        self.manager.check_for_changes()
+        self.manager.check_for_changes()
+
+        self.assertEqual([(c.source, c.changed) for c in changes], [("file", {"theme": ("dark", "light")})])
+
+    def test_watcher_thread(self):
+        changes = []
+        self.manager.subscribe(changes.append)
+        self.manager.start_watching(interval=0.02)
+        try:
+            self._write("avatar", dict(self.manager.defaults["avatar"], style="cartoon"))
+            deadline = time.time() + 2
+            while not changes and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            self.manager.stop_watching()
+        self.assertEqual(changes[0].changed, {"style": ("realistic", "cartoon")})
+
+    def test_failing_subscriber_does_not_block_save(self):
+        self.manager.subscribe(lambda change: 1 / 0)
+        self.assertTrue(self.manager.update_config("audio", {"volume": 0.5})[0])
+        self.assertEqual(self.manager.load_config("audio")["volume"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest import mock
+
+import device_cache
+from device_cache import DeviceCapabilityCache, device_fingerprint, device_list_signature
+from capture_backends import ReplayBackend
+
+class CountingReplayBackend(ReplayBackend):
+    """Replay backend that records every stream it opens"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = []
+
+    def input_stream(self, device, samplerate, blocksize, callback=None):
+        self.opened.append((device, samplerate))
+        return super().input_stream(device, samplerate, blocksize, callback)
+
+class TestDeviceCapabilityCache(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.path = os.path.join(self.home, "device_cache.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def test_fingerprint_ignores_index_and_whitespace(self):
+        """Test fingerprints depend only on name, host API and channel counts"""
+        a = device_fingerprint("USB Mic ", "MME", 1, 0)
+        self.assertEqual(a, device_fingerprint("USB Mic", "MME", 1, 0))
+        self.assertNotEqual(a, device_fingerprint("USB Mic", "WASAPI", 1, 0))
+        self.assertNotEqual(a, device_fingerprint("USB Mic", "MME", 2, 0))
+
+    def test_persists_until_device_list_changes(self):
+        """Test results survive a reload and are dropped when the signature changes"""
+        cache = DeviceCapabilityCache(self.path)
+        cache.validate(device_list_signature(["a", "b"]))
+        cache.store("a", "Mic A", 48000, True)
+
+        reloaded = DeviceCapabilityCache(self.path)
+        self.assertTrue(reloaded.validate(device_list_signature(["a", "b"])))
+        self.assertTrue(reloaded.lookup("a", 48000))
+        self.assertIsNone(reloaded.lookup("a", 16000))
+
+        self.assertFalse(reloaded.validate(device_list_signature(["a"])))
+        self.assertIsNone(reloaded.lookup("a", 48000))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["devices"], {})
+
+    def test_failed_probes_expire(self):
+        """Test a failed probe is retried after the negative TTL"""
+        cache = DeviceCapabilityCache(self.path)
+        cache.store("a", "Mic A", 16000, False)
+        self.assertIs(cache.lookup("a", 16000), False)
+        later = cache._devices["a"]["samplerates"]["16000"]["probed_at"] + device_cache.NEGATIVE_TTL_SEC + 1
+        with mock.patch.object(device_cache.time, "time", return_value=later):
+            self.assertIsNone(cache.lookup("a", 16000))
+
+    def test_wizard_probes_each_rate_once(self):
+        """Test repeat probes, even from a new AudioWizard, do not open streams"""
+        with mock.patch.dict(os.environ, {"ZANDALEE_HOME": self.home}):
+            from audio_wizard import AudioWizard
+            backend = CountingReplayBackend.from_signals({
+                "Mic A": {"samplerate": 44100, "takes": []},
+                "Mic B": {"samplerate": 16000, "takes": []},
+            })
+            wizard = AudioWizard(backend=backend)
+            self.assertEqual(wizard.test_device_samplerates(0), 44100)
+            self.assertEqual(wizard.test_device_samplerates(1), 16000)
+            self.assertEqual(backend.opened, [(0, 16000), (0, 48000), (0, 44100), (1, 16000)])
+
+            backend.opened.clear()
+            again = AudioWizard(backend=backend)
+            self.assertEqual(again.test_device_samplerates(0), 44100)
+            self.assertEqual(again.test_device_samplerates(1), 16000)
+            self.assertEqual(backend.opened, [])
+
+            # Unplugging a device invalidates everything
+            backend.devices.pop(1)
+            again.list_devices(refresh=True)
+            self.assertEqual(again.test_device_samplerates(0), 44100)
+            self.assertEqual(backend.opened, [(0, 16000), (0, 48000), (0, 44100)])
+
+    def test_refresh_skips_rescan_while_streams_are_open(self):
+        """Test a refresh never re-initializes the backend under an open stream"""
+        with mock.patch.dict(os.environ, {"ZANDALEE_HOME": self.home}):
+            from audio_wizard import AudioWizard
+            backend = ReplayBackend.from_signals({
+                "Mic A": {"samplerate": 16000, "takes": [np.zeros(16000, dtype=np.int16)]},
+                "Mic B": {"samplerate": 16000, "takes": []},
+            }, speed=1)
+            wizard = AudioWizard(backend=backend)
+            self.assertEqual(len(wizard.list_devices()), 2)
+
+            stream = backend.input_stream(0, 16000, 160, lambda *args: None)
+            stream.__enter__()
+            try:
+                backend.devices.pop(1)
+                self.assertEqual([d["name"] for d in wizard.list_devices(refresh=True)], ["Mic A", "Mic B"])
+                self.assertEqual((backend.rescans, backend.streams.open), (0, 1))
+            finally:
+                stream.__exit__(None, None, None)
+
+            self.assertEqual(backend.streams.open, 0)
+            self.assertEqual([d["name"] for d in wizard.list_devices(refresh=True)], ["Mic A"])
+            self.assertEqual(backend.rescans, 1)
+
+            # A stream that fails to open is not counted
+            with self.assertRaises(RuntimeError):
+                backend.input_stream(0, 48000, 480, lambda *args: None)
+            self.assertEqual(backend.streams.open, 0)
+
+    def test_refresh_in_one_worker_rescans_the_others(self):
+        """Test a refresh in one worker makes the other workers re-scan on their next listing"""
+        with mock.patch.dict(os.environ, {"ZANDALEE_HOME": self.home}):
+            from audio_wizard import AudioWizard
+            marker = os.path.join(self.home, "run", "devices.rescan")
+            signals = {"Mic A": {"samplerate": 16000, "takes": []}, "Mic B": {"samplerate": 16000, "takes": []}}
+            first = AudioWizard(backend=ReplayBackend.from_signals(signals), rescan_marker=marker)
+            second = AudioWizard(backend=ReplayBackend.from_signals(signals), rescan_marker=marker)
+            self.assertEqual(len(first.list_devices()), 2)
+            self.assertEqual(len(second.list_devices()), 2)
+
+            # Mic B is unplugged; each worker's host audio system only sees it after a re-scan
+            for wizard in (first, second):
+                wizard.backend.devices.pop(1)
+            self.assertEqual(len(second.list_devices()), 2)
+            self.assertEqual(len(first.list_devices(refresh=True)), 1)
+            self.assertEqual(len(second.list_devices()), 1)
+            self.assertEqual(second.list_devices(), first.list_devices())
+            self.assertEqual((first.backend.rescans, second.backend.rescans), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
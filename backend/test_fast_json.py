@@ -0,0 +1,131 @@
+import os
+import json
+import asyncio
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from fast_json import FastJSONResponse, NDJSONResponse, dict_factory, dumps, ndjson_chunks
+
+
+class TestFastJSON(unittest.TestCase):
+    def test_matches_stdlib_json(self):
+        content = {"ok": True, "items": [{"id": "a", "text": "héllo ✓", "n": 3, "x": 0.25, "none": None}]}
+        self.assertEqual(json.loads(FastJSONResponse(content).body), content)
+        self.assertEqual(json.loads(dumps({1: np.float32(0.5), "arr": np.arange(3)})), {"1": 0.5, "arr": [0, 1, 2]})
+
+    def test_ndjson_chunks(self):
+        rows = [{"i": i} for i in range(1000)]
+        chunks = list(ndjson_chunks(rows, chunk_bytes=1024))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) < 1024 + 32 for c in chunks))
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], rows)
+
+    def test_streaming_memory_does_not_grow_with_rows(self):
+        """Test peak memory of cursor -> NDJSON is flat in the number of rows"""
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home, ignore_errors=True)
+        path = os.path.join(home, "t.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE t (id INTEGER, text TEXT)")
+            conn.executemany("INSERT INTO t VALUES (?, ?)", ((i, "x" * 200) for i in range(40000)))
+
+        def peak(limit):
+            conn = sqlite3.connect(path)
+            conn.row_factory = dict_factory
+            cursor = conn.execute("SELECT * FROM t LIMIT ?", (limit,))
+            rows = (row for batch in iter(lambda: cursor.fetchmany(500), []) for row in batch)
+            tracemalloc.start()
+            try:
+                size = sum(len(chunk) for chunk in ndjson_chunks(rows))
+                return size, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+                conn.close()
+
+        small_size, small_peak = peak(4000)
+        large_size, large_peak = peak(40000)
+        self.assertGreater(large_size, 9 * small_size)
+        self.assertLess(large_peak, small_peak * 1.5 + 64 * 1024)
+
+    def test_dropped_client_closes_rows(self):
+        """Test a disconnect mid-stream closes the row generator (and so its connection) at once"""
+        for spec_version in ("2.4", "2.0"):
+            state = {"sent": 0, "closed": False}
+
+            def rows():
+                try:
+                    for i in range(100000):
+                        yield {"i": i, "text": "x" * 100}
+                finally:
+                    state["closed"] = True
+
+            async def send(message):
+                if message["type"] == "http.response.body":
+                    state["sent"] += 1
+                    if state["sent"] == 2 and spec_version == "2.4":
+                        raise OSError("client went away")
+                    await asyncio.sleep(0.001)
+
+            async def receive():
+                # Old servers report the disconnect through receive instead
+                while state["sent"] < 2:
+                    await asyncio.sleep(0.001)
+                return {"type": "http.disconnect"}
+
+            async def serve(scope):
+                response = NDJSONResponse(rows())
+                try:
+                    await response(scope, receive, send)
+                except Exception:
+                    pass
+                # Checked while the response (and its generator) is still referenced
+                return state["closed"]
+
+            with self.subTest(spec_version=spec_version):
+                self.assertTrue(asyncio.run(serve({"type": "http", "asgi": {"spec_version": spec_version}})))
+                self.assertLess(state["sent"], 10)
+
+
+class TestListEndpoints(unittest.TestCase):
+    def setUp(self):
+        # Keep uploads and rows out of the real store
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home, ignore_errors=True)
+        env = patch.dict(os.environ, {"ZANDALEE_HOME": self.home})
+        env.start()
+        self.addCleanup(env.stop)
+        memory_manager = main.PhotoAwareMemoryManager()
+        self.addCleanup(memory_manager.photo_index.shutdown, wait=True)
+        for name, value in (("memory_manager", memory_manager), ("STORAGE_DIR", memory_manager.storage_dir)):
+            patcher = patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_list_endpoint_formats(self):
+        """Test list endpoints answer JSON by default and NDJSON on request"""
+        client = TestClient(main.app)
+        text = "fast json diary entry"
+        self.assertTrue(client.post("/diary/append", data={"text": text}).json()["ok"])
+
+        response = client.get("/diary/search", params={"q": text})
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.json()["items"][0]["text"], text)
+        self.assertIn("thumb_url", response.json()["items"][0])
+
+        response = client.get("/diary/search", params={"q": text, "format": "ndjson"})
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(rows[0]["text"], text)
+
+
+if __name__ == "__main__":
+    unittest.main()
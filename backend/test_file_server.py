@@ -0,0 +1,141 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+import main
+import file_server
+from file_server import (IMMUTABLE_CACHE_CONTROL, NO_STORE_CACHE_CONTROL, ByteBudgetCache, ImmutableStaticFiles,
+                         immutable_file_response, make_etag)
+
+SHA = "ab" * 32
+
+
+class TestFileServer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def _file(self, *parts, data=b"x" * 10):
+        path = os.path.join(self.temp_dir.name, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_thumbnails_do_not_share_the_original_etag(self):
+        """Test only originals get the content-hash ETag; each derivative gets its own"""
+        original = self._file("blobs", "ab", "ab", f"{SHA}.png")
+        thumb_256 = self._file("thumbs", "256", "blobs", "ab", "ab", f"{SHA}.webp", data=b"y" * 5)
+        thumb_512 = self._file("thumbs", "512", "blobs", "ab", "ab", f"{SHA}.webp", data=b"z" * 7)
+
+        etags = [make_etag(p, os.stat(p)) for p in (original, thumb_256, thumb_512)]
+        self.assertEqual(etags[0], f'"{SHA}"')
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_uncacheable_response_has_no_etag(self):
+        """Test a stand-in response is no-store, never 304 and ignores If-Range"""
+        path = self._file("blobs", "ab", "ab", f"{SHA}.png")
+        headers = Headers({"if-none-match": f'"{SHA}"', "range": "bytes=0-3", "if-range": f'"{SHA}"'})
+        response = asyncio.run(immutable_file_response(path, os.stat(path), headers, cacheable=False))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["cache-control"], NO_STORE_CACHE_CONTROL)
+        self.assertNotIn("etag", response.headers)
+        self.assertEqual(response.body, b"x" * 10)
+
+        cached = asyncio.run(immutable_file_response(path, os.stat(path), headers))
+        self.assertEqual(cached.status_code, 304)
+
+
+class TestFilesMount(unittest.TestCase):
+    """Requests through the app's /files mount, pointed at a temp directory"""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = temp_dir.name
+        mount = next(route for route in main.app.routes if getattr(route, "name", None) == "files")
+        for target, name, value in ((mount, "app", ImmutableStaticFiles(directory=self.root)),
+                                    (file_server, "file_cache", ByteBudgetCache())):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(main.app)
+        self.data = bytes(range(100))
+        self.url = f"/files/blobs/ab/ab/{SHA}.png"
+        self._write(f"blobs/ab/ab/{SHA}.png", self.data)
+
+    def _write(self, rel: str, data: bytes):
+        path = os.path.join(self.root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def test_range_returns_partial_content(self):
+        """Test a single byte range gets 206 with Content-Range, from memory and streamed from disk"""
+        response = self.client.get(self.url, headers={"Range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["content-range"], "bytes 10-19/100")
+        self.assertEqual(response.content, self.data[10:20])
+
+        suffix = self.client.get(self.url, headers={"Range": "bytes=-5"})
+        self.assertEqual((suffix.status_code, suffix.content), (206, self.data[-5:]))
+
+        large = os.urandom(file_server.MEMORY_CACHE_MAX_ITEM_BYTES + 1)
+        self._write("blobs/cd/cd/large.png", large)
+        streamed = self.client.get("/files/blobs/cd/cd/large.png", headers={"Range": "bytes=100000-"})
+        self.assertEqual(streamed.status_code, 206)
+        self.assertEqual(streamed.content, large[100000:])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={"Range": "bytes=200-300"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["content-range"], "bytes */100")
+
+    def test_if_range_with_stale_etag_sends_whole_file(self):
+        """Test a range is only honored while If-Range still matches the current ETag"""
+        stale = self.client.get(self.url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        self.assertEqual((stale.status_code, stale.content), (200, self.data))
+
+        fresh = self.client.get(self.url, headers={"Range": "bytes=0-9", "If-Range": f'"{SHA}"'})
+        self.assertEqual((fresh.status_code, fresh.content), (206, self.data[:10]))
+
+    def test_head(self):
+        response = self.client.head(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-length"], "100")
+        self.assertEqual(response.headers["etag"], f'"{SHA}"')
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.content, b"")
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url, headers={"If-None-Match": f'"other", "{SHA}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": '"other"'}).status_code, 200)
+
+    def test_memory_cache_evicts_least_recent_by_bytes(self):
+        """Test the hot-file cache stays within its byte budget, dropping the least recently used file"""
+        cache = ByteBudgetCache(max_bytes=250, max_item_bytes=150)
+        with patch.object(file_server, "file_cache", cache):
+            for name in ("a", "b", "c"):
+                self._write(f"avatars/{name}.png", bytes([ord(name)]) * 100)
+            self._write("avatars/big.png", b"x" * 151)
+
+            for name in ("a", "b", "a", "c", "big"):
+                self.assertEqual(self.client.get(f"/files/avatars/{name}.png").status_code, 200)
+            self.assertEqual(cache.stats(), {"items": 2, "bytes": 200, "hits": 1, "misses": 3})
+            cached = {os.path.basename(path) for path, _, _ in cache._items}
+            self.assertEqual(cached, {"a.png", "c.png"})
+
+            self.assertEqual(self.client.get("/files/avatars/b.png").content, b"b" * 100)
+            self.assertEqual(cache.stats()["misses"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
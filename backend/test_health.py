@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import health
+from lazy_init import LazySubsystem, StartupProfile
+
+
+class _Memory:
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+
+class _Voice:
+    def __init__(self, bridge_path, voice_py):
+        self.bridge_path = bridge_path
+        self.voice_py = voice_py
+        self.voice_active = False
+
+
+class _Wizard:
+    def __init__(self, devices, configured=None):
+        self.devices = devices
+        self.configured = configured
+
+    def list_devices(self):
+        return self.devices
+
+    def load_audio_config(self):
+        if self.configured is None:
+            return None
+        return {"input_device": {"id": 1, "name": self.configured}}
+
+
+class TestHealth(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.profile = StartupProfile()
+        self.bridge = os.path.join(self.home, "voice_client.py")
+        open(self.bridge, "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def _subsystem(self, name, instance, build=True):
+        subsystem = LazySubsystem(name, lambda: instance, self.profile)
+        if build:
+            subsystem.get()
+        return subsystem
+
+    def _collect(self, voice, wizard, warming_up=False, db_path=None):
+        memory = self._subsystem("memory_manager", _Memory(db_path or os.path.join(self.home, "mem.db")))
+        return health.collect_health([memory, voice, wizard], memory, voice, wizard, warming_up)
+
+    def test_all_checks_pass(self):
+        voice = self._subsystem("voice_core", _Voice(self.bridge, self.bridge))
+        wizard = self._subsystem("audio_wizard", _Wizard([{"name": "USB Mic"}], configured="USB Mic"))
+        result = self._collect(voice, wizard)
+        self.assertTrue(result["ok"])
+        self.assertTrue(result["ready"])
+        self.assertEqual(result["msg"], "ready")
+        self.assertEqual({name: c["status"] for name, c in result["checks"].items()},
+                         {"database": "ok", "voice_bridge": "ok", "audio_device": "ok"})
+        self.assertTrue(result["checks"]["audio_device"]["configured_present"])
+
+    def test_optional_failures_only_degrade(self):
+        """Test a missing voice stack or microphone leaves the backend ready but degraded"""
+        voice = self._subsystem("voice_core", _Voice(self.bridge, os.path.join(self.home, "missing.exe")))
+        wizard = self._subsystem("audio_wizard", _Wizard([{"name": "Webcam"}], configured="USB Mic"))
+        result = self._collect(voice, wizard)
+        self.assertTrue(result["ready"])
+        self.assertEqual(result["msg"], "ready (degraded: voice_bridge, audio_device)")
+        self.assertEqual(result["checks"]["voice_bridge"]["missing"], [os.path.join(self.home, "missing.exe")])
+        self.assertFalse(result["checks"]["audio_device"]["configured_present"])
+
+    def test_unbuilt_subsystems_are_starting_not_degraded(self):
+        """Test lazily deferred subsystems are not probed (and not built) by a health check"""
+        voice = self._subsystem("voice_core", _Voice(self.bridge, self.bridge), build=False)
+        wizard = self._subsystem("audio_wizard", _Wizard([]), build=False)
+        result = self._collect(voice, wizard)
+        self.assertTrue(result["ready"])
+        self.assertEqual(result["msg"], "ready")
+        self.assertEqual(result["checks"]["audio_device"]["status"], health.STARTING)
+        self.assertFalse(wizard.initialized)
+
+    def test_not_ready_while_warming_up(self):
+        voice = self._subsystem("voice_core", _Voice(self.bridge, self.bridge))
+        wizard = self._subsystem("audio_wizard", _Wizard([]), build=False)
+        result = self._collect(voice, wizard, warming_up=True)
+        self.assertFalse(result["ready"])
+        self.assertEqual(result["msg"], "starting: audio_wizard")
+
+    def test_database_failure_is_not_ready(self):
+        voice = self._subsystem("voice_core", _Voice(self.bridge, self.bridge))
+        wizard = self._subsystem("audio_wizard", _Wizard([{"name": "USB Mic"}]))
+        result = self._collect(voice, wizard, db_path=os.path.join(self.home, "no", "such", "mem.db"))
+        self.assertTrue(result["ok"])
+        self.assertFalse(result["ready"])
+        self.assertEqual(result["checks"]["database"]["status"], health.ERROR)
+        self.assertEqual(result["msg"], "not ready: database")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import instrumentation
+from instrumentation import (InstrumentationMiddleware, LatencyHistogram, RequestIdFilter, connect_timed,
+                             request_id_var)
+from sampling_profiler import SamplingProfiler
+
+
+def _spin_in_marker_function(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.route_latency.reset()
+        instrumentation.query_latency.reset()
+        instrumentation.slow_queries.clear()
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in [0.5] * 90 + [40] * 9 + [20000]:
+            histogram.observe(ms)
+        snapshot = histogram.snapshot()
+        self.assertEqual((snapshot["count"], snapshot["p50_ms"], snapshot["p95_ms"]), (100, 1, 50))
+        self.assertEqual(snapshot["p99_ms"], 50)
+        self.assertEqual(histogram.percentile(100), 20000)
+        self.assertEqual(snapshot["buckets"]["overflow"], 1)
+
+    def test_middleware_records_route_templates_and_request_ids(self):
+        """Test latency is keyed by route template and the request ID reaches handler code"""
+        app = FastAPI()
+        app.add_middleware(InstrumentationMiddleware)
+        seen = []
+
+        @app.get("/memory/{memory_id}")
+        async def get_memory(memory_id: str):
+            seen.append(request_id_var.get())
+            return {"id": memory_id}
+
+        client = TestClient(app)
+        client.get("/memory/a")
+        response = client.get("/memory/b", headers={"X-Request-ID": "req-123"})
+        client.get("/nope")
+
+        self.assertEqual(response.headers["x-request-id"], "req-123")
+        self.assertEqual(seen[1], "req-123")
+        self.assertEqual(len(seen[0]), 12)
+        routes = instrumentation.route_latency.snapshot()
+        self.assertEqual(routes["GET /memory/{memory_id}"]["count"], 2)
+        self.assertEqual(routes["GET <unmatched>"]["count"], 1)
+        self.assertEqual(request_id_var.get(), "-")
+
+    def test_log_records_carry_request_id(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+        token = request_id_var.set("abc")
+        try:
+            RequestIdFilter().filter(record)
+        finally:
+            request_id_var.reset(token)
+        self.assertEqual(record.request_id, "abc")
+
+    def test_slow_queries_are_logged_with_plan(self):
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home, ignore_errors=True)
+        with patch.object(instrumentation, "SLOW_QUERY_MS", 0.0):
+            with connect_timed(os.path.join(home, "t.db")) as conn:
+                conn.execute("CREATE TABLE memories (id TEXT PRIMARY KEY, text TEXT)")
+                conn.executemany("INSERT INTO memories VALUES (?, ?)", [("1", "a"), ("2", "b")])
+                cursor = conn.cursor()
+                cursor.execute("SELECT   text FROM memories\n WHERE id = ?", ("1",))
+                self.assertEqual(cursor.fetchall(), [("a",)])
+
+        queries = instrumentation.query_latency.snapshot()
+        self.assertEqual(queries["SELECT text FROM memories WHERE id = ?"]["count"], 1)
+        select = [q for q in instrumentation.slow_queries if q["sql"].startswith("SELECT")][0]
+        self.assertTrue(any("memories" in step for step in select["plan"]))
+
+    def test_profiler_collapsed_stacks(self):
+        """Test a busy thread's function shows up in flamegraph-style collapsed output"""
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin_in_marker_function, args=(stop,), name="busy")
+        worker.start()
+        try:
+            collapsed = SamplingProfiler(interval=0.002).run(0.2)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = [line for line in collapsed.splitlines() if "_spin_in_marker_function" in line]
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertTrue(stack.startswith("busy;"))
+        self.assertGreater(int(count), 0)
+
+    def test_one_profile_at_a_time(self):
+        first = SamplingProfiler()
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault("first", first.run(0.3)))
+        thread.start()
+        time.sleep(0.05)
+        self.assertIsNone(SamplingProfiler().run(0.01))
+        thread.join()
+        self.assertIsNotNone(result["first"])
+
+
+if __name__ == "__main__":
+    unittest.main()
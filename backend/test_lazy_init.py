@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import unittest
+
+from lazy_init import LazySubsystem, StartupProfile
+
+
+class _Service:
+    def __init__(self):
+        self.value = 42
+
+    def ping(self):
+        return "pong"
+
+
+class TestLazyInit(unittest.TestCase):
+    def test_builds_once_on_first_use(self):
+        """Test concurrent first accesses share one build"""
+        calls = []
+
+        def factory():
+            calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            return _Service()
+
+        profile = StartupProfile()
+        service = LazySubsystem("service", factory, profile)
+        self.assertFalse(service.initialized)
+
+        threads = [threading.Thread(target=service.ping) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(service.value, 42)
+        status = service.status()
+        self.assertTrue(status["ready"])
+        self.assertGreaterEqual(status["init_ms"], 50)
+
+    def test_failed_build_is_reported_and_retried(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("device busy")
+            return _Service()
+
+        profile = StartupProfile()
+        service = LazySubsystem("service", factory, profile)
+        with self.assertRaises(RuntimeError):
+            service.get()
+        self.assertEqual(service.status()["error"], "device busy")
+        self.assertFalse(profile.report()["inits"][0]["ok"])
+
+        self.assertEqual(service.ping(), "pong")
+        self.assertIsNone(service.status()["error"])
+
+    def test_report_lists_imports_and_inits(self):
+        profile = StartupProfile()
+        with profile.timed("import", "module"):
+            pass
+        service = LazySubsystem("service", _Service, profile)
+        service.get()
+        report = profile.report([service])
+        self.assertEqual([s["name"] for s in report["imports"]], ["module"])
+        self.assertEqual([s["name"] for s in report["inits"]], ["service"])
+        self.assertTrue(report["subsystems"]["service"]["ready"])
+        self.assertIn("service", profile.format([service]))
+
+    def test_importing_main_defers_audio_stack(self):
+        """Test importing the app builds no subsystem and does not import numpy/scipy"""
+        code = (
+            "import sys, main\n"
+            "assert 'audio_wizard' not in sys.modules, 'audio_wizard imported'\n"
+            "assert 'scipy' not in sys.modules, 'scipy imported'\n"
+            "assert not any(s.initialized for s in main.SUBSYSTEMS)\n"
+        )
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, ZANDALEE_HOME=home)
+            result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from capture_backends import ReplayBackend
+from synthetic_audio import tone
+
+class TestLevelMonitor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {"ZANDALEE_HOME": self.home})
+        self.env.start()
+        from audio_wizard import AudioWizard
+        from level_monitor import LevelMonitor
+        # A full-scale-ish 440 Hz tone with a clipped stretch at the start
+        audio = tone(16000, 30.0, 440.0, 16384)
+        audio[:160] = 32767
+        quiet = tone(16000, 30.0, 440.0, 1000)
+        backend = ReplayBackend.from_signals({
+            "Mic": {"samplerate": 16000, "takes": [audio] * 4},
+            "Quiet Mic": {"samplerate": 16000, "takes": [quiet] * 4},
+        }, speed=1)
+        self.wizard = AudioWizard(backend=backend)
+        self.monitor = LevelMonitor(self.wizard)
+        self.wizard.config_manager.subscribe(self.monitor.on_config_change)
+
+    async def asyncTearDown(self):
+        await self.monitor.stop()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    async def test_reports_missing_config(self):
+        """Test subscribers are told when no device has been configured"""
+        queue = await self.monitor.subscribe()
+        frame = await asyncio.wait_for(queue.get(), 1)
+        self.assertEqual(frame, {"type": "vu_error", "error": "no_audio_config"})
+        self.assertFalse(self.monitor.running)
+
+    async def test_levels_at_ui_rate_and_pause(self):
+        """Test frames carry the tone level at ~30 Hz and the stream closes with the last subscriber"""
+        self.assertTrue(self.wizard.use_device(0)["ok"])
+        queue = await self.monitor.subscribe()
+        self.assertTrue(self.monitor.running)
+
+        first = await asyncio.wait_for(queue.get(), 1)
+        self.assertGreater(first["data"]["clipped"], 0)
+
+        frames = [await asyncio.wait_for(queue.get(), 1) for _ in range(6)]
+        data = frames[-1]["data"]
+        self.assertAlmostEqual(data["rms"], 0.5 / np.sqrt(2), places=2)
+        self.assertAlmostEqual(data["peak"], 0.5, places=2)
+        self.assertEqual(data["clipped"], 0)
+        interval = (frames[-1]["data"]["ts"] - frames[0]["data"]["ts"]) / 5
+        self.assertAlmostEqual(interval, 1 / 30, delta=0.015)
+
+        await self.monitor.unsubscribe(queue)
+        self.assertFalse(self.monitor.running)
+
+    async def test_follows_device_change(self):
+        """Test choosing another device reopens the running meter on it"""
+        self.assertTrue(self.wizard.use_device(0)["ok"])
+        queue = await self.monitor.subscribe()
+        await asyncio.wait_for(queue.get(), 1)
+
+        self.assertTrue((await asyncio.to_thread(self.wizard.use_device, 1))["ok"])
+        # Closing a replay stream flushes the rest of its take, so skip those frames
+        deadline = asyncio.get_running_loop().time() + 5
+        while asyncio.get_running_loop().time() < deadline:
+            frame = await asyncio.wait_for(queue.get(), 1)
+            if frame["data"]["device"] == 1:
+                break
+        self.assertEqual(frame["data"]["device"], 1)
+        self.assertLess(frame["data"]["peak"], 0.05)
+
+        await self.monitor.unsubscribe(queue)
+
+    async def test_paused_while_wizard_job_runs(self):
+        """Test a wizard job closes the meter's stream for its whole run and reopens it afterwards"""
+        from wizard_jobs import DONE, WizardJobManager
+        self.assertTrue(self.wizard.use_device(0)["ok"])
+        queue = await self.monitor.subscribe()
+        await asyncio.wait_for(queue.get(), 1)
+
+        backend = self.wizard.backend
+        seen = {}
+
+        class StubWizard:
+            def run_wizard(inner, config, progress, cancel_event):
+                seen["running"] = self.monitor.running
+                seen["open_streams"] = backend.streams.open
+                return {"ok": True}
+
+        manager = WizardJobManager(StubWizard(), capture_guard=self.monitor.paused)
+        job = manager.get(manager.start({})["job_id"])
+        await job.task
+
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(seen, {"running": False, "open_streams": 0})
+        self.assertTrue(self.monitor.running)
+        self.assertEqual(backend.streams.open, 1)
+
+        # Subscribers arriving mid-pause are told why there are no levels
+        async with self.monitor.paused():
+            late = await self.monitor.subscribe()
+            frame = await asyncio.wait_for(late.get(), 1)
+            while frame["type"] == "vu":
+                frame = await asyncio.wait_for(late.get(), 1)
+            self.assertEqual(frame, {"type": "vu_error", "error": "paused"})
+        self.assertTrue(self.monitor.running)
+
+        await self.monitor.unsubscribe(late)
+        await self.monitor.unsubscribe(queue)
+
+if __name__ == "__main__":
+    unittest.main()
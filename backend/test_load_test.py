@@ -0,0 +1,44 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+
+from benchmarks.load_test import parse_mix, percentiles
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("search=6, diary=3,upload"), {"search": 6.0, "diary": 3.0, "upload": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("search=1,stats=2")
+
+    def test_percentiles(self):
+        result = percentiles([float(ms) for ms in range(1, 101)])
+        self.assertEqual((result["p50_ms"], result["p90_ms"], result["p99_ms"], result["max_ms"]), (51, 91, 100, 100))
+        self.assertIsNone(percentiles([])["p50_ms"])
+
+    def test_seed_and_drive_end_to_end(self):
+        """Test a small seeded run reports every endpoint in the mix, without errors"""
+        with tempfile.TemporaryDirectory() as home:
+            output = os.path.join(home, "report.json")
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.load_test", "--home", os.path.join(home, "z"),
+                 "--memories", "500", "--diary", "300", "--photos", "3", "--requests", "60",
+                 "--concurrency", "4", "--mix", "search=2,diary=2,diary_search=1,upload=1", "--output", output],
+                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=180)
+            self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+
+        self.assertEqual(report["seeding"]["totals"], {"memories": 500, "diary_entries": 300, "photos": 3})
+        load = report["load"]
+        self.assertEqual((load["total"]["count"], load["total"]["errors"]), (60, 0))
+        self.assertEqual(set(load["endpoints"]), {"GET /memory/search", "GET /diary/list",
+                                                  "GET /diary/search", "POST /files/upload"})
+        self.assertIn("GET /memory/search", report["server"]["routes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+
+import unittest
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from photo_store import PhotoStore
+from photo_gc import PhotoGarbageCollector
+
+def _png(n):
+    return b"\x89PNG\r\n\x1a\n" + bytes([n]) * 64
+
+class TestPhotoGarbageCollector(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.db_path = os.path.join(root, "mem.db")
+        self.store = PhotoStore(os.path.join(root, "storage"), self.db_path)
+        self.thumbs_dir = os.path.join(root, "storage", "thumbs")
+        with sqlite3.connect(self.db_path) as conn:
+            self.store.init_db(conn)
+            conn.execute("CREATE TABLE memories (id TEXT, image_path TEXT, retired INTEGER DEFAULT 0)")
+            conn.execute("CREATE TABLE diary (id TEXT, image_path TEXT)")
+            conn.execute("CREATE TABLE diary_entries (id TEXT, photo_url TEXT)")
+            conn.execute("CREATE TABLE avatars (id TEXT, photo_url TEXT)")
+        self.gc = PhotoGarbageCollector(self.db_path, self.store, {
+            "blobs": self.store.blobs_dir,
+            "thumbs": self.thumbs_dir
+        })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _age(self, path, seconds=7200):
+        old = time.time() - seconds
+        os.utime(path, (old, old))
+
+    def _add_thumb(self, relpath):
+        thumb = os.path.join(self.thumbs_dir, "256", os.path.splitext(relpath)[0] + ".webp")
+        os.makedirs(os.path.dirname(thumb), exist_ok=True)
+        with open(thumb, "wb") as f:
+            f.write(b"RIFF")
+        return thumb
+
+    def test_sweeps_unreferenced_and_keeps_referenced(self):
+        """Test only old, unreferenced photos and their thumbnails are deleted"""
+        kept = self.store.put(io.BytesIO(_png(1)))
+        orphan = self.store.put(io.BytesIO(_png(2)))
+        retired = self.store.put(io.BytesIO(_png(3)))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO avatars VALUES ('a', ?)", (kept["url"],))
+            conn.execute("INSERT INTO memories VALUES ('m', ?, 1)", (retired["path"],))
+            self.store.incref(conn, kept["url"])
+            self.store.incref(conn, retired["path"])
+            conn.commit()
+
+        orphan_thumb = self._add_thumb(orphan["path"])
+        kept_thumb = self._add_thumb(kept["path"])
+        for stored in (kept, orphan, retired):
+            self._age(self.store.abspath_for(stored["sha256"], stored["ext"]))
+        self._age(orphan_thumb)
+        self._age(kept_thumb)
+
+        stats = self.gc.run(grace_seconds=3600)
+
+        self.assertEqual(stats["deleted"], 3)
+        self.assertEqual(stats["deleted_derivatives"], 1)
+        self.assertGreater(stats["reclaimed_bytes"], 0)
+        self.assertTrue(os.path.exists(self.store.abspath_for(kept["sha256"], "png")))
+        self.assertTrue(os.path.exists(kept_thumb))
+        self.assertFalse(os.path.exists(self.store.abspath_for(orphan["sha256"], "png")))
+        self.assertFalse(os.path.exists(self.store.abspath_for(retired["sha256"], "png")))
+        self.assertFalse(os.path.exists(orphan_thumb))
+
+    def test_grace_period_and_dry_run(self):
+        """Test recent uploads survive and dry runs delete nothing"""
+        recent = self.store.put(io.BytesIO(_png(4)))
+        old = self.store.put(io.BytesIO(_png(5)))
+        self._age(self.store.abspath_for(old["sha256"], "png"))
+
+        stats = self.gc.run(grace_seconds=3600, dry_run=True)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(stats["kept_recent"], 1)
+        self.assertTrue(os.path.exists(self.store.abspath_for(old["sha256"], "png")))
+
+        self.gc.run(grace_seconds=3600)
+        self.assertTrue(os.path.exists(self.store.abspath_for(recent["sha256"], "png")))
+        self.assertFalse(os.path.exists(self.store.abspath_for(old["sha256"], "png")))
+
+    def test_reupload_of_old_orphan_survives_until_learned(self):
+        """Test upload -> gc -> learn keeps a deduplicated blob that was orphaned long ago"""
+        first = self.store.put(io.BytesIO(_png(6)))
+        path = self.store.abspath_for(first["sha256"], "png")
+        self._age(path, seconds=2 * 24 * 3600)
+
+        again = self.store.put(io.BytesIO(_png(6)))
+        self.assertTrue(again["deduplicated"])
+
+        stats = self.gc.run()
+        self.assertEqual(stats["deleted"], 0)
+        self.assertTrue(os.path.exists(path))
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO memories VALUES ('m', ?, 0)", (again["path"],))
+            self.assertTrue(self.store.incref(conn, again["path"]))
+            conn.commit()
+        self.gc.run(grace_seconds=0)
+        self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import Future
+
+from photo_index import BKTree, PhotoIndex, hamming, perceptual_hash, Image
+from photo_store import PhotoStore
+
+if Image is not None:
+    from PIL import ImageDraw, ImageFilter
+
+class TestBKTree(unittest.TestCase):
+    def test_matches_brute_force(self):
+        """Test BK-tree search returns exactly the brute-force neighbours"""
+        rng = random.Random(7)
+        hashes = [rng.getrandbits(64) for _ in range(500)]
+        # Add near-duplicates of a few hashes
+        for h in hashes[:20]:
+            hashes.append(h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)))
+
+        tree = BKTree()
+        for i, h in enumerate(hashes):
+            tree.add(h, str(i))
+
+        for query in hashes[:30]:
+            expected = sorted((hamming(query, h), str(i)) for i, h in enumerate(hashes) if hamming(query, h) <= 6)
+            self.assertEqual(tree.search(query, 6), expected)
+
+    def test_duplicate_hashes_share_node(self):
+        """Test identical hashes keep every key"""
+        tree = BKTree()
+        tree.add(42, "a")
+        tree.add(42, "b")
+        tree.add(42, "a")
+        self.assertEqual(tree.size, 2)
+        self.assertEqual(tree.search(42, 0), [(0, "a"), (0, "b")])
+
+class TestSharedIndex(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.db_path = os.path.join(temp_dir.name, "mem.db")
+        store = PhotoStore(temp_dir.name, self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            store.init_db(conn)
+            PhotoIndex(self.db_path).init_db(conn)
+
+    def _index(self, index: PhotoIndex, sha256: str, phash: int):
+        """Record a finished extraction the way the background worker does"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO blobs (sha256, ext, size, created_at) VALUES (?, 'png', 1, '')", (sha256,))
+        future = Future()
+        future.set_result({"width": 8, "height": 8, "taken_at": None, "phash": phash})
+        index._on_extracted(sha256, f"{sha256}.png", future)
+
+    def test_tree_follows_other_workers_writes(self):
+        """Test a worker's similarity tree picks up photos indexed by another worker"""
+        first, second = PhotoIndex(self.db_path, shared=True), PhotoIndex(self.db_path, shared=True)
+        self._index(first, "a", 0b1111)
+        self.assertEqual(second.similar("a"), [])
+
+        self._index(first, "b", 0b0111)
+        self.assertEqual([(r["sha256"], r["distance"]) for r in second.similar("a")], [("b", 1)])
+        self._index(second, "c", 0b0011)
+        self.assertEqual([r["sha256"] for r in first.similar("a")], ["b", "c"])
+
+@unittest.skipIf(Image is None, "Pillow not installed")
+class TestPerceptualHash(unittest.TestCase):
+    def _shapes(self, seed):
+        rng = random.Random(seed)
+        img = Image.new("RGB", (320, 240), (30, 30, 30))
+        draw = ImageDraw.Draw(img)
+        for _ in range(12):
+            x, y = rng.randrange(300), rng.randrange(220)
+            box = [x, y, x + rng.randrange(20, 120), y + rng.randrange(20, 120)]
+            draw.ellipse(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+        return img
+
+    def test_similar_images_are_close(self):
+        """Test rescaled/blurred copies hash close and different images far apart"""
+        original = self._shapes(3)
+        resized = original.resize((160, 120))
+        blurred = original.filter(ImageFilter.GaussianBlur(2))
+        other = self._shapes(4)
+
+        self.assertLessEqual(hamming(perceptual_hash(original), perceptual_hash(resized)), 4)
+        self.assertLessEqual(hamming(perceptual_hash(original), perceptual_hash(blurred)), 4)
+        self.assertGreater(hamming(perceptual_hash(original), perceptual_hash(other)), 10)
+
+if __name__ == '__main__':
+    unittest.main()
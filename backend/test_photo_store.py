@@ -0,0 +1,94 @@
+
+import unittest
+import io
+import os
+import sqlite3
+import tempfile
+import instrumentation
+from photo_store import PhotoStore
+from upload_pipeline import UploadError
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+class TestPhotoStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "mem.db")
+        self.store = PhotoStore(os.path.join(self.temp_dir.name, "storage"), self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            self.store.init_db(conn)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _refcount(self, sha256):
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def test_sharded_path(self):
+        """Test blobs are stored in a two-level sharded tree"""
+        stored = self.store.put(io.BytesIO(PNG_BYTES))
+        sha = stored["sha256"]
+        self.assertEqual(stored["path"], f"blobs/{sha[:2]}/{sha[2:4]}/{sha}.png")
+        self.assertTrue(os.path.exists(self.store.abspath_for(sha, "png")))
+        self.assertTrue(stored["url"].endswith("/files/" + stored["path"]))
+
+    def test_duplicate_upload_is_deduplicated(self):
+        """Test identical content is stored once"""
+        first = self.store.put(io.BytesIO(PNG_BYTES))
+        second = self.store.put(io.BytesIO(PNG_BYTES))
+        self.assertFalse(first["deduplicated"])
+        self.assertTrue(second["deduplicated"])
+        self.assertEqual(first["path"], second["path"])
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_queries_are_timed(self):
+        """Test blob-store queries show up in the query metrics"""
+        instrumentation.query_latency.reset()
+        self.store.put(io.BytesIO(PNG_BYTES))
+        self.assertIn("SELECT ext FROM blobs WHERE sha256 = ?", instrumentation.query_latency.snapshot())
+
+    def test_rejects_non_image(self):
+        """Test magic-byte validation"""
+        with self.assertRaises(UploadError):
+            self.store.put(io.BytesIO(b"GIF89a" + b"\x00" * 32))
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_reference_counting(self):
+        """Test dropping the last reference leaves the file for the garbage collector"""
+        stored = self.store.put(io.BytesIO(PNG_BYTES))
+        sha = stored["sha256"]
+
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertTrue(self.store.incref(conn, stored["path"]))
+            self.assertTrue(self.store.incref(conn, stored["url"]))
+            conn.commit()
+        self.assertEqual(self._refcount(sha), 2)
+
+        with sqlite3.connect(self.db_path) as conn:
+            self.store.decref(conn, sha)
+            conn.commit()
+        self.assertEqual(self._refcount(sha), 1)
+        self.assertTrue(os.path.exists(self.store.abspath_for(sha, "png")))
+
+        with sqlite3.connect(self.db_path) as conn:
+            self.store.decref(conn, stored["path"])
+            self.store.decref(conn, stored["path"])
+            conn.commit()
+        self.assertEqual(self._refcount(sha), 0)
+        self.assertTrue(os.path.exists(self.store.abspath_for(sha, "png")))
+
+        # A deduplicated upload onto the orphaned blob still has its file
+        again = self.store.put(io.BytesIO(PNG_BYTES))
+        self.assertTrue(again["deduplicated"])
+        self.assertTrue(os.path.exists(self.store.abspath_for(sha, "png")))
+
+    def test_legacy_references_ignored(self):
+        """Test non content-addressed references are left alone"""
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertFalse(self.store.incref(conn, "photos/0b5c3a52-6a63-4b55-9d0e-6f2f8a3e1c11.png"))
+            self.assertFalse(self.store.decref(conn, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from capture_backends import ReplayBackend, read_wav, write_wav
+from synthetic_audio import mix, speech_like, tone, white_noise
+
+class TestReplayBackend(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.old_home = os.environ.get("ZANDALEE_HOME")
+        os.environ["ZANDALEE_HOME"] = self.home
+        from audio_wizard import AudioWizard
+        self.AudioWizard = AudioWizard
+
+    def tearDown(self):
+        if self.old_home is None:
+            os.environ.pop("ZANDALEE_HOME", None)
+        else:
+            os.environ["ZANDALEE_HOME"] = self.old_home
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def _devices(self):
+        hum = 400.0
+        return {
+            "Clean Mic": {"samplerate": 16000, "takes": [
+                white_noise(16000, 1.0, seed=1),
+                speech_like(16000, 6.0, onset_sec=0.3),
+            ]},
+            "Humming Mic": {"samplerate": 44100, "takes": [
+                mix(white_noise(44100, 1.0, seed=2), tone(44100, 1.0, 50.0, hum)),
+                mix(speech_like(44100, 6.0, onset_sec=0.3), tone(44100, 6.0, 50.0, hum)),
+            ]},
+        }
+
+    def test_wav_round_trip(self):
+        """Test WAV takes come back sample-identical"""
+        audio = white_noise(44100, 0.5, rms=3000)
+        path = os.path.join(self.home, "take.wav")
+        write_wav(path, audio, 44100)
+        loaded, samplerate = read_wav(path)
+        self.assertEqual(samplerate, 44100)
+        np.testing.assert_array_equal(loaded, audio)
+
+    def test_wizard_runs_offline(self):
+        """Test the full wizard scores replayed devices and picks the clean one"""
+        wizard = self.AudioWizard(backend=ReplayBackend.from_signals(self._devices(), speed=200))
+        result = wizard.run_wizard({})
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["chosen"]["name"], "Clean Mic")
+        by_name = {r["name"]: r for r in result["results"]}
+        self.assertEqual(by_name["Humming Mic"]["samplerate"], 44100)
+        self.assertEqual(by_name["Humming Mic"]["hum_hz"], 50.0)
+        self.assertGreater(by_name["Humming Mic"]["voiced_ratio"], 0.3)
+        self.assertIsNone(by_name["Clean Mic"]["hum_hz"])
+
+    def test_recorded_session_replays_identically(self):
+        """Test a recorded run replays to the same metrics"""
+        wizard = self.AudioWizard(backend=ReplayBackend.from_signals(self._devices(), speed=200))
+        session_dir = os.path.join(self.home, "session")
+        recorded = wizard.run_wizard({"record_session": session_dir})
+        self.assertEqual(recorded["session_dir"], session_dir)
+
+        with open(os.path.join(session_dir, "session.json")) as f:
+            session = json.load(f)
+        self.assertEqual([t["phase"] for t in session["devices"][0]["takes"]], ["noise", "voice"])
+
+        replay = self.AudioWizard(backend=ReplayBackend.from_session(session_dir, speed=200))
+        replayed = replay.run_wizard({})
+        keys = ("samplerate", "snr_db", "voiced_ratio", "start_delay_ms", "clipping_pct", "hum_hz", "score")
+        for a, b in zip(recorded["results"], replayed["results"]):
+            self.assertEqual({k: a[k] for k in keys}, {k: b[k] for k in keys})
+
+if __name__ == "__main__":
+    unittest.main()
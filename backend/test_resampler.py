@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from scipy.signal import upfirdn
+from resampler import ANALYSIS_SAMPLERATE, StreamingResampler, design_filter, to_analysis_rate
+
+class TestStreamingResampler(unittest.TestCase):
+    def _reference(self, resampler, audio, length):
+        taps = design_filter(resampler.up, resampler.down)
+        out = upfirdn(taps, audio.astype(np.float64), resampler.up, resampler.down)[:length]
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def test_chunked_matches_whole_signal(self):
+        """Test arbitrary chunking gives the same output as one-shot filtering"""
+        rng = np.random.default_rng(0)
+        for samplerate in (44100, 48000, 22050, 8000):
+            audio = rng.integers(-20000, 20000, samplerate).astype(np.int16)
+            resampler = StreamingResampler(samplerate)
+            chunks, start = [], 0
+            while start < len(audio):
+                size = int(rng.integers(0, 1500))
+                chunks.append(resampler.process(audio[start:start + size]))
+                start += size
+
+            out = np.concatenate(chunks)
+            self.assertEqual(len(out), ANALYSIS_SAMPLERATE)
+            np.testing.assert_array_equal(out, self._reference(resampler, audio, len(out)))
+
+    def test_tone_survives_and_alias_is_removed(self):
+        """Test in-band tones keep their level and out-of-band tones are filtered"""
+        t = np.arange(44100) / 44100
+        for freq, expect_pass in ((1000, True), (12000, False)):
+            tone = (10000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+            out, rate = to_analysis_rate(tone, 44100)
+            self.assertEqual(rate, ANALYSIS_SAMPLERATE)
+            rms = np.sqrt(np.mean(out[1000:].astype(float) ** 2))
+            if expect_pass:
+                self.assertAlmostEqual(rms, 10000 / np.sqrt(2), delta=100)
+            else:
+                self.assertLess(rms, 50)
+
+    def test_analysis_rate_is_passthrough(self):
+        """Test audio already at 16 kHz is returned untouched"""
+        audio = np.arange(160, dtype=np.int16)
+        out, rate = to_analysis_rate(audio, ANALYSIS_SAMPLERATE)
+        self.assertIs(out, audio)
+        self.assertEqual(rate, ANALYSIS_SAMPLERATE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from types import SimpleNamespace
+from stream_stats import StreamStats
+
+class _Flags:
+    """Stand-in for sounddevice.CallbackFlags"""
+    def __init__(self, overflow=False, underflow=False):
+        self.input_overflow = overflow
+        self.input_underflow = underflow
+
+    def __bool__(self):
+        return self.input_overflow or self.input_underflow
+
+class TestStreamStats(unittest.TestCase):
+    def test_counts_xruns_and_missing_blocks(self):
+        """Test status flags and gaps in the ADC timeline become dropouts"""
+        stats = StreamStats(16000, 160, 100)
+        adc = 1.0
+        for i in range(100):
+            adc += 0.01 if i != 40 else 0.03  # two blocks lost before callback 40
+            stats.record(SimpleNamespace(inputBufferAdcTime=adc),
+                         _Flags(overflow=i in (10, 20), underflow=i == 30))
+
+        summary = stats.summary()
+        self.assertEqual(summary["callbacks"], 100)
+        self.assertEqual(summary["overflows"], 2)
+        self.assertEqual(summary["underflows"], 1)
+        self.assertEqual(summary["late_callbacks"], 1)
+        self.assertEqual(summary["dropouts"], 4)
+
+    def test_no_gap_detection_without_adc_time(self):
+        """Test host APIs that report zero ADC time never count late callbacks"""
+        stats = StreamStats(48000, 480, 10)
+        for _ in range(20):  # more callbacks than preallocated
+            stats.record(SimpleNamespace(inputBufferAdcTime=0.0), _Flags())
+
+        summary = stats.summary()
+        self.assertEqual(summary["callbacks"], 20)
+        self.assertEqual(summary["late_callbacks"], 0)
+        self.assertEqual(summary["dropouts"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+import thumbnails
+from thumbnails import THUMB_WIDTHS, ThumbnailService
+
+
+class TestThumbnailService(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.service = ThumbnailService(self.temp_dir.name, max_workers=1)
+        self.addCleanup(self.service.shutdown)
+
+    def _image(self, relpath="blobs/aa/bb/photo.png", size=(1500, 1000)):
+        path = os.path.join(self.temp_dir.name, *relpath.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new("RGB", size, (200, 40, 40)).save(path)
+        return relpath
+
+    def test_width_snaps_to_fixed_sizes(self):
+        """Test requested sizes map to the smallest covering width, capped at the largest"""
+        cases = {1: 128, 128: 128, 129: 256, 256: 256, 300: 512, 512: 512, 700: 1024, 5000: 1024}
+        for size, width in cases.items():
+            self.assertEqual(ThumbnailService.nearest_width(size), width, size)
+
+    def test_generated_once_and_reused(self):
+        """Test the first request writes every width and later requests reuse the files"""
+        relpath = self._image()
+        path = asyncio.run(self.service.get(200, relpath))
+
+        self.assertEqual(path, self.service.derivative_path(256, relpath))
+        for width in THUMB_WIDTHS:
+            with Image.open(self.service.derivative_path(width, relpath)) as img:
+                self.assertEqual((img.format, img.width), ("WEBP", width))
+
+        mtime = os.stat(path).st_mtime_ns
+        with patch.object(self.service, "enqueue") as enqueue:
+            self.assertEqual(asyncio.run(self.service.get(256, relpath)), path)
+        enqueue.assert_not_called()
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertIsNone(self.service.enqueue(relpath))
+
+    def test_undecodable_image_falls_back(self):
+        """Test a file Pillow cannot read yields no derivative instead of an error"""
+        relpath = "blobs/cc/dd/broken.png"
+        path = os.path.join(self.temp_dir.name, *relpath.split("/"))
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\nnot really")
+
+        self.assertIsNone(asyncio.run(self.service.get(256, relpath)))
+        self.assertFalse(os.path.exists(self.service.derivative_path(256, relpath)))
+
+    def test_missing_pillow_falls_back(self):
+        relpath = self._image()
+        with patch.object(thumbnails, "Image", None):
+            self.assertFalse(self.service.available)
+            self.assertIsNone(self.service.enqueue(relpath))
+            self.assertIsNone(asyncio.run(self.service.get(256, relpath)))
+        self.assertIsNone(self.service._executor)
+
+    def test_paths_outside_the_mount_are_refused(self):
+        self._image()
+        self.assertIsNone(self.service.source_path("../outside.png"))
+        self.assertIsNone(self.service.source_path("thumbs/256/blobs/aa/bb/photo.webp"))
+
+    def test_shutdown_stops_the_pool(self):
+        """Test shutdown releases the worker pool and a later request starts a new one"""
+        relpath = self._image(size=(300, 200))
+        asyncio.run(self.service.get(128, relpath))
+        executor = self.service._executor
+        self.assertIsNotNone(executor)
+
+        self.service.shutdown()
+        self.assertIsNone(self.service._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+        other = self._image("blobs/ee/ff/other.png", size=(300, 200))
+        self.assertIsNotNone(asyncio.run(self.service.get(128, other)))
+
+
+if __name__ == "__main__":
+    unittest.main()
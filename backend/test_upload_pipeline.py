@@ -0,0 +1,169 @@
+import io
+import os
+import shutil
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+from upload_pipeline import MAX_UPLOAD_FILES, UploadError, UploadSizeLimitMiddleware, stream_upload
+
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+
+
+class _FailingReader(io.RawIOBase):
+    """Yields a few chunks, then fails like a dropped client connection"""
+
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+
+    def read(self, size=-1):
+        if self.chunks == 0:
+            raise ConnectionResetError("client went away")
+        self.chunks -= 1
+        return PNG_HEAD + b"\x00" * (size - len(PNG_HEAD))
+
+
+def _png(seed: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (8, 8), (seed, 0, 0)).save(out, format="PNG")
+    return out.getvalue()
+
+
+class TestStreamUpload(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.target = self.temp_dir.name
+
+    def test_size_cap(self):
+        """Test uploads up to the cap are kept and one byte more is rejected without leftovers"""
+        data = PNG_HEAD + b"\x00" * 1016
+        upload = stream_upload(io.BytesIO(data), self.target, max_bytes=1024, chunk_size=100)
+        self.assertEqual(upload["size"], 1024)
+        os.remove(upload["tmp_path"])
+
+        with self.assertRaises(UploadError):
+            stream_upload(io.BytesIO(data + b"\x00"), self.target, max_bytes=1024, chunk_size=100)
+        self.assertEqual(os.listdir(self.target), [])
+
+    def test_cap_stops_reading_early(self):
+        """Test the copy stops at the first chunk over the cap instead of draining the source"""
+        src = io.BytesIO(PNG_HEAD + b"\x00" * 10000)
+        with self.assertRaises(UploadError):
+            stream_upload(src, self.target, max_bytes=1000, chunk_size=256)
+        self.assertLessEqual(src.tell(), 1024 + 256)
+
+    def test_mid_stream_abort_removes_temp_file(self):
+        with self.assertRaises(ConnectionResetError):
+            stream_upload(_FailingReader(3), self.target, chunk_size=256)
+        self.assertEqual(os.listdir(self.target), [])
+
+
+class TestUploadEndpoint(unittest.TestCase):
+    def setUp(self):
+        # Keep uploads and rows out of the real store
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home, ignore_errors=True)
+        env = patch.dict(os.environ, {"ZANDALEE_HOME": self.home})
+        env.start()
+        self.addCleanup(env.stop)
+        memory_manager = main.PhotoAwareMemoryManager()
+        self.addCleanup(memory_manager.photo_index.shutdown, wait=True)
+        for name, value in (("memory_manager", memory_manager), ("STORAGE_DIR", memory_manager.storage_dir)):
+            patcher = patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_concurrent_multi_file_upload(self):
+        """Test several files in one request are each stored, with per-file errors"""
+        client = TestClient(main.app)
+        files = [("file", (f"p{i}.png", _png(i), "image/png")) for i in range(3)]
+        files.append(("file", ("notes.png", b"not an image", "image/png")))
+        body = client.post("/files/upload", files=files).json()
+
+        self.assertFalse(body["ok"])
+        self.assertEqual([item["ok"] for item in body["items"]], [True, True, True, False])
+        self.assertEqual(len({item["sha256"] for item in body["items"][:3]}), 3)
+        tmp_dir = main.memory_manager.photo_store.tmp_dir
+        self.assertEqual([name for name in os.listdir(tmp_dir) if name.endswith(".part")], [])
+
+    def test_avatar_upload_size_capped(self):
+        """Test /avatar/upload gets the single-file body limit before anything is read"""
+        sent = []
+
+        async def receive():
+            raise AssertionError("body must not be read")
+
+        async def send(message):
+            sent.append(message)
+
+        declared = str(main.MAX_UPLOAD_BYTES + main.MULTIPART_OVERHEAD_BYTES + 1).encode()
+        scope = {"type": "http", "method": "POST", "path": "/avatar/upload", "query_string": b"",
+                 "headers": [(b"content-length", declared)]}
+        asyncio.run(main.app(scope, receive, send))
+        self.assertEqual(sent[0]["status"], 413)
+
+    def test_too_many_files(self):
+        client = TestClient(main.app)
+        files = [("file", (f"p{i}.png", _png(i), "image/png")) for i in range(MAX_UPLOAD_FILES + 1)]
+        self.assertEqual(client.post("/files/upload", files=files).status_code, 413)
+
+
+class TestUploadSizeLimit(unittest.TestCase):
+    def setUp(self):
+        self.parsed = []
+        app = FastAPI()
+
+        @app.post("/files/upload")
+        async def upload(file: UploadFile = File(...)):
+            self.parsed.append(file.filename)
+            return {"ok": True}
+
+        self.app = UploadSizeLimitMiddleware(app, max_body_bytes=4096)
+        self.client = TestClient(self.app)
+
+    def test_declared_length_rejected_before_reading(self):
+        """Test a Content-Length over the limit gets 413 without the body being read"""
+        sent = []
+
+        async def receive():
+            raise AssertionError("body must not be read")
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/files/upload",
+                 "headers": [(b"content-length", b"999999")]}
+        asyncio.run(self.app(scope, receive, send))
+        self.assertEqual(sent[0]["status"], 413)
+        self.assertEqual(self.parsed, [])
+
+    def test_streamed_body_cut_off_at_limit(self):
+        """Test a body without Content-Length fails with 413 once it crosses the limit"""
+        boundary = "x" * 16
+        payload = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+                   f"Content-Type: image/png\r\n\r\n").encode() + b"\x00" * 10000 + f"\r\n--{boundary}--\r\n".encode()
+
+        def chunks():
+            for i in range(0, len(payload), 1000):
+                yield payload[i:i + 1000]
+
+        response = self.client.post("/files/upload", content=chunks(),
+                                    headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.parsed, [])
+
+    def test_small_upload_passes(self):
+        response = self.client.post("/files/upload", files={"file": ("a.png", _png(1), "image/png")})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.parsed, ["a.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
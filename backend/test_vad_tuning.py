@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from synthetic_audio import mix, speech_like, white_noise
+from vad_tuning import SILENCE_HOLD_MS, START_VOICED_FRAMES, VAD_MODES, evaluate_setting, tune_vad
+
+SR = 16000
+
+
+def _voice_take(seconds=6.0, onset_sec=0.3):
+    return mix(white_noise(SR, seconds, seed=3), speech_like(SR, seconds, onset_sec=onset_sec))
+
+
+class TestVadTuning(unittest.TestCase):
+    def test_grid_covers_every_setting(self):
+        """Test every mode/start/hold combination is evaluated and the best one is cheapest"""
+        result = tune_vad(white_noise(SR, 1.0, seed=1), _voice_take(), SR)
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["onset_ms"], 300)
+        self.assertEqual(len(result["grid"]), len(VAD_MODES) * len(START_VOICED_FRAMES) * len(SILENCE_HOLD_MS))
+
+        best = result["best"]
+        self.assertTrue(best["detected"])
+        self.assertLessEqual(best["start_delay_ms"], 40)
+        self.assertEqual(best["cost"], min(p["cost"] for p in result["grid"] if p["detected"]))
+        self.assertIn(best, result["curve"])
+
+    def test_noise_blips_push_start_frames_up(self):
+        """Test short bursts in the noise take count as false triggers for eager settings"""
+        noise = white_noise(SR, 2.0, seed=1)
+        blip = speech_like(SR, 0.02, amplitude=3000, noise_rms=0)
+        for offset in (8000, 20000):
+            noise[offset:offset + len(blip)] += blip
+
+        result = tune_vad(noise, _voice_take(), SR)
+        self.assertTrue(result["ok"])
+        eager = evaluate_setting(result, 3, 1, 1200)
+        self.assertGreater(eager["false_triggers"], 0)
+        self.assertEqual(result["best"]["false_triggers"], 0)
+        self.assertGreater(result["best"]["start_voiced_frames"], 2)
+
+    def test_silence_reports_no_speech(self):
+        """Test a voice take without speech is rejected instead of tuned"""
+        result = tune_vad(white_noise(SR, 1.0, seed=1), white_noise(SR, 3.0, seed=2), SR)
+        self.assertFalse(result["ok"])
+        self.assertEqual(result["error"], "no_speech")
+
+    def test_native_rate_is_resampled(self):
+        """Test 48 kHz takes tune to the same onset as 16 kHz ones"""
+        noise = np.repeat(white_noise(SR, 1.0, seed=1), 3)
+        voice = np.repeat(_voice_take(), 3)
+        result = tune_vad(noise, voice, 48000)
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["onset_ms"], 300)
+
+    def test_evaluate_setting_outside_grid(self):
+        result = tune_vad(white_noise(SR, 1.0, seed=1), _voice_take(), SR)
+        self.assertIsNone(evaluate_setting(result, 1, 2, 5000))
+        self.assertIsNotNone(evaluate_setting(result, 1, 2, 500))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,13 @@
 import unittest
 import asyncio
 import os
+import sys
+import json
+import shutil
 import tempfile
 from unittest.mock import Mock, patch, AsyncMock
 from main import VoiceCore
+from config_manager import ConfigManager
 
 class TestVoiceCore(unittest.TestCase):
     def setUp(self):
@@ -133,5 +137,30 @@ class TestVoiceCore(unittest.TestCase):
         
         asyncio.run(run_test())
 
+    def test_audio_config_reaches_tts_script(self):
+        """Test output device and volume changes reach the TTS script from the next utterance on"""
+        llm_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, llm_dir, ignore_errors=True)
+        argv_path = os.path.join(llm_dir, "argv.json")
+        with open(os.path.join(llm_dir, "main.py"), "w") as f:
+            f.write(f"import json, sys\njson.dump(sys.argv[1:], open({argv_path!r}, 'w'))\n")
+        
+        env = {"VOICE_PY": sys.executable, "LOCAL_TALKING_LLM_PATH": llm_dir,
+               "ZANDALEE_ROOT": os.path.dirname(os.path.abspath(__file__))}
+        with patch.dict(os.environ, env):
+            voice_core = VoiceCore()
+            
+            def tts_argv():
+                self.assertTrue(asyncio.run(voice_core.speak("hello"))["ok"])
+                with open(argv_path) as f:
+                    return json.load(f)
+            
+            self.assertEqual(tts_argv(), ["--tts-only", "--text", "hello"])
+            # The default config sends nothing extra either
+            voice_core.apply_audio_config(ConfigManager(llm_dir).defaults["audio"])
+            self.assertEqual(tts_argv(), ["--tts-only", "--text", "hello"])
+            voice_core.apply_audio_config({"output_device": {"id": 4, "name": "Speakers"}, "volume": 0.5})
+            self.assertEqual(tts_argv(), ["--tts-only", "--text", "hello", "--output-device", "4", "--volume", "0.5"])
+
 if __name__ == '__main__':
     unittest.main()
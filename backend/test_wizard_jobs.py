@@ -0,0 +1,189 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from capture_backends import ReplayBackend
+from synthetic_audio import speech_like, white_noise
+from wizard_jobs import (CANCELLED, DONE, FAILED, RUNNING, SHARE_INTERVAL_SEC, TIMEOUT, SharedJobStore, WizardJob,
+                         WizardJobManager)
+
+
+def _backend(speed: float) -> ReplayBackend:
+    return ReplayBackend.from_signals({
+        "Replay Mic": {"samplerate": 16000, "takes": [
+            white_noise(16000, 1.0, seed=1),
+            speech_like(16000, 6.0, onset_sec=0.3),
+        ]}
+    }, speed=speed)
+
+
+async def _wait_for_event(job, event_type: str):
+    while not any(e["type"] == event_type for e in job.events):
+        await asyncio.sleep(0.005)
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def _parse_sse(chunks):
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestWizardJobs(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home, ignore_errors=True)
+        patcher = patch.dict(os.environ, {"ZANDALEE_HOME": self.home})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _manager(self, speed: float = 200) -> WizardJobManager:
+        from audio_wizard import AudioWizard
+        return WizardJobManager(AudioWizard(backend=_backend(speed)))
+
+    def test_start_busy_and_result(self):
+        """Test one job at a time, and the blocking run is refused while a job is active"""
+        manager = self._manager()
+
+        async def scenario():
+            started = manager.start({})
+            self.assertTrue(started["ok"])
+            busy = manager.start({})
+            self.assertEqual((busy["ok"], busy["error"], busy["job_id"]), (False, "busy", started["job_id"]))
+            self.assertEqual((await manager.run({}))["error"], "busy")
+
+            job = manager.get(started["job_id"])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        self.assertEqual(job.status, DONE)
+        self.assertTrue(job.result["ok"])
+        snapshot = job.snapshot()
+        self.assertEqual(snapshot["status"], DONE)
+        self.assertEqual(snapshot["results"][0]["name"], "Replay Mic")
+        self.assertIsNone(manager.active_job())
+
+    def test_jobs_are_shared_across_workers(self):
+        """Test a job in one worker blocks the others, which can follow and cancel it"""
+        from audio_wizard import AudioWizard
+        run_dir = os.path.join(self.home, "run")
+        first = WizardJobManager(AudioWizard(backend=_backend(1)), run_dir=run_dir)
+        second = WizardJobManager(AudioWizard(backend=_backend(200)), run_dir=run_dir)
+
+        async def scenario():
+            job_id = first.start({})["job_id"]
+            self.assertEqual(second.start({}), {"ok": False, "error": "busy", "job_id": job_id})
+            job = first.get(job_id)
+            await _wait_for_event(job, "levels")
+            await asyncio.sleep(SHARE_INTERVAL_SEC * 2)
+
+            remote = await asyncio.to_thread(second.get, job_id)
+            self.assertEqual(remote.status, RUNNING)
+            self.assertEqual(remote.snapshot()["phase"], job.snapshot()["phase"])
+            live = asyncio.ensure_future(_collect(second.stream(remote)))
+
+            self.assertTrue((await asyncio.to_thread(second.cancel, job_id))["ok"])
+            await job.task
+            events = _parse_sse(await live)
+
+            # The lock is free again for any worker
+            started = second.start({})
+            self.assertTrue(started["ok"])
+            await second.get(started["job_id"]).task
+            return job, events
+
+        job, events = asyncio.run(scenario())
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual([seq for seq, _, _ in events], list(range(len(job.events))))
+        self.assertEqual(events[-1][2]["status"], CANCELLED)
+        self.assertEqual(second.get(job.id).status, CANCELLED)
+        self.assertEqual(first.cancel(job.id)["error"], "job_cancelled")
+
+    def test_job_of_stopped_worker_reads_as_failed(self):
+        store = SharedJobStore(os.path.join(self.home, "run"))
+        job = WizardJob({}, 1.0)
+        job.status = RUNNING
+        store.write(job, [])
+        loaded = store.load(job.id)
+        self.assertEqual((loaded.status, loaded.result["error"]), (FAILED, "worker_stopped"))
+        self.assertIsNone(store.load("../../etc/passwd"))
+
+    def test_cancel(self):
+        """Test cancelling mid-capture ends the job as cancelled without saving"""
+        manager = self._manager(speed=1)
+
+        async def scenario():
+            job = manager.get(manager.start({})["job_id"])
+            await _wait_for_event(job, "levels")
+            self.assertTrue(manager.cancel(job.id)["ok"])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(manager.cancel(job.id)["error"], "job_cancelled")
+        self.assertIsNone(manager.audio_wizard.load_audio_config())
+
+    def test_timeout(self):
+        """Test a job past its timeout is stopped and reported as timed out"""
+        manager = self._manager(speed=1)
+
+        async def scenario():
+            job = manager.get(manager.start({}, timeout_sec=0.3)["job_id"])
+            await job.task
+            return job
+
+        job = asyncio.run(scenario())
+        self.assertEqual(job.status, TIMEOUT)
+        self.assertEqual(job.result, {"ok": False, "error": "timeout"})
+        self.assertTrue(job.cancel_event.is_set())
+
+    def test_sse_replay(self):
+        """Test the event stream replays everything, or from a given position, and ends with the status"""
+        manager = self._manager()
+
+        async def scenario():
+            job = manager.get(manager.start({})["job_id"])
+            live = asyncio.ensure_future(_collect(manager.stream(job)))
+            await job.task
+            return job, await live, await _collect(manager.stream(job, since=3))
+
+        job, live, replayed = asyncio.run(scenario())
+        live_events = _parse_sse(live)
+        self.assertEqual([seq for seq, _, _ in live_events], list(range(len(job.events))))
+        self.assertEqual(live_events[-1][1:], ("status", job.events[-1]))
+        self.assertEqual([seq for seq, _, _ in _parse_sse(replayed)], list(range(3, len(job.events))))
+
+    def test_endpoints_and_last_event_id(self):
+        """Test /mic/wizard runs through the job manager and SSE resumes after Last-Event-ID"""
+        import main
+        manager = self._manager()
+        with patch.object(main, "wizard_jobs", manager), TestClient(main.app) as client:
+            result = client.post("/mic/wizard", json={}).json()
+            self.assertTrue(result["ok"])
+            job = next(iter(manager.jobs.values()))
+            self.assertEqual(job.result, result)
+
+            response = client.get(f"/mic/wizard/jobs/{job.id}/events", headers={"Last-Event-ID": "4"})
+            seqs = [seq for seq, _, _ in _parse_sse(response.text.split("\n\n"))]
+            self.assertEqual(seqs, list(range(5, len(job.events))))
+
+            self.assertEqual(client.get(f"/mic/wizard/jobs/{job.id}").json()["status"], DONE)
+            self.assertEqual(client.get("/mic/wizard/jobs/nope").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import subprocess
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+from main import VoiceCore
+from worker_coordination import InterProcessLock, SharedVoiceState
+
+
+def _run_worker(run_dir: str, code: str) -> subprocess.Popen:
+    """Start another Python process that opens the same shared state"""
+    prologue = (
+        "import sys, time\n"
+        "from worker_coordination import SharedVoiceState\n"
+        f"state = SharedVoiceState({run_dir!r})\n"
+    )
+    return subprocess.Popen([sys.executable, "-c", prologue + code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+class TestWorkerCoordination(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def test_lock_is_exclusive_and_released_by_dead_process(self):
+        """Test a worker speaking blocks the others, and dying frees the voice lock"""
+        worker = _run_worker(self.run_dir, "state.try_begin_utterance()\nprint('speaking', flush=True)\ntime.sleep(60)\n")
+        try:
+            self.assertEqual(worker.stdout.readline().strip(), "speaking")
+            state = SharedVoiceState(self.run_dir)
+            self.assertFalse(state.try_begin_utterance())
+            self.assertTrue(state.read()["voice_active"])
+        finally:
+            worker.kill()
+            worker.wait()
+
+        # A worker started after the crash clears the stale flag
+        recovered = SharedVoiceState(self.run_dir)
+        self.assertFalse(recovered.read()["voice_active"])
+        self.assertTrue(recovered.try_begin_utterance())
+        recovered.end_utterance()
+
+    def test_metrics_are_shared(self):
+        state = SharedVoiceState(self.run_dir)
+        state.update(last_tts_ms=1234, last_error="déjà " + "x" * 2000)
+        worker = _run_worker(self.run_dir, "s = state.read()\nprint(s['last_tts_ms'], len(s['last_error'].encode()))\n")
+        out, err = worker.communicate(timeout=30)
+        self.assertEqual(out.split(), ["1234", "1024"], err)
+
+        state.update(last_error=None)
+        self.assertIsNone(state.read()["last_error"])
+
+    def test_blocking_acquire_times_out(self):
+        holder = InterProcessLock(os.path.join(self.run_dir, "x.lock"))
+        other = InterProcessLock(os.path.join(self.run_dir, "x.lock"))
+        with holder:
+            self.assertFalse(other.acquire(timeout=0.05))
+        self.assertTrue(other.acquire(timeout=0.05))
+        other.release()
+
+    def test_held_state_lock_does_not_block_the_event_loop(self):
+        """Test metrics fall back to the last value and speak waits off-loop while another worker holds the state lock"""
+        core = VoiceCore(SharedVoiceState(self.run_dir))
+        core.bridge_path = os.path.join(self.run_dir, "voice_client.py")
+        open(core.bridge_path, "w").close()
+        core._shared.update(last_tts_ms=42)
+
+        worker = _run_worker(self.run_dir, "state._state_lock.acquire()\nprint('locked', flush=True)\ntime.sleep(0.5)\n")
+        self.addCleanup(worker.wait)
+        self.addCleanup(worker.kill)
+        self.assertEqual(worker.stdout.readline().strip(), "locked")
+
+        async def run_test():
+            process = Mock(returncode=0)
+            process.communicate = AsyncMock(return_value=(b"", b""))
+            with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)):
+                task = asyncio.create_task(core.speak("hello"))
+                ticks = 0
+                while not task.done():
+                    self.assertEqual(core.get_metrics()["last_tts_ms"], 42)
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+                return await task, ticks
+
+        result, ticks = asyncio.run(run_test())
+        self.assertTrue(result["ok"])
+        self.assertGreater(ticks, 10)
+        self.assertFalse(core.get_metrics()["voice_active"])
+
+    def test_voice_cores_in_different_workers_are_half_duplex(self):
+        """Test two workers' VoiceCores never speak at the same time and share metrics"""
+        bridge_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bridge_dir, ignore_errors=True)
+        first = VoiceCore(SharedVoiceState(self.run_dir))
+        second = VoiceCore(SharedVoiceState(self.run_dir))
+        for core in (first, second):
+            core.bridge_path = os.path.join(bridge_dir, "voice_client.py")
+        open(first.bridge_path, "w").close()
+
+        async def slow_communicate():
+            await asyncio.sleep(0.1)
+            return b"", b""
+
+        async def run_test():
+            process = Mock(returncode=0)
+            process.communicate = slow_communicate
+            with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)):
+                task = asyncio.create_task(first.speak("first"))
+                await asyncio.sleep(0.02)
+                self.assertTrue(second.get_metrics()["voice_active"])
+                self.assertEqual(await second.speak("second"), {"ok": False, "error": "busy"})
+                self.assertTrue((await task)["ok"])
+                self.assertTrue((await second.speak("second"))["ok"])
+
+        asyncio.run(run_test())
+        metrics = first.get_metrics()
+        self.assertFalse(metrics["voice_active"])
+        self.assertGreaterEqual(metrics["last_tts_ms"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it the original image is served
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Fixed derivative widths (px) and the one used in list responses
+THUMB_WIDTHS = (128, 256, 512, 1024)
+DEFAULT_THUMB_WIDTH = 256
+THUMB_QUALITY = 80
+
+
+def generate_derivatives(src_path: str, targets: Dict[int, str]) -> List[int]:
+    """Write WebP derivatives of ``src_path`` for each ``{width: dest_path}``.
+
+    Runs in a worker process, so it must stay a picklable module-level function.
+    Images narrower than a target width are re-encoded at their own size.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+
+    written = []
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        # Largest first so each step downsizes the previous result
+        for width in sorted(targets, reverse=True):
+            if img.width > width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.LANCZOS)
+
+            dest_path = targets[width]
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, "WEBP", quality=THUMB_QUALITY, method=4)
+            os.replace(tmp_path, dest_path)
+            written.append(width)
+
+    return written
+
+
+class ThumbnailService:
+    """Generates and locates WebP derivatives of files under the /files mount.
+
+    Derivatives live at ``<storage_dir>/thumbs/<width>/<source path>.webp`` and are
+    produced on a process pool, either queued at upload time or on first request.
+    """
+
+    def __init__(self, storage_dir: str, max_workers: Optional[int] = None):
+        self.storage_dir = os.path.realpath(storage_dir)
+        self.thumbs_dir = os.path.join(self.storage_dir, "thumbs")
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    @staticmethod
+    def nearest_width(size: int) -> int:
+        """Smallest derivative width that covers ``size`` (largest if none do)"""
+        for width in THUMB_WIDTHS:
+            if width >= size:
+                return width
+        return THUMB_WIDTHS[-1]
+
+    def source_path(self, relpath: str) -> Optional[str]:
+        """Absolute path of a file under the mount, or None if outside it or missing"""
+        path = os.path.realpath(os.path.join(self.storage_dir, relpath))
+        if not path.startswith(self.storage_dir + os.sep) or path.startswith(self.thumbs_dir + os.sep):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def derivative_relpath(self, width: int, relpath: str) -> str:
+        """Path of a derivative relative to the mount"""
+        stem = os.path.splitext(relpath.replace("\\", "/"))[0]
+        return f"thumbs/{width}/{stem}.webp"
+
+    def derivative_path(self, width: int, relpath: str) -> str:
+        """Absolute path of a derivative"""
+        return os.path.join(self.storage_dir, *self.derivative_relpath(width, relpath).split("/"))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def enqueue(self, relpath: str) -> Optional[Future]:
+        """Queue generation of all missing derivatives for a stored file"""
+        if not self.available:
+            return None
+
+        src_path = self.source_path(relpath)
+        if src_path is None:
+            return None
+
+        with self._lock:
+            pending = self._pending.get(relpath)
+            if pending is not None:
+                return pending
+
+            targets = {
+                width: self.derivative_path(width, relpath)
+                for width in THUMB_WIDTHS
+                if not os.path.exists(self.derivative_path(width, relpath))
+            }
+            if not targets:
+                return None
+
+            future = self._get_executor().submit(generate_derivatives, src_path, targets)
+            self._pending[relpath] = future
+
+        future.add_done_callback(lambda f: self._on_done(relpath, f))
+        return future
+
+    def _on_done(self, relpath: str, future: Future):
+        with self._lock:
+            self._pending.pop(relpath, None)
+        exc = future.exception()
+        if exc is not None:
+            logger.warning(f"Thumbnail generation failed for {relpath}: {exc}")
+
+    async def get(self, size: int, relpath: str) -> Optional[str]:
+        """Absolute path of the nearest derivative, generating it on demand"""
+        width = self.nearest_width(size)
+        path = self.derivative_path(width, relpath)
+        if os.path.exists(path):
+            return path
+
+        future = self.enqueue(relpath)
+        if future is not None:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception:
+                return None
+
+        return path if os.path.exists(path) else None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,150 @@
+import os
+import hashlib
+import logging
+import tempfile
+from typing import BinaryIO, Dict, Any, Iterable, Optional
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Upload limits
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_FILES = 8  # files per /files/upload request
+
+# Multipart boundaries and part headers on top of the file bytes themselves
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Allowed image types and the file extension used when storing them
+ALLOWED_IMAGE_TYPES = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+}
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected (size, type or I/O failure)"""
+    pass
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Identify an image content type from its leading magic bytes"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def stream_upload(src: BinaryIO, target_dir: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                  chunk_size: int = UPLOAD_CHUNK_SIZE) -> Dict[str, Any]:
+    """Copy an upload to a temp file in chunks, hashing and validating on the way.
+
+    Aborts as soon as ``max_bytes`` is exceeded. The temp file lives in
+    ``target_dir`` so the caller can move it into place with ``os.replace``.
+    Returns ``tmp_path``, ``sha256``, ``size`` and the sniffed ``content_type``.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+
+                if content_type is None:
+                    content_type = sniff_image_type(chunk[:16])
+                    if content_type is None:
+                        raise UploadError("File content is not a PNG, JPEG or WebP image")
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(f"File too large. Maximum size: {max_bytes // (1024 * 1024)}MB")
+
+                digest.update(chunk)
+                out.write(chunk)
+
+            if size == 0:
+                raise UploadError("Empty file")
+
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        # Never leave partial uploads behind
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return {
+        "tmp_path": tmp_path,
+        "sha256": digest.hexdigest(),
+        "size": size,
+        "content_type": content_type,
+    }
+
+
+def commit_upload(tmp_path: str, final_path: str) -> None:
+    """Atomically move a finished temp upload to its final location"""
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware that refuses oversized upload bodies before the form is parsed.
+
+    Starlette spools the whole multipart body before the endpoint runs, so the
+    per-file cap in ``stream_upload`` alone only applies after the bytes have
+    arrived. A declared ``Content-Length`` over ``max_body_bytes`` is answered
+    with 413 without reading the body; a body without one (or running past it)
+    fails the form parse with 413 as soon as it crosses the limit.
+    """
+
+    def __init__(self, app, paths: Iterable[str] = ("/files/upload",),
+                 max_body_bytes: int = MAX_UPLOAD_FILES * MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_body_bytes = max_body_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413,
+                             detail=f"Upload too large. Maximum request size: {self.max_body_bytes // (1024 * 1024)}MB")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        declared = headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_body_bytes:
+            error = self._too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # Raised inside the form parse; FastAPI re-raises HTTPExceptions from there
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,128 @@
+import logging
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional
+
+from audio_analysis import frame_signal, frame_stats, segments_from_runs, vad_flags, voiced_runs
+from resampler import to_analysis_rate
+
+logger = logging.getLogger(__name__)
+
+VAD_MODES = (0, 1, 2, 3)
+START_VOICED_FRAMES = (1, 2, 3, 4, 6)
+SILENCE_HOLD_MS = (300, 500, 800, 1200, 2000)
+
+# Speech onset: first voice-take frame this far above the noise take's 95th percentile energy
+ONSET_MARGIN_DB = 10.0
+
+# Cost weights, in milliseconds of start delay
+ENDPOINT_WEIGHT = 0.25          # per ms of silence hold (endpointing latency)
+FALSE_TRIGGER_COST_MS = 500.0   # per segment opened on noise or before the speech onset
+SPLIT_COST_MS = 150.0           # per extra segment after the speech onset
+
+
+def speech_onset_frame(noise_energy: np.ndarray, voice_energy: np.ndarray,
+                       margin_db: float = ONSET_MARGIN_DB) -> int:
+    """First voice frame clearly above the noise floor, or -1 if nobody spoke"""
+    if len(voice_energy) == 0:
+        return -1
+    floor = float(np.percentile(noise_energy, 95)) if len(noise_energy) else 0.0
+    threshold = max(floor, 1.0) * 10 ** (margin_db / 10)
+    above = np.flatnonzero(voice_energy > threshold)
+    return int(above[0]) if len(above) else -1
+
+
+def _pareto(points: List[Dict[str, Any]], keys: Iterable[str]) -> List[Dict[str, Any]]:
+    """Points not dominated on every key (lower is better)"""
+    keys = list(keys)
+    values = np.array([[p[k] for k in keys] for p in points], dtype=float)
+    front = []
+    for i, row in enumerate(values):
+        dominated = np.any(np.all(values <= row, axis=1) & np.any(values < row, axis=1))
+        if not dominated:
+            front.append(points[i])
+    return front
+
+
+def tune_vad(noise_audio: np.ndarray, voice_audio: np.ndarray, samplerate: int, frame_ms: int = 10,
+             preroll_ms: int = 500, vad_modes: Iterable[int] = VAD_MODES,
+             start_voiced_frames: Iterable[int] = START_VOICED_FRAMES,
+             silence_hold_ms: Iterable[int] = SILENCE_HOLD_MS) -> Dict[str, Any]:
+    """Grid-search VAD mode and hysteresis on one device's wizard captures.
+
+    The VAD runs once per mode and take; every hysteresis setting is then
+    evaluated on the same per-frame decisions (and the same voiced-run scan).
+    Each setting is scored by start delay, endpointing latency, false
+    triggers and split utterances; the best one is returned together with
+    the Pareto front over start delay, false triggers, splits and silence hold.
+    """
+    noise_audio, rate = to_analysis_rate(noise_audio, samplerate)
+    voice_audio, rate = to_analysis_rate(voice_audio, samplerate)
+    frame_samples = int(rate * frame_ms / 1000)
+
+    noise_energy = frame_stats(frame_signal(noise_audio, frame_samples))["energy"]
+    voice_energy = frame_stats(frame_signal(voice_audio, frame_samples))["energy"]
+    onset = speech_onset_frame(noise_energy, voice_energy)
+    if onset < 0:
+        return {"ok": False, "error": "no_speech"}
+
+    grid = []
+    for mode in vad_modes:
+        # One VAD pass per take and mode; the run scan is shared by every hysteresis setting
+        noise_runs = voiced_runs(vad_flags(noise_audio, rate, frame_samples, mode, energy=noise_energy))
+        voice_runs = voiced_runs(vad_flags(voice_audio, rate, frame_samples, mode, energy=voice_energy))
+
+        for start in start_voiced_frames:
+            for hold_ms in silence_hold_ms:
+                end = max(1, hold_ms // frame_ms)
+                noise_segments = segments_from_runs(*noise_runs, start, end)
+                voice_segments = segments_from_runs(*voice_runs, start, end)
+
+                # The trigger fires on the start-th voiced frame of the opening run
+                triggers = [s + start - 1 for s, e in voice_segments]
+                before = [t for (s, e), t in zip(voice_segments, triggers) if e <= onset]
+                after = [t for (s, e), t in zip(voice_segments, triggers) if e > onset]
+
+                point = {
+                    "vad_mode": mode,
+                    "start_voiced_frames": start,
+                    "silence_hold_ms": hold_ms,
+                    "false_triggers": len(noise_segments) + len(before),
+                    "splits": max(len(after) - 1, 0),
+                    "detected": bool(after),
+                }
+                if after:
+                    delay_ms = max(after[0] - onset, 0) * frame_ms
+                    point["start_delay_ms"] = delay_ms
+                    point["clipped_start_ms"] = max(delay_ms - preroll_ms, 0)
+                    point["cost"] = round(delay_ms + ENDPOINT_WEIGHT * hold_ms +
+                                          FALSE_TRIGGER_COST_MS * point["false_triggers"] +
+                                          SPLIT_COST_MS * point["splits"], 1)
+                grid.append(point)
+
+    detected = [p for p in grid if p["detected"]]
+    if not detected:
+        return {"ok": False, "error": "speech_not_detected", "grid": grid}
+
+    best = min(detected, key=lambda p: (p["cost"], p["vad_mode"], p["silence_hold_ms"]))
+    curve = sorted(_pareto(detected, ("start_delay_ms", "false_triggers", "splits", "silence_hold_ms")),
+                   key=lambda p: (p["start_delay_ms"], p["false_triggers"], p["silence_hold_ms"]))
+    logger.info(f"VAD tuning: mode={best['vad_mode']} start={best['start_voiced_frames']} "
+                f"hold={best['silence_hold_ms']}ms delay={best['start_delay_ms']}ms "
+                f"false_triggers={best['false_triggers']}")
+    return {
+        "ok": True,
+        "onset_ms": onset * frame_ms,
+        "best": best,
+        "curve": curve,
+        "grid": grid,
+    }
+
+
+def evaluate_setting(tuning: Dict[str, Any], vad_mode: int, start_voiced_frames: int,
+                     silence_hold_ms: int) -> Optional[Dict[str, Any]]:
+    """The grid point for a given setting, if it was part of the search"""
+    for point in tuning.get("grid", []):
+        if (point["vad_mode"], point["start_voiced_frames"], point["silence_hold_ms"]) == \
+                (vad_mode, start_voiced_frames, silence_hold_ms):
+            return point
+    return None
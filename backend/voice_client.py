@@ -21,17 +21,22 @@ class LocalTalkingLLMBridge:
         self.python_path = os.getenv("VOICE_PY", os.path.join(self.local_llm_path, ".venv", "Scripts", "python.exe"))
         self.metrics = {"stt": 0, "llm": 0, "tts": 0, "total": 0, "vu_level": 0}
         
-    async def speak(self, text: str) -> Dict[str, Any]:
-        """Send text to your existing TTS system"""
+    async def speak(self, text: str, output_device: Optional[int] = None,
+                    volume: Optional[float] = None) -> Dict[str, Any]:
+        """Send text to your existing TTS system, on the given output device and volume if set"""
         try:
             start_time = time.time()
             
             # Call your existing TTS script
+            args = ["--tts-only", "--text", text]
+            if output_device is not None and output_device >= 0:
+                args += ["--output-device", str(output_device)]
+            if volume is not None:
+                args += ["--volume", str(volume)]
             process = await asyncio.create_subprocess_exec(
                 self.python_path,
                 "main.py",  # Adjust this to your actual TTS script
-                "--tts-only",
-                "--text", text,
+                *args,
                 cwd=self.local_llm_path,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -144,6 +149,8 @@ async def main():
     parser = argparse.ArgumentParser(description="Zandalee Voice Client Bridge")
     parser.add_argument("--transport", choices=["STDIO", "HTTP"], default="STDIO")
     parser.add_argument("--speak", type=str, help="Text to speak")
+    parser.add_argument("--output-device", type=int, help="Output device ID for --speak (-1 = default)")
+    parser.add_argument("--volume", type=float, help="Playback volume for --speak (0.0-1.0)")
     parser.add_argument("--listen", action="store_true", help="Listen for voice input")
     parser.add_argument("--list-devices", action="store_true", help="List audio devices")
     parser.add_argument("--test-device", type=int, help="Test specific device ID")
@@ -154,7 +161,7 @@ async def main():
     bridge = LocalTalkingLLMBridge(args.transport)
     
     if args.speak:
-        result = await bridge.speak(args.speak)
+        result = await bridge.speak(args.speak, args.output_device, args.volume)
         print(json.dumps(result))
     elif args.listen:
         result = await bridge.listen()
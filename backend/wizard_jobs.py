@@ -0,0 +1,371 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import contextlib
+from typing import TYPE_CHECKING, Any, AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional
+
+from worker_coordination import InterProcessLock
+
+if TYPE_CHECKING:  # importing audio_wizard pulls in numpy/scipy; main imports this module at startup
+    from audio_wizard import AudioWizard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIZARD_TIMEOUT_SEC = 120.0
+MAX_FINISHED_JOBS = 20
+
+# How often a shared job is written out, and other workers poll it
+SHARE_INTERVAL_SEC = 0.2
+KEEP_ALIVE_SEC = 15
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+FINAL_STATES = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+
+class WizardJob:
+    """One background mic wizard run and its progress event log"""
+
+    def __init__(self, config: Dict[str, Any], timeout_sec: float):
+        self.id = str(uuid.uuid4())
+        self.config = config
+        self.timeout_sec = timeout_sec
+        self.status = PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        self.events: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def publish(self, event: Dict[str, Any]):
+        """Append an event and wake listeners (event loop thread only)"""
+        event = {"seq": len(self.events), "ts": time.time(), **event}
+        self.events.append(event)
+        # Wake everyone waiting on the current event, then start a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None):
+        self.status = status
+        self.result = result
+        self.finished_at = time.time()
+        self.publish({"type": "status", "status": status, "result": result})
+
+    @classmethod
+    def restore(cls, record: Dict[str, Any], events: List[Dict[str, Any]]) -> "WizardJob":
+        """A read-only copy of a job run by another worker"""
+        job = cls({}, record["timeout_sec"])
+        job.id = record["job_id"]
+        job.status = record["status"]
+        job.result = record["result"]
+        job.created_at = record["created_at"]
+        job.finished_at = record["finished_at"]
+        job.events = events
+        return job
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "timeout_sec": self.timeout_sec,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+    def changed(self) -> asyncio.Event:
+        """Event set by the next publish; grab it before checking for new events"""
+        return self._changed
+
+    def snapshot(self) -> Dict[str, Any]:
+        last_levels = next((e for e in reversed(self.events) if e["type"] == "levels"), None)
+        last_phase = next((e for e in reversed(self.events) if e["type"] == "phase"), None)
+        return {
+            "ok": True,
+            "job_id": self.id,
+            "status": self.status,
+            "phase": last_phase["phase"] if last_phase else None,
+            "levels": last_levels["levels"] if last_levels else {},
+            "results": [e["result"] for e in self.events if e["type"] == "result"],
+            "result": self.result,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class SharedJobStore:
+    """Wizard jobs as files under ``run_dir``, for server workers sharing one machine.
+
+    ``wizard.lock`` is held by the worker running a job, so only one job runs
+    across all workers, and the OS frees it if that worker dies. The running
+    worker writes ``wizard_jobs/<id>.json`` (status and result) and appends
+    events to ``<id>.events``; any worker can read both, and asks for a cancel
+    by creating ``<id>.cancel``. Blocking; call off the event loop except for
+    ``try_lock``/``unlock``, which never wait.
+    """
+
+    def __init__(self, run_dir: str):
+        self.jobs_dir = os.path.join(run_dir, "wizard_jobs")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.lock = InterProcessLock(os.path.join(run_dir, "wizard.lock"))
+
+    def _path(self, job_id: str, suffix: str) -> Optional[str]:
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        return os.path.join(self.jobs_dir, job_id + suffix)
+
+    def try_lock(self) -> bool:
+        return self.lock.acquire(blocking=False)
+
+    def unlock(self):
+        self.lock.release()
+
+    def write(self, job: WizardJob, new_events: List[Dict[str, Any]]):
+        """Append ``new_events`` and replace the job record"""
+        if new_events:
+            with open(self._path(job.id, ".events"), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(event) + "\n" for event in new_events)
+        path = self._path(job.id, ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(job.record(), f)
+        os.replace(path + ".tmp", path)
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(job_id, ".json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (TypeError, FileNotFoundError, ValueError):
+            return None
+
+    def load(self, job_id: str) -> Optional[WizardJob]:
+        """A job from any worker; one left running by a stopped worker reads as failed"""
+        # Probe the lock before reading: a job that is still unfinished once
+        # nobody holds the lock lost its worker
+        orphaned = self.try_lock()
+        if orphaned:
+            self.unlock()
+        record = self._read(job_id)
+        if record is None:
+            return None
+        events = []
+        try:
+            with open(self._path(job_id, ".events"), "r", encoding="utf-8") as f:
+                # A line being appended right now may be incomplete
+                events = [json.loads(line) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            pass
+        job = WizardJob.restore(record, events)
+        if orphaned and not job.finished:
+            job.status = FAILED
+            job.result = {"ok": False, "error": "worker_stopped"}
+        return job
+
+    def active_id(self) -> Optional[str]:
+        """The unfinished job with the latest start, if any"""
+        records = (self._read(name[:-5]) for name in os.listdir(self.jobs_dir) if name.endswith(".json"))
+        active = [r for r in records if r and r["status"] not in FINAL_STATES]
+        return max(active, key=lambda r: r["created_at"])["job_id"] if active else None
+
+    def request_cancel(self, job_id: str):
+        open(self._path(job_id, ".cancel"), "w").close()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, ".cancel"))
+
+    def prune(self, keep: int = MAX_FINISHED_JOBS):
+        """Drop all but the newest ``keep`` jobs (called with the lock held by the newest)"""
+        ids = sorted((name[:-5] for name in os.listdir(self.jobs_dir) if name.endswith(".json")),
+                     key=lambda job_id: os.path.getmtime(self._path(job_id, ".json")))
+        for job_id in ids[:max(0, len(ids) - keep)]:
+            for suffix in (".json", ".events", ".cancel"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(job_id, suffix))
+
+
+class WizardJobManager:
+    """Runs mic wizard jobs on a worker thread, one at a time, with progress streaming.
+
+    ``capture_guard`` returns an async context manager held for the whole
+    run, so other users of the devices (the level monitor) can step aside.
+    With ``run_dir`` (several server workers) jobs also go through a
+    ``SharedJobStore``: one job at a time across workers, and status, events
+    and cancel work from whichever worker serves the request.
+    """
+
+    def __init__(self, audio_wizard: "AudioWizard",
+                 capture_guard: Optional[Callable[[], AsyncContextManager]] = None,
+                 run_dir: Optional[str] = None):
+        self.audio_wizard = audio_wizard
+        self.capture_guard = capture_guard
+        self.store = SharedJobStore(run_dir) if run_dir else None
+        self.jobs: Dict[str, WizardJob] = {}
+
+    def active_job(self) -> Optional[WizardJob]:
+        return next((job for job in self.jobs.values() if not job.finished), None)
+
+    def start(self, config: Dict[str, Any], timeout_sec: float = DEFAULT_WIZARD_TIMEOUT_SEC) -> Dict[str, Any]:
+        """Start a wizard job; the audio devices only allow one at a time"""
+        active = self.active_job()
+        if active:
+            return {"ok": False, "error": "busy", "job_id": active.id}
+        if self.store is not None and not self.store.try_lock():
+            # Running in another worker
+            return {"ok": False, "error": "busy", "job_id": self.store.active_id()}
+
+        self._prune()
+        job = WizardJob(config, timeout_sec)
+        self.jobs[job.id] = job
+        if self.store is not None:
+            # A small local write, so other workers can name the busy job right away
+            self.store.write(job, [])
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return {"ok": True, "job_id": job.id}
+
+    async def run(self, config: Dict[str, Any], timeout_sec: float = DEFAULT_WIZARD_TIMEOUT_SEC) -> Dict[str, Any]:
+        """Start a job and wait for its result; busy while another job holds the devices"""
+        started = self.start(config, timeout_sec)
+        if not started["ok"]:
+            return started
+        job = self.jobs[started["job_id"]]
+        # A client that disconnects does not abort the run; its result stays on the job
+        await asyncio.shield(job.task)
+        return job.result
+
+    async def _run(self, job: WizardJob):
+        share = asyncio.ensure_future(self._share(job)) if self.store is not None else None
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                if self.capture_guard is not None:
+                    await stack.enter_async_context(self.capture_guard())
+                await self._capture(job)
+        finally:
+            if not job.finished:
+                job.finish(FAILED, {"ok": False, "error": "stopped"})
+            if share is not None:
+                # Other workers must see the final state before the next job can start
+                await share
+                self.store.unlock()
+
+    async def _share(self, job: WizardJob):
+        """Mirror a running job into the shared store and pick up cancels from other workers"""
+        try:
+            await asyncio.to_thread(self.store.prune, MAX_FINISHED_JOBS + 1)
+        except OSError as e:
+            logger.warning(f"Could not prune shared mic wizard jobs: {e}")
+        written = 0
+        while True:
+            finished = job.finished
+            new_events = job.events[written:]
+            written += len(new_events)
+            try:
+                await asyncio.to_thread(self.store.write, job, new_events)
+                if not finished and await asyncio.to_thread(self.store.cancel_requested, job.id):
+                    job.cancel_event.set()
+            except OSError as e:
+                logger.warning(f"Could not share mic wizard job {job.id}: {e}")
+            if finished:
+                return
+            await asyncio.sleep(SHARE_INTERVAL_SEC)
+
+    async def _capture(self, job: WizardJob):
+        loop = asyncio.get_running_loop()
+
+        def progress(event: Dict[str, Any]):
+            # Called from the wizard thread
+            loop.call_soon_threadsafe(job.publish, event)
+
+        job.status = RUNNING
+        job.publish({"type": "status", "status": RUNNING})
+        task = loop.run_in_executor(None, self.audio_wizard.run_wizard, job.config, progress, job.cancel_event)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout=job.timeout_sec)
+        except asyncio.TimeoutError:
+            # Stop the worker thread and wait for it to release the devices
+            job.cancel_event.set()
+            await asyncio.gather(task, return_exceptions=True)
+            job.finish(TIMEOUT, {"ok": False, "error": "timeout"})
+            return
+        except Exception as e:
+            logger.error(f"Mic wizard job {job.id} failed: {e}")
+            job.finish(FAILED, {"ok": False, "error": str(e)})
+            return
+
+        if result.get("error") == "cancelled":
+            job.finish(CANCELLED, result)
+        else:
+            job.finish(DONE if result.get("ok") else FAILED, result)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a job; blocking with a shared store"""
+        job = self.get(job_id)
+        if job is None:
+            return {"ok": False, "error": "job_not_found"}
+        if job.finished:
+            return {"ok": False, "error": f"job_{job.status}"}
+        if job_id in self.jobs:
+            job.cancel_event.set()
+        else:
+            # The worker running it checks for this on its next share
+            self.store.request_cancel(job_id)
+        return {"ok": True}
+
+    def get(self, job_id: str) -> Optional[WizardJob]:
+        """A job of this worker, or with a shared store of any worker (blocking then)"""
+        job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    async def stream(self, job: WizardJob, since: int = 0) -> AsyncIterator[str]:
+        """Server-sent events for a job, replaying from ``since``, until it finishes"""
+        position = since
+        local = job.id in self.jobs
+        idle = 0.0
+        while True:
+            changed = job.changed()
+            while position < len(job.events):
+                event = job.events[position]
+                position += 1
+                idle = 0.0
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if job.finished:
+                return
+            if local:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=KEEP_ALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                continue
+
+            # Run by another worker: follow the shared store
+            await asyncio.sleep(SHARE_INTERVAL_SEC)
+            job = await asyncio.to_thread(self.store.load, job.id) or job
+            idle += SHARE_INTERVAL_SEC
+            if idle >= KEEP_ALIVE_SEC:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+    def _prune(self):
+        finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.created_at)
+        for job in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job.id]
@@ -0,0 +1,190 @@
+import os
+import mmap
+import time
+import struct
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+# How often a blocking acquire retries while another process holds the lock
+LOCK_POLL_SEC = 0.001
+
+# Longest last_error kept in shared state (UTF-8 bytes, truncated)
+MAX_ERROR_BYTES = 1024
+
+
+class InterProcessLock:
+    """Exclusive lock on a file, shared by every worker process.
+
+    Backed by ``flock`` (POSIX) or ``msvcrt.locking`` (Windows), so the OS
+    releases it when the holding process dies; a crashed worker can never
+    leave the lock stuck. Also serializes threads within one process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.Lock()
+        self._held = False
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        """Take the lock; with ``blocking=False`` returns False at once if it is held elsewhere"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._thread_lock.acquire(blocking, -1 if timeout is None or not blocking else timeout):
+            return False
+        while not _try_lock(self._fd):
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                self._thread_lock.release()
+                return False
+            time.sleep(LOCK_POLL_SEC)
+        self._held = True
+        return True
+
+    def release(self):
+        self._held = False
+        _unlock(self._fd)
+        self._thread_lock.release()
+
+    def locked(self) -> bool:
+        """Whether this process holds the lock"""
+        return self._held
+
+    def close(self):
+        if self._held:
+            self.release()
+        os.close(self._fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedVoiceState:
+    """Half-duplex voice lock and voice metrics shared across uvicorn workers.
+
+    ``voice.lock`` is held for the whole utterance by whichever worker is
+    speaking, so only one utterance plays at a time no matter which worker
+    served the request. Metrics live in a small memory-mapped file
+    (``voice_state.bin``) so ``/voice/metrics`` reports the same values from
+    every worker; reads and writes go through ``voice_state.lock``.
+
+    Every call here may wait on another process, so event-loop code should
+    use ``read(blocking=False)`` and run the rest in a worker thread.
+    """
+
+    # voice_active, last_tts_ms, owner pid, last_error length (-1 = None)
+    _HEADER = struct.Struct("<?qqi")
+    SIZE = _HEADER.size + MAX_ERROR_BYTES
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        os.makedirs(run_dir, exist_ok=True)
+        self._voice_lock = InterProcessLock(os.path.join(run_dir, "voice.lock"))
+        self._state_lock = InterProcessLock(os.path.join(run_dir, "voice_state.lock"))
+
+        path = os.path.join(run_dir, "voice_state.bin")
+        with self._state_lock:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(self._fd).st_size < self.SIZE:
+                os.ftruncate(self._fd, self.SIZE)
+                self._map = mmap.mmap(self._fd, self.SIZE)
+                self._pack(False, 0, 0, None)
+            else:
+                self._map = mmap.mmap(self._fd, self.SIZE)
+            self._cached = self._unpack()
+        self._recover()
+
+    def _recover(self):
+        """Clear an utterance left marked active by a worker that died mid-speech"""
+        if not self.read()["voice_active"]:
+            return
+        if self._voice_lock.acquire(blocking=False):
+            try:
+                logger.warning("Clearing voice_active left behind by a stopped worker")
+                self.update(voice_active=False)
+            finally:
+                self._voice_lock.release()
+
+    def _pack(self, active: bool, tts_ms: int, pid: int, error: Optional[str]):
+        data = b"" if error is None else error.encode("utf-8")[:MAX_ERROR_BYTES]
+        self._HEADER.pack_into(self._map, 0, active, tts_ms, pid, -1 if error is None else len(data))
+        self._map[self._HEADER.size:self._HEADER.size + len(data)] = data
+
+    def _unpack(self) -> Dict[str, Any]:
+        active, tts_ms, pid, error_len = self._HEADER.unpack_from(self._map, 0)
+        error = None
+        if error_len >= 0:
+            raw = self._map[self._HEADER.size:self._HEADER.size + error_len]
+            error = raw.decode("utf-8", errors="ignore")
+        return {"voice_active": active, "last_tts_ms": tts_ms, "owner_pid": pid, "last_error": error}
+
+    def read(self, blocking: bool = True) -> Dict[str, Any]:
+        """Current state; with ``blocking=False`` the last value seen if another worker holds the lock"""
+        if not self._state_lock.acquire(blocking):
+            return dict(self._cached)
+        try:
+            self._cached = self._unpack()
+            return dict(self._cached)
+        finally:
+            self._state_lock.release()
+
+    def update(self, **fields):
+        """Set any of ``voice_active``, ``last_tts_ms`` and ``last_error``"""
+        with self._state_lock:
+            state = self._unpack()
+            state.update(fields)
+            pid = os.getpid() if state["voice_active"] else 0
+            self._pack(state["voice_active"], state["last_tts_ms"], pid, state["last_error"])
+            self._cached = self._unpack()
+
+    def try_begin_utterance(self) -> bool:
+        """Take the cross-worker voice lock; False if another worker is speaking"""
+        if not self._voice_lock.acquire(blocking=False):
+            return False
+        self.update(voice_active=True, last_error=None)
+        return True
+
+    def end_utterance(self):
+        try:
+            self.update(voice_active=False)
+        finally:
+            self._voice_lock.release()
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+        self._voice_lock.close()
+        self._state_lock.close()
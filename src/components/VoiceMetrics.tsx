@@ -2,10 +2,12 @@
 import { Mic, Volume2, Clock, Zap } from "lucide-react";
 import { useState } from "react";
 import { useZandaleeAPI } from "@/hooks/useZandaleeAPI";
+import { useVuLevel } from "@/hooks/useVuLevel";
 
 const VoiceMetrics = () => {
   const [isListening, setIsListening] = useState(false);
   const { voiceMetrics, isConnected } = useZandaleeAPI();
+  const { vuLevel } = useVuLevel();
 
   const VUMeter = ({ level }: { level: number }) => (
     <div className="flex items-center space-x-1">
@@ -82,9 +84,9 @@ const VoiceMetrics = () => {
       <div className="space-y-2">
         <div className="flex items-center justify-between">
           <span className="text-xs text-text-secondary">Input Level</span>
-          <span className="text-xs text-text-primary">{Math.round(voiceMetrics.vu_level)}%</span>
+          <span className="text-xs text-text-primary">{Math.round(vuLevel)}%</span>
         </div>
-        <VUMeter level={voiceMetrics.vu_level} />
+        <VUMeter level={vuLevel} />
       </div>
 
       <div className="space-y-3 pt-2 border-t border-border/30">
@@ -0,0 +1,58 @@
+import { useState, useEffect } from 'react';
+import { getApiWsBase } from '@/utils/apiConfig';
+
+export interface VuFrame {
+  rms: number;
+  peak: number;
+  rms_dbfs: number;
+  peak_dbfs: number;
+  vu_level: number;
+  clipped: number;
+  xruns: number;
+}
+
+// Live mic level from the backend level monitor (~30 updates/s).
+// The backend only keeps the mic open while at least one of these is mounted.
+export const useVuLevel = (enabled: boolean = true) => {
+  const [frame, setFrame] = useState<VuFrame | null>(null);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!enabled) return;
+
+    let ws: WebSocket | null = null;
+    let retry: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const connect = () => {
+      ws = new WebSocket(`${getApiWsBase()}/ws/vu`);
+
+      ws.onmessage = (event) => {
+        try {
+          const message = JSON.parse(event.data);
+          if (message.type === 'vu') {
+            setFrame(message.data);
+            setError(null);
+          } else if (message.type === 'vu_error') {
+            setError(message.error);
+          }
+        } catch (err) {
+          console.error('VU message parse error:', err);
+        }
+      };
+
+      ws.onclose = () => {
+        if (!closed) retry = setTimeout(connect, 3000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (retry) clearTimeout(retry);
+      ws?.close();
+    };
+  }, [enabled]);
+
+  return { frame, vuLevel: frame?.vu_level ?? 0, error };
+};
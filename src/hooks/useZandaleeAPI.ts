@@ -1,9 +1,8 @@
 import { useState, useEffect } from 'react';
+import { getApiBase, getApiWsBase } from '@/utils/apiConfig';
 
 // -------------------- API BASE --------------------
-const API_BASE =
-  import.meta.env.VITE_ZANDALEE_API_BASE?.replace(/\/+$/, "") ||
-  "http://127.0.0.1:11500";
+const API_BASE = getApiBase();
 
 interface Message {
   id: string;
@@ -112,7 +111,7 @@ export const useZandaleeAPI = () => {
   // WebSocket connection for real-time updates
   useEffect(() => {
     const connectWebSocket = () => {
-      const ws = new WebSocket(`${API_BASE.replace('http', 'ws')}/ws`);
+      const ws = new WebSocket(`${getApiWsBase()}/ws`);
       
       ws.onopen = () => {
         setIsConnected(true);
@@ -9,6 +9,11 @@ export const getApiBase = (): string => {
   return base.replace(/\/+$/, "");
 };
 
+// WebSocket URL of the API itself (for sockets the backend serves, e.g. /ws/vu)
+export const getApiWsBase = (): string => {
+  return getApiBase().replace(/^http/, "ws");
+};
+
 // Utility function to handle both relative and absolute WebSocket URLs  
 export const getWsBase = (): string => {
   const wsBase = import.meta.env.VITE_WS_BASE || "/ws";
@@ -1,17 +1,24 @@
-
 #!/usr/bin/env python3
 """
 Zandalee AI Desktop - Startup Script
-This script starts both the Python backend and opens the web interface
+This script starts the Python backend and the web interface in parallel and
+opens the browser as soon as both report ready.
 """
 
 import os
 import sys
-import subprocess
+import json
 import time
+import argparse
+import subprocess
 import webbrowser
+import urllib.request
 from pathlib import Path
 
+ROOT = Path(__file__).parent
+FRONTEND_PORT = 8080
+
+
 def check_python_requirements():
     """Check if required Python packages are installed"""
     try:
@@ -24,89 +31,170 @@ def check_python_requirements():
         print("Please run: pip install -r backend/requirements.txt")
         return False
 
-def start_backend():
-    """Start the FastAPI backend server"""
-    backend_dir = Path(__file__).parent / "backend"
+def start_backend(port, prod, workers=1):
+    """Start the FastAPI backend server (with the reload watcher unless in production mode)"""
+    backend_dir = ROOT / "backend"
     if not backend_dir.exists():
         print("✗ Backend directory not found")
         return None
-    
-    print("🚀 Starting Zandalee backend...")
-    
-    # Start the FastAPI server
-    process = subprocess.Popen([
-        sys.executable, "-m", "uvicorn", "main:app", 
-        "--host", "127.0.0.1", 
-        "--port", "3001",
-        "--reload"
-    ], cwd=backend_dir)
-    
-    return process
-
-def start_frontend():
-    """Start the React development server"""
+
+    print(f"🚀 Starting Zandalee backend on port {port}...")
+
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1",
+        "--port", str(port)
+    ]
+    if not prod:
+        command.append("--reload")
+    elif workers > 1:
+        command += ["--workers", str(workers)]
+    env = dict(os.environ, ZANDALEE_PORT=str(port), ZANDALEE_WORKERS=str(workers if prod else 1))
+    return subprocess.Popen(command, cwd=backend_dir, env=env)
+
+def start_frontend(api_base, prod):
+    """Start the Vite dev server, or serve the production build in production mode"""
     print("🌐 Starting Zandalee web interface...")
-    
-    # Check if npm/yarn is available and node_modules exists
-    if not Path("node_modules").exists():
+    npm = "npm.cmd" if os.name == "nt" else "npm"
+
+    # Check if node_modules exists
+    if not (ROOT / "node_modules").exists():
         print("Installing frontend dependencies...")
-        subprocess.run(["npm", "install"], check=True)
-    
-    # Start the Vite dev server
-    process = subprocess.Popen([
-        "npm", "run", "dev"
-    ])
-    
-    return process
+        subprocess.run([npm, "install"], cwd=ROOT, check=True)
+
+    env = dict(os.environ)
+    env.setdefault("VITE_ZANDALEE_API_BASE", api_base)
+
+    if prod:
+        if not (ROOT / "dist").exists():
+            print("Building frontend...")
+            subprocess.run([npm, "run", "build"], cwd=ROOT, env=env, check=True)
+        command = [npm, "run", "preview", "--", "--port", str(FRONTEND_PORT), "--strictPort"]
+    else:
+        command = [npm, "run", "dev"]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+def probe(url):
+    """GET ``url``; returns the decoded JSON body (or {} for non-JSON), None if unreachable"""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            body = response.read()
+    except Exception:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return {}
+
+def wait_until_ready(backend_url, frontend_url, processes, timeout):
+    """Poll backend /health and the frontend with exponential backoff until both answer.
+
+    Returns the backend's last health payload, or None if a process exited
+    or the timeout passed first.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    health = None
+    backend_ready = frontend_ready = False
+    last_msg = None
+
+    while time.monotonic() < deadline:
+        for name, process in processes.items():
+            if process.poll() is not None:
+                print(f"✗ {name} exited with code {process.returncode}")
+                return None
+
+        if not backend_ready:
+            health = probe(f"{backend_url}/health")
+            if health:
+                backend_ready = bool(health.get("ready"))
+                if health.get("msg") != last_msg:
+                    last_msg = health.get("msg")
+                    print(f"⏳ Backend: {last_msg}")
+        if not frontend_ready:
+            frontend_ready = probe(frontend_url) is not None
+
+        if backend_ready and frontend_ready:
+            return health
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
+
+    print(f"✗ Timed out after {timeout:.0f}s waiting for "
+          + " and ".join(name for name, ready in (("backend", backend_ready), ("frontend", frontend_ready)) if not ready))
+    return None
+
+def stop(processes):
+    for process in processes.values():
+        if process.poll() is None:
+            process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
 
 def main():
+    parser = argparse.ArgumentParser(description="Start the Zandalee backend and web interface")
+    parser.add_argument("--port", type=int, default=int(os.getenv("ZANDALEE_PORT", "8759")),
+                        help="backend port (default: $ZANDALEE_PORT or 8759)")
+    parser.add_argument("--prod", action="store_true",
+                        help="production mode: no reload watcher, serve the built frontend")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ZANDALEE_WORKERS", "1")),
+                        help="backend worker processes in production mode (default: $ZANDALEE_WORKERS or 1)")
+    parser.add_argument("--no-browser", action="store_true", help="do not open the browser")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for readiness")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("🤖 Zandalee AI Desktop Assistant")
     print("=" * 50)
-    
+
     # Check requirements
     if not check_python_requirements():
         sys.exit(1)
-    
+
+    backend_url = f"http://127.0.0.1:{args.port}"
+    frontend_url = f"http://localhost:{FRONTEND_PORT}"
+    processes = {}
+
     try:
-        # Start backend
-        backend_process = start_backend()
+        if args.workers > 1 and not args.prod:
+            print("⚠️  --workers needs --prod (the reload watcher runs a single worker)")
+        backend_process = start_backend(args.port, args.prod, args.workers)
         if not backend_process:
             sys.exit(1)
-        
-        # Wait a moment for backend to start
-        print("⏳ Waiting for backend to initialize...")
-        time.sleep(3)
-        
-        # Start frontend
-        frontend_process = start_frontend()
-        
-        # Wait a moment for frontend to start
-        print("⏳ Waiting for frontend to initialize...")
-        time.sleep(5)
-        
-        # Open browser
-        print("🌐 Opening Zandalee in your browser...")
-        webbrowser.open("http://localhost:8080")
-        
+        processes["backend"] = backend_process
+        processes["frontend"] = start_frontend(backend_url, args.prod)
+
+        health = wait_until_ready(backend_url, frontend_url, processes, args.timeout)
+        if health is None:
+            stop(processes)
+            sys.exit(1)
+
+        if not args.no_browser:
+            print("🌐 Opening Zandalee in your browser...")
+            webbrowser.open(frontend_url)
+
         print("\n" + "=" * 50)
-        print("✅ Zandalee is now running!")
-        print("🌐 Web Interface: http://localhost:8080")
-        print("🔧 API Backend: http://localhost:3001")
+        print(f"✅ Zandalee is now running! ({health.get('msg')})")
+        print(f"🌐 Web Interface: {frontend_url}")
+        print(f"🔧 API Backend: {backend_url}")
         print("⌨️  Press Ctrl+C to stop both servers")
         print("=" * 50)
-        
-        # Wait for user to stop
-        try:
-            backend_process.wait()
-        except KeyboardInterrupt:
-            print("\n🛑 Shutting down Zandalee...")
-            backend_process.terminate()
-            frontend_process.terminate()
-            print("✅ Zandalee stopped successfully")
-    
+
+        # Run until the user stops us or either server exits
+        while all(process.poll() is None for process in processes.values()):
+            time.sleep(0.5)
+        print("\n🛑 A server exited; shutting down Zandalee...")
+        stop(processes)
+
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down Zandalee...")
+        stop(processes)
+        print("✅ Zandalee stopped successfully")
     except Exception as e:
         print(f"❌ Error starting Zandalee: {e}")
+        stop(processes)
         sys.exit(1)
 
 if __name__ == "__main__":